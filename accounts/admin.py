@@ -1,10 +1,17 @@
 from django.contrib import admin
-from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from api.admin import LargeTableAdminMixin
 from .models import User, Profile
 
 
+@admin.register(User)
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
+    pass
 
 
-
-admin.site.register(User, UserAdmin)
-admin.site.register(Profile)
\ No newline at end of file
+@admin.register(Profile)
+class ProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'name', 'time_zone', 'preferred_daily_start_time')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'name')
+    raw_id_fields = ('user',)
@@ -0,0 +1,119 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+DEFAULTS = {
+    'CAPACITY': 1_000_000,
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 5,
+    'REBUILD_INTERVAL': 3600,
+}
+
+
+def filter_settings():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_BLACKLIST_FILTER', {})}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys"""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing: k positions derived from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class BlacklistFilter:
+    """
+    In-memory Bloom filter of blacklisted refresh token jtis.
+
+    A miss means the token is definitely not blacklisted, so the database is
+    only consulted on a hit. Rows blacklisted by other processes are pulled in
+    by an incremental sync every SYNC_INTERVAL seconds, and the filter is
+    rebuilt from scratch every REBUILD_INTERVAL seconds to drop pruned tokens.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._sync_from = 0
+        self._synced_at = 0
+        self._built_at = 0
+
+    def _rebuild(self, config):
+        count = BlacklistedToken.objects.count()
+        bloom = BloomFilter(max(config['CAPACITY'], count * 2), config['ERROR_RATE'])
+        last_id = 0
+        rows = BlacklistedToken.objects.order_by('pk').values_list('pk', 'token__jti')
+        for pk, jti in rows.iterator(chunk_size=10000):
+            bloom.add(jti)
+            last_id = pk
+        self._bloom = bloom
+        self._last_id = self._sync_from = last_id
+        self._synced_at = self._built_at = time.monotonic()
+
+    def _sync(self):
+        # Pull in tokens blacklisted (possibly by other processes) since the
+        # previous sync. Rescanning one window back also catches rows whose
+        # transactions committed out of primary key order.
+        start_id, self._sync_from = self._sync_from, self._last_id
+        rows = BlacklistedToken.objects.filter(pk__gt=start_id).order_by('pk')
+        for pk, jti in rows.values_list('pk', 'token__jti').iterator(chunk_size=10000):
+            self._bloom.add(jti)
+            self._last_id = max(self._last_id, pk)
+        self._synced_at = time.monotonic()
+
+    def _refresh(self):
+        config = filter_settings()
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < config['SYNC_INTERVAL']:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._bloom is None or now - self._built_at >= config['REBUILD_INTERVAL']:
+                self._rebuild(config)
+            elif now - self._synced_at >= config['SYNC_INTERVAL']:
+                self._sync()
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild(filter_settings())
+
+    def add(self, jti):
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def might_contain(self, jti):
+        self._refresh()
+        return jti in self._bloom
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._last_id = self._sync_from = 0
+
+
+blacklist_filter = BlacklistFilter()
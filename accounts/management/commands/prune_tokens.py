@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Tokens deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between chunks to let other writers in')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk')
+        deleted = 0
+
+        while True:
+            ids = list(expired.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+
+            # Blacklist rows go with their outstanding token through the cascade
+            with transaction.atomic():
+                OutstandingToken.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {deleted} expired tokens')
+        )
@@ -0,0 +1,171 @@
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from api.routing import route_to_shard, shard_for
+from schedules.models import ProgressStreak
+from tasks.models import Category, Task
+from .models import User, Profile
+
+
+# Recurring tasks optionally seeded for every provisioned user
+DEFAULT_RECURRING_TASKS = [
+    {'title': 'Morning Prayer', 'category': 'spiritual', 'start_time': '06:00:00', 'end_time': '06:30:00', 'priority': 'high'},
+    {'title': 'Exercise', 'category': 'health', 'start_time': '06:30:00', 'end_time': '07:00:00', 'priority': 'medium'},
+    {'title': 'Focused Work', 'category': 'work', 'start_time': '09:00:00', 'end_time': '12:00:00', 'priority': 'high'},
+    {'title': 'Study', 'category': 'study', 'start_time': '19:00:00', 'end_time': '20:00:00', 'priority': 'medium'},
+    {'title': 'Family Time', 'category': 'family', 'start_time': '20:00:00', 'end_time': '21:00:00', 'priority': 'high'},
+]
+
+HASH_BATCH_SIZE = 64
+
+
+def _init_worker():
+    # Needed when the pool uses the spawn start method (macOS, Windows)
+    django.setup()
+
+
+def _hash_batch(passwords):
+    # make_password(None) returns an unusable password
+    return [make_password(password) for password in passwords]
+
+
+def hash_passwords(passwords, processes=None):
+    """Hash passwords across a process pool, preserving order"""
+    batches = [passwords[i:i + HASH_BATCH_SIZE] for i in range(0, len(passwords), HASH_BATCH_SIZE)]
+    if processes == 1 or len(batches) <= 1:
+        return [hashed for batch in batches for hashed in _hash_batch(batch)]
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as executor:
+        return [hashed for batch in executor.map(_hash_batch, batches) for hashed in batch]
+
+
+def _existing(field, values, chunk_size=500):
+    values = list(values)
+    found = set()
+    for i in range(0, len(values), chunk_size):
+        found.update(User.objects.filter(**{f'{field}__in': values[i:i + chunk_size]}).values_list(field, flat=True))
+    return found
+
+
+def _default_tasks_for(users, categories):
+    return [
+        Task(user=user, category=categories[template['category']], title=template['title'],
+             start_time=template['start_time'], end_time=template['end_time'],
+             priority=template['priority'], is_recurring=True, recurrence_pattern='daily')
+        for user in users
+        for template in DEFAULT_RECURRING_TASKS
+        if template['category'] in categories
+    ]
+
+
+def _insert_users(users):
+    """
+    Insert users, skipping those whose username or email was taken since
+    provision_users checked; returns (inserted, skipped usernames).
+    """
+    try:
+        with transaction.atomic():
+            return User.objects.bulk_create(users), []
+    except IntegrityError:
+        pass
+
+    # Another provisioning run or registration got in first: insert one at a time
+    inserted, skipped = [], []
+    for user in users:
+        user.pk = None
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([user])
+        except IntegrityError:
+            skipped.append(user.username)
+        else:
+            inserted.append(user)
+    return inserted, skipped
+
+
+def provision_users(rows, processes=None, chunk_size=1000, default_tasks=False):
+    """
+    Create users and profiles in bulk from validated rows.
+
+    Rows without a password get an unusable password and an invite token
+    that can be redeemed through the accept-invite endpoint. Rows whose
+    username or email already exist (or repeat earlier rows) are skipped,
+    including those created concurrently while the batch is inserted.
+    """
+    started = time.perf_counter()
+    existing_usernames = _existing('username', {row['username'] for row in rows})
+    existing_emails = _existing('email', {row['email'] for row in rows})
+
+    new_rows, skipped = [], []
+    for row in rows:
+        if row['username'] in existing_usernames or row['email'] in existing_emails:
+            skipped.append(row['username'])
+            continue
+        existing_usernames.add(row['username'])
+        existing_emails.add(row['email'])
+        new_rows.append(row)
+
+    hash_started = time.perf_counter()
+    hashes = hash_passwords([row.get('password') or None for row in new_rows], processes)
+    hash_seconds = time.perf_counter() - hash_started
+
+    categories = {category.name: category for category in Category.objects.all()} if default_tasks else {}
+    invites, created = [], 0
+    insert_started = time.perf_counter()
+    for i in range(0, len(new_rows), chunk_size):
+        chunk = new_rows[i:i + chunk_size]
+        with transaction.atomic():
+            users, conflicts = _insert_users([
+                User(username=row['username'], email=row['email'],
+                     first_name=row.get('first_name', ''), last_name=row.get('last_name', ''),
+                     password=password)
+                for row, password in zip(chunk, hashes[i:i + chunk_size])
+            ])
+            skipped.extend(conflicts)
+            created += len(users)
+            if any(user.pk is None for user in users):
+                # Backends that cannot return ids from a bulk insert
+                ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'pk'))
+                for user in users:
+                    user.pk = ids[user.username]
+
+            Profile.objects.bulk_create([Profile(user=user) for user in users])
+            ProgressStreak.objects.bulk_create([ProgressStreak(user=user) for user in users])
+            if default_tasks:
+                # Tasks are stored in their owner's shard (api/routing.py)
+                by_shard = defaultdict(list)
+                for user in users:
+                    by_shard[shard_for(user.pk)].append(user)
+                for alias, shard_users in by_shard.items():
+                    with route_to_shard(alias):
+                        Task.objects.bulk_create(_default_tasks_for(shard_users, categories))
+
+        invites.extend(
+            {
+                'username': user.username,
+                'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+                'token': default_token_generator.make_token(user),
+            }
+            for user in users
+            if not user.has_usable_password()
+        )
+    insert_seconds = time.perf_counter() - insert_started
+
+    total_seconds = time.perf_counter() - started
+    return {
+        'created': created,
+        'skipped': skipped,
+        'invites': invites,
+        'hash_seconds': round(hash_seconds, 3),
+        'insert_seconds': round(insert_seconds, 3),
+        'total_seconds': round(total_seconds, 3),
+        'users_per_second': round(created / total_seconds, 1) if total_seconds else 0,
+    }
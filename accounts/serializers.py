@@ -1,6 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.tokens import default_token_generator
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from schedules.models import ProgressStreak
 from .models import User, Profile
+from .tokens import FilteredRefreshToken
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -21,6 +27,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user = User.objects.create_user(**validated_data)
         # Create a profile for the user
         Profile.objects.create(user=user)
+        # and the streak row that completions update in place
+        ProgressStreak.objects.create(user=user)
         return user
 
 
@@ -41,4 +49,44 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
-    new_password = serializers.CharField(required=True, validators=[validate_password])
\ No newline at end of file
+    new_password = serializers.CharField(required=True, validators=[validate_password])
+
+
+class ProvisionUserSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150)
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    # Users provisioned without a password receive an invite token instead
+    password = serializers.CharField(required=False, allow_blank=True, validators=[validate_password])
+
+
+class ProvisionSerializer(serializers.Serializer):
+    users = ProvisionUserSerializer(many=True)
+    default_tasks = serializers.BooleanField(default=False)
+
+
+class AcceptInviteSerializer(serializers.Serializer):
+    uid = serializers.CharField()
+    token = serializers.CharField()
+    password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
+    password2 = serializers.CharField(write_only=True, required=True)
+    
+    def validate(self, attrs):
+        if attrs['password'] != attrs['password2']:
+            raise serializers.ValidationError({"password": "Password fields didn't match."})
+        
+        try:
+            user = User.objects.get(pk=force_str(urlsafe_base64_decode(attrs['uid'])))
+        except (User.DoesNotExist, ValueError, TypeError, OverflowError):
+            user = None
+        
+        if user is None or not default_token_generator.check_token(user, attrs['token']):
+            raise serializers.ValidationError({"token": "Invalid or expired invite."})
+        
+        attrs['user'] = user
+        return attrs
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
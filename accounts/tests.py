@@ -3,7 +3,20 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+import os
+import tempfile
+from unittest import mock
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from schedules.models import ArchivedSchedule, DailySchedule, DailyTask, ProgressStreak, Reminder
+from tasks.models import Category, Task
+from .blacklist import BloomFilter, blacklist_filter
 from .models import Profile
+from .provisioning import provision_users
 
 User = get_user_model()
 
@@ -43,6 +56,25 @@ class UserModelTest(TestCase):
             password='testpass123'
         )
         self.assertEqual(str(user), 'testuser')
+    
+    def test_delete_user_deletes_their_rows(self):
+        """Test deleting a user deletes their tasks, schedules and reminders"""
+        user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        category = Category.objects.create(name='work', color='#F9A602')
+        Task.objects.create(user=user, category=category, title='Task', start_time='09:00:00', end_time='10:00:00')
+        schedule = DailySchedule.objects.create(user=user, date=timezone.localdate())
+        daily_task = DailyTask.objects.create(schedule=schedule, title='Task', category=category,
+                                              start_time='09:00:00', end_time='10:00:00')
+        Reminder.objects.create(user=user, task=daily_task, reminder_time=timezone.now())
+        now = timezone.now()
+        ArchivedSchedule.objects.create(id=schedule.pk + 1, user=user, date=timezone.localdate() - timedelta(days=400),
+                                        tasks=b'', created_at=now, updated_at=now)
+        
+        # The user foreign keys have no database constraint, so the cascade
+        # is Django's rather than the database's
+        user.delete()
+        for model in (Task, DailySchedule, DailyTask, Reminder, ArchivedSchedule):
+            self.assertFalse(model.objects.exists(), model.__name__)
 
 class ProfileModelTest(TestCase):
     def setUp(self):
@@ -156,11 +188,213 @@ class AuthenticationAPITest(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         
-        # Check that user and profile were created
+        # Check that user, profile and streak were created
         user = User.objects.get(username='newuser')
         self.assertTrue(hasattr(user, 'profile'))
+        self.assertEqual(user.progress_streak.current_streak, 0)
         
         # Check profile defaults
         self.assertEqual(user.profile.name, '')
         self.assertEqual(str(user.profile.preferred_daily_start_time), '06:00:00')
-        self.assertEqual(user.profile.time_zone, 'UTC')
\ No newline at end of file
+        self.assertEqual(user.profile.time_zone, 'UTC')
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives(self):
+        """Test every added key is reported as present"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f'jti-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+    
+    def test_false_positive_rate(self):
+        """Test the false positive rate stays near the configured rate"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TokenBlacklistAPITest(APITestCase):
+    def setUp(self):
+        blacklist_filter.reset()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(user=self.user)
+    
+    def test_refresh_valid_token(self):
+        """Test refreshing a token that is not blacklisted"""
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+    
+    def test_refresh_after_logout(self):
+        """Test a token blacklisted on logout can no longer be refreshed"""
+        # Build the filter before logout so the token must be added incrementally
+        self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        
+        response = self.client.post(reverse('logout'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_filter_syncs_tokens_blacklisted_elsewhere(self):
+        """Test tokens blacklisted by another process are picked up on sync"""
+        blacklist_filter.rebuild()
+        self.refresh.blacklist()
+        self.assertFalse(blacklist_filter.might_contain(self.refresh['jti']))
+        
+        with self.settings(TOKEN_BLACKLIST_FILTER={'SYNC_INTERVAL': 0}):
+            self.assertTrue(blacklist_filter.might_contain(self.refresh['jti']))
+
+
+class PruneTokensCommandTest(TestCase):
+    def test_prune_expired_tokens(self):
+        """Test only expired tokens and their blacklist entries are deleted"""
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(jti=f'expired-{i}', token='', expires_at=now - timedelta(days=1))
+            BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(jti='live', token='', expires_at=now + timedelta(days=1))
+        
+        out = StringIO()
+        call_command('prune_tokens', chunk_size=2, stdout=out)
+        
+        self.assertIn('Pruned 5 expired tokens', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+
+
+class ProvisionUsersTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username='existing',
+            email='existing@example.com',
+            password='testpass123'
+        )
+        Category.objects.create(name='work', color='#F9A602')
+        self.rows = [
+            {'username': 'alice', 'email': 'alice@example.com', 'password': 'alicepass123'},
+            {'username': 'bob', 'email': 'bob@example.com', 'first_name': 'Bob'},
+            {'username': 'existing', 'email': 'other@example.com'},
+            {'username': 'alice', 'email': 'alice2@example.com'},
+        ]
+    
+    def test_provision_users(self):
+        """Test users and profiles are created and duplicates skipped"""
+        result = provision_users(self.rows, processes=1, chunk_size=1)
+        
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['skipped'], ['existing', 'alice'])
+        self.assertTrue(User.objects.get(username='alice').check_password('alicepass123'))
+        self.assertEqual(User.objects.get(username='bob').first_name, 'Bob')
+        self.assertEqual(Profile.objects.filter(user__username__in=['alice', 'bob']).count(), 2)
+        self.assertEqual(ProgressStreak.objects.filter(user__username__in=['alice', 'bob']).count(), 2)
+    
+    def test_users_created_concurrently_skipped(self):
+        """Test users created after the existence check are skipped, not an IntegrityError"""
+        # As if another provisioning run inserted 'existing' in between
+        with mock.patch('accounts.provisioning._existing', return_value=set()):
+            result = provision_users(self.rows[:3], processes=1)
+        
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['skipped'], ['existing'])
+        self.assertEqual(User.objects.get(username='existing').email, 'existing@example.com')
+        self.assertEqual(Profile.objects.filter(user__username__in=['alice', 'bob']).count(), 2)
+    
+    def test_provision_users_with_process_pool(self):
+        """Test passwords hashed in worker processes are usable"""
+        rows = [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': f'password-{i}'}
+            for i in range(3)
+        ]
+        with mock.patch('accounts.provisioning.HASH_BATCH_SIZE', 1):
+            provision_users(rows, processes=2)
+        self.assertTrue(User.objects.get(username='user2').check_password('password-2'))
+    
+    def test_users_without_password_get_invites(self):
+        """Test users without a password get an unusable password and an invite"""
+        result = provision_users(self.rows, processes=1)
+        
+        bob = User.objects.get(username='bob')
+        self.assertFalse(bob.has_usable_password())
+        self.assertEqual([invite['username'] for invite in result['invites']], ['bob'])
+    
+    def test_default_tasks(self):
+        """Test default recurring tasks are seeded for available categories"""
+        provision_users(self.rows, processes=1, default_tasks=True)
+        
+        tasks = Task.objects.filter(user__username='alice')
+        self.assertEqual(tasks.count(), 1)
+        self.assertTrue(tasks.get().is_recurring)
+        self.assertEqual(tasks.get().category.name, 'work')
+    
+    def test_provision_users_command(self):
+        """Test provisioning users from a CSV file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'users.csv')
+            invites_path = os.path.join(tmp, 'invites.csv')
+            with open(path, 'w') as f:
+                f.write('username,email,first_name,last_name,password\n')
+                f.write('carol,carol@example.com,Carol,Smith,carolpass123\n')
+                f.write('dave,dave@example.com,Dave,Jones,\n')
+            
+            out = StringIO()
+            call_command('provision_users', path, processes=1, invites_out=invites_path, stdout=out)
+            
+            self.assertIn('Created 2 users', out.getvalue())
+            with open(invites_path) as f:
+                self.assertIn('dave', f.read())
+        self.assertTrue(User.objects.get(username='carol').check_password('carolpass123'))
+
+
+class ProvisionAPITest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+        self.data = {'users': [{'username': 'erin', 'email': 'erin@example.com'}]}
+    
+    def test_provision_requires_staff(self):
+        """Test non-staff users cannot provision users"""
+        user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.post(reverse('provision'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_provision_and_accept_invite(self):
+        """Test a provisioned user can set a password from the invite"""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse('provision'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 1)
+        invite = response.data['invites'][0]
+        
+        self.client.force_authenticate(user=None)
+        data = {
+            'uid': invite['uid'],
+            'token': invite['token'],
+            'password': 'erinpass123',
+            'password2': 'erinpass123',
+        }
+        response = self.client.post(reverse('accept-invite'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertTrue(User.objects.get(username='erin').check_password('erinpass123'))
+        
+        # Invites can only be used once
+        response = self.client.post(reverse('accept-invite'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from monitoring import metrics
+from .blacklist import blacklist_filter
+
+
+class FilteredRefreshToken(RefreshToken):
+    """Refresh token whose blacklist check is fronted by the in-memory filter"""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        # Only a filter hit needs the database to rule out a false positive
+        if not blacklist_filter.might_contain(jti):
+            metrics.cache_requests.inc(cache='token_blacklist_filter', result='hit')
+            return
+        metrics.cache_requests.inc(cache='token_blacklist_filter', result='miss')
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
@@ -11,4 +11,6 @@ urlpatterns = [
     path('logout/', views.logout_user, name='logout'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change-password'),
+    path('provision/', views.provision, name='provision'),
+    path('accept-invite/', views.accept_invite, name='accept-invite'),
 ]
\ No newline at end of file
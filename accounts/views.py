@@ -2,22 +2,28 @@ from django.shortcuts import render
 
 from rest_framework import status, generics
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from api.throttling import AuthRateThrottle
 from rest_framework.permissions import AllowAny
 from .models import User, Profile
+from .provisioning import provision_users
+from .tokens import FilteredRefreshToken
 from .serializers import (
     UserRegistrationSerializer, 
     UserSerializer, 
     ProfileSerializer, 
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    ProvisionSerializer,
+    AcceptInviteSerializer
 )
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthRateThrottle])
 def register_user(request):
     if request.method == 'POST':
         serializer = UserRegistrationSerializer(data=request.data)
@@ -38,6 +44,7 @@ def register_user(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([AuthRateThrottle])
 def login_user(request):
     if request.method == 'POST':
         username = request.data.get('username')
@@ -65,13 +72,51 @@ def login_user(request):
 def logout_user(request):
     try:
         refresh_token = request.data.get('refresh')
-        token = RefreshToken(refresh_token)
+        token = FilteredRefreshToken(refresh_token)
         token.blacklist()
         return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def provision(request):
+    """Bulk-create users for organisation onboarding"""
+    serializer = ProvisionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    
+    # Hashing in-process: a process pool per request would fork the web worker
+    result = provision_users(
+        serializer.validated_data['users'],
+        processes=1,
+        default_tasks=serializer.validated_data['default_tasks']
+    )
+    return Response(result, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@throttle_classes([AuthRateThrottle])
+def accept_invite(request):
+    """Set the password of a provisioned user from an invite token"""
+    serializer = AcceptInviteSerializer(data=request.data)
+    if serializer.is_valid():
+        user = serializer.validated_data['user']
+        user.set_password(serializer.validated_data['password'])
+        user.save()
+        
+        refresh = RefreshToken.for_user(user)
+        
+        return Response({
+            'user': UserSerializer(user).data,
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'message': 'Invite accepted'
+        }, status=status.HTTP_200_OK)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [IsAuthenticated]
@@ -83,6 +128,7 @@ class ProfileView(generics.RetrieveUpdateAPIView):
 class ChangePasswordView(generics.UpdateAPIView):
     serializer_class = ChangePasswordSerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = [AuthRateThrottle]
     
     def update(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -0,0 +1,61 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(model, using='default'):
+    """
+    Row count of the model's table from the database's statistics, or None.
+
+    PostgreSQL keeps an estimate in pg_class (refreshed by autovacuum);
+    SQLite has one in sqlite_stat1 once ANALYZE has run. Other backends
+    have none here.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # The first number of an index's stat is the table's row count
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    # PostgreSQL reports -1 for tables never analysed
+    return count if count >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator counting unfiltered querysets from the table statistics.
+
+    An exact COUNT(*) reads the whole table, which on large tables costs
+    more than the page itself. Filtered querysets, and tables estimated
+    below ``exact_below`` rows, are still counted exactly.
+    """
+    exact_below = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_below:
+                return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin settings for tables with millions of rows: estimated counts,
+    and no second COUNT(*) of the whole table for "x of y selected"
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
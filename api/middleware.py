@@ -0,0 +1,79 @@
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from assets.middleware import accepted_encodings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DEFAULTS = {
+    # Smaller bodies gain little and cost a compression call per response
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'CONTENT_TYPES': ('application/json', 'application/msgpack', 'text/'),
+    # Views whose responses carry tokens are never compressed: compressed
+    # sizes would leak them to an attacker who can inject guesses (BREACH)
+    'SKIP_VIEWS': ('login', 'register', 'accept-invite', 'token_refresh', 'provision', 'sync-events-ticket'),
+}
+
+
+def compression_settings():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies above ``MIN_SIZE`` bytes.
+
+    Brotli is preferred when the ``brotli`` package is installed and the
+    client accepts it, gzip otherwise. Streaming responses (server-sent
+    events, files), responses that are already encoded and those of
+    ``SKIP_VIEWS`` are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = compression_settings()
+        self.min_size = config['MIN_SIZE']
+        self.gzip_level = config['GZIP_LEVEL']
+        self.brotli_quality = config['BROTLI_QUALITY']
+        self.content_types = tuple(config['CONTENT_TYPES'])
+        self.skip_views = frozenset(config['SKIP_VIEWS'])
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(self.content_types)):
+            return response
+        match = request.resolver_match
+        if match is not None and match.view_name in self.skip_views:
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if len(response.content) < self.min_size:
+            return response
+
+        accepted = accepted_encodings(request)
+        if brotli is not None and 'br' in accepted:
+            encoding, content = 'br', brotli.compress(response.content, quality=self.brotli_quality)
+        elif 'gzip' in accepted:
+            encoding, content = 'gzip', gzip.compress(response.content, self.gzip_level, mtime=0)
+        else:
+            return response
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response.headers['Content-Length'] = str(len(content))
+        response.headers['Content-Encoding'] = encoding
+        # The encoded body differs from the identity one, so a strong ETag must become weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
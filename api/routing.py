@@ -0,0 +1,285 @@
+import random
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.utils.functional import SimpleLazyObject
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+DEFAULTS = {
+    # Replica aliases of each primary alias ('default' or a shard)
+    'REPLICAS': {},
+    # Apps whose models safe-method requests read from replicas; user
+    # lookups (accounts) stay on the primary so new users can log in at once
+    'REPLICA_APPS': ('tasks', 'schedules', 'sync'),
+    # How long a user's requests keep reading from primaries after they write
+    'READ_YOUR_WRITES_SECONDS': 10,
+    # Aliases the per-user models are spread over by user id; empty keeps
+    # them in the default database. Changing the list moves users' shards.
+    'SHARDS': (),
+}
+
+# Models stored in their owner's shard -> the id of an instance's owner
+SHARDED = {
+    'tasks.task': lambda task: task.user_id,
+    'schedules.dailyschedule': lambda schedule: schedule.user_id,
+    'schedules.dailytask': lambda daily_task: daily_task.schedule.user_id,
+    'schedules.reminder': lambda reminder: reminder.user_id,
+    'schedules.archivedschedule': lambda archived: archived.user_id,
+}
+# Global models copied to every shard, since sharded rows join to them
+MIRRORED = ('tasks.category',)
+
+
+def routing_settings():
+    return {**DEFAULTS, **getattr(settings, 'DATABASE_ROUTING', {})}
+
+
+def shard_for(user_id, shards=None):
+    """Alias of the shard holding the user's rows ('default' without shards)"""
+    shards = routing_settings()['SHARDS'] if shards is None else shards
+    return shards[user_id % len(shards)] if shards else 'default'
+
+
+def request_user_id(request):
+    """Id of the request's user without loading it: the authenticated user, a bearer token or the session"""
+    # DRF sets request.user once it has authenticated; before that it is
+    # Django's lazy session user, which is not evaluated here
+    user = request.__dict__.get('user')
+    if user is not None and type(user) is not SimpleLazyObject:
+        return user.pk if user.is_authenticated else None
+
+    auth = request.META.get('HTTP_AUTHORIZATION', '')
+    if auth.startswith('Bearer '):
+        try:
+            return int(AccessToken(auth[len('Bearer '):])[jwt_settings.USER_ID_CLAIM])
+        except (TokenError, KeyError, TypeError, ValueError):
+            return None
+    session = getattr(request, 'session', None)
+    user_id = session.get(SESSION_KEY) if session is not None else None
+    return int(user_id) if user_id is not None else None
+
+
+def _primaries(config):
+    """Primary alias of each replica alias"""
+    return {replica: primary for primary, replicas in config['REPLICAS'].items() for replica in replicas}
+
+
+def _pin_key(user_id):
+    return f'routing:primary:{user_id}'
+
+
+# Statements that change rows
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+@lru_cache
+def _replicated_tables(app_labels):
+    return tuple(model._meta.db_table for label in app_labels for model in apps.get_app_config(label).get_models())
+
+
+def _watch_writes(context, tables):
+    """
+    Execute wrapper marking the context as having written once a statement
+    changes a table of the replicated apps, whatever the request method
+    """
+    def execute(run, sql, params, many, execution):
+        result = run(sql, params, many, execution)
+        if not context.wrote and sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS) \
+                and any(table in sql for table in tables):
+            context.wrote = True
+        return result
+    return execute
+
+
+class RoutingContext:
+    """What the router knows about the work in progress: a request, a user or a shard"""
+    _unknown = object()
+
+    def __init__(self, request=None, user_id=None, shard=None):
+        self.request = request
+        self.shard = shard
+        self.read_only = request is not None and request.method in SAFE_METHODS
+        self.wrote = False
+        self._user_id = user_id if request is None else self._unknown
+        self._pinned = None
+
+    @property
+    def user_id(self):
+        if self._user_id is self._unknown:
+            self._user_id = request_user_id(self.request)
+        return self._user_id
+
+    def pinned(self):
+        """Whether the user wrote recently enough that replicas may not have the write yet"""
+        if self._pinned is None:
+            self._pinned = self.user_id is not None and bool(cache.get(_pin_key(self.user_id)))
+        return self._pinned
+
+
+_context = ContextVar('database_routing', default=None)
+
+
+@contextmanager
+def _routed(context):
+    token = _context.set(context)
+    try:
+        yield context
+    finally:
+        _context.reset(token)
+
+
+def route_to_user(user_id):
+    """
+    Context manager sending sharded models to the user's shard.
+
+    For work outside requests, such as jobs; does nothing for None.
+    """
+    return _routed(RoutingContext(user_id=user_id))
+
+
+def route_to_shard(alias):
+    """Context manager sending sharded models to the shard ``alias``"""
+    return _routed(RoutingContext(shard=alias))
+
+
+class DatabaseRouter:
+    """
+    Routes queries to shards and replicas (see ``DATABASE_ROUTING``).
+
+    Sharded models go to their owner's shard. The owner is found from
+    the instance in the query hints, the user named by ``route_to_user``
+    or the request's user, in that order. Without any of them, queries
+    go to the default database.
+
+    During GET/HEAD/OPTIONS requests, models of ``REPLICA_APPS`` are read
+    from a replica of their primary. Reads fall back to the primary inside
+    a transaction, for the rest of a request once it has written, and for
+    ``READ_YOUR_WRITES_SECONDS`` after the requesting user last wrote.
+    """
+
+    def _primary(self, model, hints, config):
+        instance = hints.get('instance')
+        shards = config['SHARDS']
+        owner = SHARDED.get(model._meta.label_lower)
+        if not shards or owner is None:
+            # Rows read from a replica are written back to its primary
+            if instance is not None and instance._state.db in _primaries(config):
+                return _primaries(config)[instance._state.db]
+            return None
+
+        if instance is not None:
+            label = instance._meta.label_lower
+            if label in SHARDED and instance._state.db:
+                return _primaries(config).get(instance._state.db, instance._state.db)
+            if label == settings.AUTH_USER_MODEL.lower():
+                return shard_for(instance.pk, shards)
+            if isinstance(instance, model):
+                return shard_for(owner(instance), shards)
+
+        context = _context.get()
+        if context is not None:
+            if context.shard:
+                return context.shard
+            if context.user_id is not None:
+                return shard_for(context.user_id, shards)
+        return None
+
+    def db_for_read(self, model, **hints):
+        config = routing_settings()
+        primary = self._primary(model, hints, config)
+        context = _context.get()
+        if context is None or not context.read_only or model._meta.app_label not in config['REPLICA_APPS']:
+            return primary
+        alias = primary or 'default'
+        replicas = config['REPLICAS'].get(alias)
+        # Rows written earlier in the request may not have reached the replica
+        if not replicas or connections[alias].in_atomic_block or context.wrote or context.pinned():
+            return primary
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return self._primary(model, hints, routing_settings())
+
+    def allow_relation(self, obj1, obj2, **hints):
+        config = routing_settings()
+        # Shards and replicas are parts of one logical database
+        if config['SHARDS'] or config['REPLICAS']:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from their primary
+        return False if db in _primaries(routing_settings()) else None
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Makes the request visible to DatabaseRouter, and pins a user's reads to
+    primaries for a while after a request wrote to a replicated app. GET
+    requests count too: today's schedule and the progress stats create
+    rows. Writes are seen in the statements run, since get_or_create asks
+    for the primary whether it creates anything or not.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = routing_settings()
+        with _routed(RoutingContext(request=request)) as context, ExitStack() as stack:
+            if config['REPLICAS']:
+                watch = _watch_writes(context, _replicated_tables(tuple(config['REPLICA_APPS'])))
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(watch))
+            response = self.get_response(request)
+            if context.wrote and context.user_id is not None:
+                cache.set(_pin_key(context.user_id), True, config['READ_YOUR_WRITES_SECONDS'])
+        return response
+
+
+def mirror_save(sender, instance, **kwargs):
+    """Copy a saved global row to every shard"""
+    values = {field.attname: getattr(instance, field.attname) for field in sender._meta.concrete_fields}
+    for alias in routing_settings()['SHARDS']:
+        if alias == kwargs.get('using'):
+            continue
+        manager = sender._base_manager.using(alias)
+        if not manager.filter(pk=instance.pk).update(**values):
+            manager.bulk_create([sender(**values)])
+
+
+def mirror_delete(sender, instance, **kwargs):
+    """Delete a global row's copies, and what depends on them, from every shard"""
+    for alias in routing_settings()['SHARDS']:
+        if alias != kwargs.get('using'):
+            sender._base_manager.using(alias).filter(pk=instance.pk).delete()
+
+
+def delete_sharded_rows(sender, instance, **kwargs):
+    """Delete a deleted user's rows from their shard, which the cascade in the default database misses"""
+    shards = routing_settings()['SHARDS']
+    if not shards:
+        return
+    alias = shard_for(instance.pk, shards)
+    for label in SHARDED:
+        model = apps.get_model(label)
+        # Daily tasks go with their schedules
+        if any(field.name == 'user' for field in model._meta.fields):
+            model._base_manager.using(alias).filter(user_id=instance.pk).delete()
+
+
+for label in MIRRORED:
+    post_save.connect(mirror_save, sender=label, dispatch_uid=f'routing.mirror_save.{label}')
+    post_delete.connect(mirror_delete, sender=label, dispatch_uid=f'routing.mirror_delete.{label}')
+post_delete.connect(delete_sharded_rows, sender=settings.AUTH_USER_MODEL, dispatch_uid='routing.delete_sharded_rows')
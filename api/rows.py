@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# Fields whose to_representation returns values() data unchanged
+PASSTHROUGH = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField, serializers.ReadOnlyField,
+)
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation with the time zone looked up once rather than per value"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    zone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if zone is None or output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if timezone.is_naive(value):
+            return field.to_representation(value)
+        try:
+            value = value.astimezone(zone).isoformat()
+        except OverflowError:
+            return field.to_representation(value)
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+class ValuesRepresentation:
+    """
+    A ModelSerializer's output built from values() rows.
+
+    Skips model instances and per-field serializer dispatch for read-only
+    lists while producing the same data. Plain fields are read from their
+    (possibly related) column; a SerializerMethodField or property ``x``
+    needs a ``row_x(row)`` method on the serializer, reading the columns
+    listed for it in ``Meta.field_columns`` (or annotated from
+    ``Meta.row_annotations``, which maps those names to expressions). A
+    nested many=True serializer for a reverse relation is filled from one
+    more values() query.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        declared = getattr(serializer.Meta, 'field_columns', {})
+        annotations = getattr(serializer.Meta, 'row_annotations', {})
+        self.paths = {self.pk}
+        self.annotations = {}
+        self.steps = []
+        self.nested = []
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                self.nested.append((name, relation.field.name, ValuesRepresentation(field.child)))
+                self.steps.append((name, None, None))
+            elif name in declared:
+                method = getattr(serializer, f'row_{name}', None)
+                if method is None:
+                    raise ImproperlyConfigured(f'{type(serializer).__name__} needs a row_{name}() method')
+                for path in declared[name]:
+                    if path in annotations:
+                        self.annotations[path] = annotations[path]
+                    else:
+                        self.paths.add(path)
+                self.steps.append((name, None, method))
+            elif field.source == '*' or isinstance(field, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(f'{type(serializer).__name__}.{name} has no values() representation')
+            else:
+                path = field.source.replace('.', '__')
+                self.paths.add(path)
+                passthrough = (isinstance(field, PASSTHROUGH) and not getattr(field, 'coerce_to_string', False)
+                               and getattr(field, 'pk_field', None) is None)
+                if passthrough:
+                    convert = None
+                elif isinstance(field, serializers.DateTimeField):
+                    convert = _datetime_converter(field)
+                else:
+                    convert = field.to_representation
+                self.steps.append((name, path, convert))
+
+    def rows(self, queryset, extra=()):
+        """values() rows for queryset with the ``extra`` columns and any nested outputs"""
+        selected = queryset.prefetch_related(None)
+        if self.annotations:
+            # Grouped queries drop Meta.ordering, so keep it explicitly
+            selected = selected.annotate(**self.annotations).order_by(
+                *(queryset.query.order_by or self.model._meta.ordering)
+            )
+        rows = list(selected.values(*self.paths.union(extra, self.annotations)))
+        for name, foreign_key, child in self.nested:
+            related = child.model._default_manager.filter(**{f'{foreign_key}__in': queryset.values(self.pk)})
+            children = defaultdict(list)
+            for row in child.rows(related, extra=[foreign_key]):
+                children[row[foreign_key]].append(child.item(row))
+            for row in rows:
+                row[name] = children.get(row[self.pk], [])
+        return rows
+
+    def represent(self, queryset):
+        """Output for every row of queryset, in its order"""
+        return [self.item(row) for row in self.rows(queryset)]
+
+    def item(self, row):
+        item = {}
+        for name, path, convert in self.steps:
+            if path is None:
+                item[name] = convert(row) if convert else row[name]
+            else:
+                value = row[path]
+                item[name] = value if convert is None or value is None else convert(value)
+        return item
+
+
+class ValuesListMixin:
+    """
+    List view answering GET from values() rows (see ValuesRepresentation).
+
+    Requests the fast path cannot serve (paginated lists, serializers that
+    are not model serializers) take the regular serializer path.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        if self.paginator is not None or not isinstance(serializer, serializers.ModelSerializer):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(ValuesRepresentation(serializer).represent(queryset))
@@ -0,0 +1,10 @@
+from django.dispatch import Signal
+
+
+# Sent after a bulk_create (which sends no post_save) of rows owned by one
+# user: sender=model, user_id, pks (of the inserted rows)
+bulk_created = Signal()
+
+# Sent after a queryset update() (which sends no post_save) of rows owned by
+# one user: sender=model, user_id, pks (of the updated rows)
+bulk_updated = Signal()
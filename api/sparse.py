@@ -0,0 +1,97 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _names(value):
+    return {name.strip() for name in value.split(',') if name.strip()} if value else set()
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Serializer taking ``fields`` and ``omit`` sets of field names to keep or drop.
+
+    ``Meta.field_columns`` maps fields that are not plain model attributes
+    (method fields, properties) to the model columns they read, so that
+    ``columns()`` can tell the view which columns to load. Names listed in
+    ``Meta.row_annotations`` are computed rather than loaded. Fields it does
+    not know about make ``columns()`` return None, i.e. load everything.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and omit is None:
+            return
+        unknown = ((fields or set()) | (omit or set())) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}"]}
+            )
+        keep = set(fields) if fields else set(self.fields)
+        for name in list(self.fields):
+            if name not in keep or name in (omit or ()):
+                self.fields.pop(name)
+
+    def columns(self):
+        """(only() names, select_related() names) covering the kept fields, or None"""
+        model = self.Meta.model
+        declared = getattr(self.Meta, 'field_columns', {})
+        annotations = getattr(self.Meta, 'row_annotations', {})
+        only, related = {model._meta.pk.name}, set()
+        for name, field in self.fields.items():
+            if name in declared:
+                paths = declared[name]
+            elif field.source == '*':
+                return None
+            else:
+                paths = [field.source.replace('.', '__')]
+            for path in paths:
+                if path in annotations:
+                    continue
+                head = path.split('__')[0]
+                try:
+                    model_field = model._meta.get_field(head)
+                except FieldDoesNotExist:
+                    return None
+                if model_field.is_relation and not model_field.concrete:
+                    # Reverse relations are prefetched by the view, not selected
+                    continue
+                only.add(path)
+                if '__' in path:
+                    related.add(head)
+        return sorted(only), sorted(related)
+
+
+class SparseFieldsMixin:
+    """
+    View honouring ``?fields=a,b`` and ``?omit=c`` on GET.
+
+    The response only includes the selected fields and, when the
+    serializer can say which columns those need, the query only reads
+    those columns (with the related rows they need joined in).
+    """
+
+    def field_selection(self):
+        if self.request.method != 'GET':
+            return {}
+        params = self.request.query_params
+        if 'fields' not in params and 'omit' not in params:
+            return {}
+        return {'fields': _names(params.get('fields')) or None, 'omit': _names(params.get('omit'))}
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), SparseFieldsSerializerMixin):
+            kwargs.update(self.field_selection())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer()
+        if not isinstance(serializer, SparseFieldsSerializerMixin) or not self.field_selection():
+            return queryset
+        columns = serializer.columns()
+        if columns is None:
+            return queryset
+        only, related = columns
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
@@ -0,0 +1,609 @@
+import gzip
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.provisioning import provision_users
+from schedules.archive import archive_schedules
+from schedules.jobs import send_due_reminders
+from schedules.models import ArchivedSchedule, DailySchedule, DailyTask, Reminder
+from tasks.models import Category, Task
+from .admin import EstimatedCountPaginator, estimated_count
+from .renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from .routing import DatabaseRoutingMiddleware, route_to_user
+from .rows import ValuesListMixin
+from .throttling import TokenBucketThrottle
+
+User = get_user_model()
+
+SAMPLE = {
+    'id': 1,
+    'title': 'Caf\u00e9 \u2028 line',
+    'when': datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    'day': date(2025, 3, 1),
+    'start': time(9, 0, 0, 500000),
+    'amount': Decimal('1.50'),
+    'tags': ['a', None, True, 3.5, -7, 2 ** 40],
+    'nested': [{'empty': [], 'map': {}}],
+}
+
+
+class RendererTest(SimpleTestCase):
+    @skipUnless(orjson, 'orjson is not installed')
+    def test_same_bytes_as_json_renderer(self):
+        """Test the fast renderer's output is identical to JSONRenderer's"""
+        for media_type in ('application/json', 'application/json; indent=2', 'application/json; indent=4'):
+            self.assertEqual(
+                FastJSONRenderer().render(SAMPLE, media_type),
+                JSONRenderer().render(SAMPLE, media_type),
+            )
+    
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_uses_json_representations(self):
+        """Test MessagePack carries the same values a JSON client would see"""
+        rendered = msgpack.unpackb(MessagePackRenderer().render(SAMPLE))
+        self.assertEqual(rendered, json.loads(JSONRenderer().render(SAMPLE)))
+
+
+class ContentNegotiationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        for i in range(30):
+            Task.objects.create(
+                user=self.user,
+                category=self.category,
+                title=f'Task {i}',
+                description='Something to do ' * 5,
+                start_time='09:00:00',
+                end_time='10:00:00'
+            )
+        self.client.force_authenticate(user=self.user)
+    
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_response(self):
+        """Test clients asking for MessagePack get the same data as JSON clients"""
+        as_json = self.client.get(reverse('task-list')).json()
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), as_json)
+    
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_request(self):
+        """Test MessagePack request bodies are parsed and malformed ones rejected"""
+        payload = {'title': 'Packed', 'category': self.category.pk,
+                   'start_time': '11:00:00', 'end_time': '12:00:00'}
+        body = msgpack.packb(payload)
+        response = self.client.post(reverse('task-list'), body, content_type='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Task.objects.filter(title='Packed').exists())
+        
+        for bad in (b'\xc1', body[:-1], body + b'\x00', msgpack.packb({(1, 2): 'x'})):
+            response = self.client.post(reverse('task-list'), bad, content_type='application/msgpack')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_large_response_compressed(self):
+        """Test responses above the threshold are gzipped for clients that accept it"""
+        plain = self.client.get(reverse('task-list'))
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+    
+    @override_settings(RESPONSE_COMPRESSION={'MIN_SIZE': 0})
+    def test_token_response_not_compressed(self):
+        """Test responses carrying tokens are never compressed"""
+        response = self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123'},
+                                    format='json', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('access', response.json())
+        
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+    
+    @override_settings(RESPONSE_COMPRESSION={'MIN_SIZE': 10 ** 6})
+    def test_small_response_not_compressed(self):
+        """Test responses below the threshold are sent as is"""
+        response = self.client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+
+class SparseFieldsTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        for i in range(3):
+            Task.objects.create(
+                user=self.user,
+                category=self.category,
+                title=f'Task {i}',
+                description='Long description',
+                start_time='09:00:00',
+                end_time='10:30:00'
+            )
+        self.schedule = DailySchedule.objects.create(user=self.user)
+        for i in range(4):
+            DailyTask.objects.create(
+                schedule=self.schedule,
+                title=f'Daily {i}',
+                category=self.category,
+                start_time='09:00:00',
+                end_time='10:00:00',
+                is_completed=i == 0
+            )
+        self.client.force_authenticate(user=self.user)
+    
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json(), [query['sql'] for query in queries]
+    
+    def test_fields(self):
+        """Test only the requested fields are sent and only their columns read"""
+        tasks, queries = self.get(reverse('task-list'), fields='id,title,duration,category_name')
+        self.assertEqual(tasks[0], {'id': tasks[0]['id'], 'title': 'Task 0', 'duration': 1.5, 'category_name': 'work'})
+        
+        # One query, with the category joined rather than fetched per task
+        task_queries = [sql for sql in queries if 'tasks_' in sql]
+        self.assertEqual(len(task_queries), 1)
+        self.assertNotIn('description', task_queries[0])
+        self.assertIn('"tasks_category"."name"', task_queries[0])
+    
+    def test_omit(self):
+        """Test omitted fields are dropped and not read"""
+        tasks, queries = self.get(reverse('task-detail', args=[Task.objects.first().pk]), omit='description')
+        self.assertNotIn('description', tasks)
+        self.assertIn('title', tasks)
+        self.assertNotIn('description', queries[-1])
+    
+    def test_unknown_field(self):
+        """Test unknown field names are rejected"""
+        response = self.client.get(reverse('task-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', response.json()['fields'][0])
+    
+    def test_schedule_without_tasks(self):
+        """Test schedules listed without daily_tasks skip the task prefetch"""
+        schedules, queries = self.get(reverse('schedule-list'), fields='id,date')
+        self.assertEqual(schedules, [{'id': self.schedule.pk, 'date': str(self.schedule.date)}])
+        self.assertFalse(any('schedules_dailytask' in sql for sql in queries))
+    
+    def test_schedule_summary(self):
+        """Test the summary view carries counts from one grouped query"""
+        schedules, queries = self.get(reverse('schedule-list'), view='summary')
+        self.assertEqual(schedules, [{
+            'id': self.schedule.pk,
+            'date': str(self.schedule.date),
+            'completed_tasks_count': 1,
+            'total_tasks_count': 4,
+            'completion_percentage': 25,
+        }])
+        self.assertEqual(len([sql for sql in queries if 'schedules_dailytask' in sql]), 1)
+    
+    def test_full_schedule_unchanged(self):
+        """Test schedules without a selection still include their tasks"""
+        schedules, _ = self.get(reverse('schedule-list'))
+        self.assertEqual(len(schedules[0]['daily_tasks']), 4)
+        self.assertEqual(schedules[0]['daily_tasks'][0]['category_name'], 'work')
+        self.assertEqual(schedules[0]['completion_percentage'], 25)
+
+
+class ValuesListParityTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        work = Category.objects.create(name='work', color='#F9A602')
+        home = Category.objects.create(name='h\u00f6me "\u2028"', color='#000000')
+        for i in range(4):
+            Task.objects.create(
+                user=self.user,
+                category=work if i % 2 else home,
+                title=f'Task {i} \u00e9',
+                description='' if i else 'Line\nbreak',
+                date=date(2025, 3, i + 1),
+                start_time=time(9 + i, 15 * i, 30),
+                end_time=time(10 + i, 50),
+                priority=['high', 'medium', 'low', 'medium'][i],
+                is_recurring=i < 2,
+                recurrence_pattern='daily' if i < 2 else 'none',
+                is_completed=i == 3
+            )
+        task = Task.objects.first()
+        for day in range(3):
+            schedule = DailySchedule.objects.create(user=self.user, date=date(2025, 3, day + 1))
+            for i in range(day):
+                DailyTask.objects.create(
+                    schedule=schedule,
+                    original_task=task if i == 0 else None,
+                    title=f'Daily {i}',
+                    category=work if i else home,
+                    start_time=time(8 + i, 5),
+                    end_time=time(9 + i, 0),
+                    is_completed=i == 0,
+                    completed_at=datetime(2025, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc) if i == 0 else None
+                )
+        self.client.force_authenticate(user=self.user)
+    
+    def assertSameBytes(self, url, params=None, **headers):
+        fast = self.client.get(url, params, **headers)
+        # The serializer path the views took before
+        with mock.patch.object(ValuesListMixin, 'list', ListModelMixin.list):
+            regular = self.client.get(url, params, **headers)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, regular.content)
+        return fast
+    
+    def test_task_lists(self):
+        """Test task lists built from values() are byte-identical to the serializer output"""
+        response = self.assertSameBytes(reverse('task-list'))
+        self.assertEqual(len(response.json()), 4)
+        self.assertSameBytes(reverse('task-list'), {'ordering': '-priority', 'is_completed': 'false'})
+        self.assertSameBytes(reverse('task-list'), {'fields': 'id,duration,category_name'})
+        self.assertSameBytes(reverse('recurring-task-list'))
+        self.assertSameBytes(reverse('today-task-list'))
+    
+    def test_schedule_list(self):
+        """Test schedules built from values() are byte-identical, nested tasks included"""
+        response = self.assertSameBytes(reverse('schedule-list'))
+        self.assertEqual([len(schedule['daily_tasks']) for schedule in response.json()], [2, 1, 0])
+        self.assertSameBytes(reverse('schedule-list'), {'omit': 'daily_tasks'})
+        if msgpack is not None:
+            self.assertSameBytes(reverse('schedule-list'), HTTP_ACCEPT='application/msgpack')
+        with timezone.override(ZoneInfo('America/New_York')):
+            self.assertSameBytes(reverse('schedule-list'))
+    
+    def test_query_count(self):
+        """Test a schedule list takes one query for schedules and one for all their tasks"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('schedule-list'))
+        self.assertEqual(len([query for query in queries if 'schedules_' in query['sql']]), 2)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'read': '3/min', 'generation': '2/min', 'auth': '2/min'},
+})
+class ThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_login_throttled_with_retry_after(self):
+        """Test password checks run out of budget and tell the client when to retry"""
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: 1000.0):
+            for _ in range(2):
+                response = self.client.post(reverse('login'), {'username': 'testuser', 'password': 'wrong'})
+                self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            response = self.client.post(reverse('login'), {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # One token refills in 60 / 2 seconds
+        self.assertEqual(response['Retry-After'], '30')
+    
+    def test_forwarded_for_not_trusted_by_default(self):
+        """Test rotating a forged X-Forwarded-For header does not escape the login budget"""
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: 1000.0):
+            statuses = [
+                self.client.post(reverse('login'), {'username': 'testuser', 'password': 'wrong'},
+                                 HTTP_X_FORWARDED_FOR=f'198.51.100.{n}').status_code
+                for n in range(3)
+            ]
+        self.assertEqual(statuses[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+    
+    def test_forwarded_for_behind_trusted_proxy(self):
+        """Test the address set by a trusted proxy is what the login budget is kept for"""
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}), \
+                mock.patch.object(TokenBucketThrottle, 'timer', lambda self: 1000.0):
+            statuses = [
+                self.client.post(reverse('login'), {'username': 'testuser', 'password': 'wrong'},
+                                 HTTP_X_FORWARDED_FOR=f'198.51.100.{n}, 203.0.113.{n % 2}').status_code
+                for n in range(6)
+            ]
+        # Keyed on the proxy-appended address, not the client-supplied first entry
+        self.assertEqual(statuses[:4].count(status.HTTP_429_TOO_MANY_REQUESTS), 0)
+        self.assertEqual(statuses[4:], [status.HTTP_429_TOO_MANY_REQUESTS] * 2)
+    
+    def test_read_budget_per_user(self):
+        """Test each user has their own read budget, not spent by writes"""
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('category-list'), {'name': 'work', 'color': '#F9A602'})
+        for _ in range(3):
+            self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        
+        self.client.force_authenticate(user=self.other)
+        self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_200_OK)
+    
+    def test_generation_budget(self):
+        """Test schedule generation has a budget separate from reads"""
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.post(reverse('schedule-list')).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(reverse('today-schedule')).status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('today-schedule'))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Plain reads still have budget left
+        self.assertEqual(self.client.get(reverse('schedule-list')).status_code, status.HTTP_200_OK)
+    
+    def test_bucket_refills(self):
+        """Test tokens come back at the configured rate, up to the burst size"""
+        self.client.force_authenticate(user=self.user)
+        now = 1000.0
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: now):
+            for _ in range(3):
+                self.client.get(reverse('task-list'))
+            self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            now += 20
+            self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            now += 3600
+            for _ in range(3):
+                self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_200_OK)
+    
+    def test_redis_single_round_trip(self):
+        """Test a Redis-backed bucket is checked with one script call"""
+        redis_cache = RedisCache('redis://localhost:6379/0', {'KEY_PREFIX': 'app'})
+        client = mock.Mock()
+        client.eval.return_value = [0, '0.5']
+        self.client.force_authenticate(user=self.user)
+        # The redis client is created lazily, so no server (or package) is needed
+        redis_cache.__dict__['_cache'] = mock.Mock(**{'get_client.return_value': client})
+        with mock.patch('api.throttling.caches', {'default': redis_cache}):
+            response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '10')
+        client.eval.assert_called_once()
+        args = client.eval.call_args.args
+        self.assertEqual(args[1:], (1, f'app:1:throttle_read_{self.user.pk}', 3, 0.05, 60))
+
+
+class EstimatedCountTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+        self.create_tasks(30)
+    
+    def create_tasks(self, count):
+        Task.objects.bulk_create([
+            Task(user=self.user, category=self.category, title=f'Task {n}', start_time=time(9), end_time=time(10))
+            for n in range(count)
+        ])
+    
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    
+    def paginator(self, queryset):
+        paginator = EstimatedCountPaginator(queryset, 10)
+        paginator.exact_below = 20
+        return paginator
+    
+    def test_unfiltered_count_uses_the_statistics(self):
+        """Test unfiltered pages are counted from the table statistics without a COUNT(*)"""
+        self.analyze()
+        self.create_tasks(5)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.paginator(Task.objects.all()).count, 30)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+    
+    def test_filtered_and_small_tables_are_counted_exactly(self):
+        """Test filtered querysets and tables below the threshold get an exact count"""
+        self.analyze()
+        self.create_tasks(5)
+        self.assertEqual(self.paginator(Task.objects.filter(title__startswith='Task 1')).count, 12)
+        self.assertEqual(self.paginator(Category.objects.all()).count, 1)
+    
+    def test_without_statistics(self):
+        """Test tables never analysed are counted exactly"""
+        self.assertIsNone(estimated_count(Task))
+        self.assertEqual(self.paginator(Task.objects.all()).count, 30)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The stand-in databases are SQLite files')
+class RoutingTest(TransactionTestCase):
+    """Test replica reads and sharding against extra SQLite databases"""
+    aliases = ('shard_0', 'shard_1', 'replica')
+    
+    @classmethod
+    def setUpClass(cls):
+        # Added here rather than in the class body, since the test runner
+        # checks the databases of every test before any test runs
+        cls.databases = {'default', *cls.aliases}
+        cls.directory = tempfile.mkdtemp()
+        for alias in cls.aliases:
+            name = str(Path(cls.directory) / f'{alias}.sqlite3')
+            connections.settings[alias] = {**connections.settings['default'], 'NAME': name,
+                                          'TEST': {**connections.settings['default']['TEST'], 'NAME': name}}
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in cls.aliases:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls.directory)
+    
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.client = APIClient()
+    
+    def task_data(self, title):
+        return {'category': self.category.pk, 'title': title, 'start_time': '09:00:00', 'end_time': '10:00:00'}
+    
+    def titles(self):
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(task['title'] for task in response.json())
+    
+    def test_replica_reads_until_the_user_writes(self):
+        """Test reads go to the replica, except for a while after the user writes"""
+        user = User.objects.create_user(username='reader', email='reader@example.com', password='testpass123')
+        self.client.force_authenticate(user=user)
+        Task.objects.create(user=user, category=self.category, title='Primary', start_time=time(9),
+                            end_time=time(10))
+        Category.objects.using('replica').create(pk=self.category.pk, name='work', color='#F9A602')
+        Task.objects.using('replica').create(user=user, category=self.category, title='Replica',
+                                             start_time=time(9), end_time=time(10))
+        
+        with override_settings(DATABASE_ROUTING={'REPLICAS': {'default': ['replica']}}):
+            self.assertEqual(self.titles(), ['Replica'])
+            response = self.client.post(reverse('task-list'), self.task_data('Written'), format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            # Read your writes
+            self.assertEqual(self.titles(), ['Primary', 'Written'])
+            cache.clear()
+            self.assertEqual(self.titles(), ['Replica'])
+            # Creating today's schedule pins, even during a GET request
+            self.assertEqual(self.client.get(reverse('progress-stats')).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.titles(), ['Primary', 'Written'])
+            cache.clear()
+            # Getting it again writes nothing
+            self.assertEqual(self.client.get(reverse('progress-stats')).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.titles(), ['Replica'])
+        
+        self.assertFalse(Task.objects.using('replica').filter(title='Written').exists())
+    
+    def test_replica_reads_stop_once_the_request_writes(self):
+        """Test a safe-method request that writes reads its own writes from the primary"""
+        user = User.objects.create_user(username='reader', email='reader@example.com', password='testpass123')
+        request = RequestFactory().get('/')
+        request.user = user
+        
+        def view(request):
+            titles = [list(Task.objects.values_list('title', flat=True))]
+            Task.objects.create(user=user, category=self.category, title='Written', start_time=time(9),
+                                end_time=time(10))
+            titles.append(list(Task.objects.values_list('title', flat=True)))
+            return titles
+        
+        with override_settings(DATABASE_ROUTING={'REPLICAS': {'default': ['replica']}}):
+            self.assertEqual(DatabaseRoutingMiddleware(view)(request), [[], ['Written']])
+            self.assertTrue(cache.get(f'routing:primary:{user.pk}'))
+    
+    def test_rows_live_in_their_owners_shard(self):
+        """Test sharded rows are written to, read from and deleted from their owner's shard"""
+        with override_settings(DATABASE_ROUTING={'SHARDS': ['shard_0', 'shard_1']}):
+            users = [User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='testpass123') for n in range(2)]
+            # Created before the settings changed, so mirrored explicitly
+            self.category.save()
+            for user in users:
+                self.client.force_authenticate(user=user)
+                response = self.client.post(reverse('task-list'), self.task_data(user.username), format='json')
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(self.titles(), [user.username])
+                
+                shard = f'shard_{user.pk % 2}'
+                self.assertEqual(list(Task.objects.using(shard).values_list('title', flat=True)), [user.username])
+                with route_to_user(user.pk):
+                    self.assertEqual(Task.objects.get().title, user.username)
+            self.assertFalse(Task.objects.using('default').exists())
+            
+            Category.objects.create(name='health', color='#00FF00')
+            for shard in ('shard_0', 'shard_1'):
+                self.assertTrue(Category.objects.using(shard).filter(name='health').exists())
+            
+            for user in users:
+                with route_to_user(user.pk):
+                    schedule = DailySchedule.objects.create(user=user)
+                    daily_task = DailyTask.objects.create(schedule=schedule, title='Task', category=self.category,
+                                                          start_time=time(9), end_time=time(10))
+                    Reminder.objects.create(user=user, task=daily_task, reminder_time=timezone.now())
+            
+            deleted, kept = (f'shard_{user.pk % 2}' for user in users)
+            users[0].delete()
+            for model in (Task, DailySchedule, DailyTask, Reminder):
+                self.assertFalse(model.objects.using(deleted).exists(), model.__name__)
+                self.assertTrue(model.objects.using(kept).exists(), model.__name__)
+    
+    def test_reminders_sent_from_every_shard(self):
+        """Test due reminders are found in each shard and mailed to users from the default database"""
+        with override_settings(DATABASE_ROUTING={'SHARDS': ['shard_0', 'shard_1']}):
+            self.category.save()
+            users = [User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='testpass123') for n in range(2)]
+            for user in users:
+                with route_to_user(user.pk):
+                    schedule = DailySchedule.objects.create(user=user)
+                    task = DailyTask.objects.create(schedule=schedule, title=f'Task of {user.username}',
+                                                    category=self.category, start_time=time(9), end_time=time(10))
+                    Reminder.objects.create(user=user, task=task, reminder_type='email',
+                                            reminder_time=timezone.now() - timedelta(minutes=1))
+            
+            send_due_reminders()
+            
+            self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['user0@example.com', 'user1@example.com'])
+            for shard in ('shard_0', 'shard_1'):
+                self.assertFalse(Reminder.objects.using(shard).filter(is_sent=False).exists())
+    
+    def test_schedules_archived_in_every_shard(self):
+        """Test old schedules are archived in the shard holding them"""
+        with override_settings(DATABASE_ROUTING={'SHARDS': ['shard_0', 'shard_1']}):
+            self.category.save()
+            users = [User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='testpass123') for n in range(2)]
+            for user in users:
+                with route_to_user(user.pk):
+                    schedule = DailySchedule.objects.create(user=user, date=date(2020, 1, 1))
+                    DailyTask.objects.create(schedule=schedule, title='Old', category=self.category,
+                                             start_time=time(9), end_time=time(10))
+            
+            self.assertEqual(archive_schedules(date(2021, 1, 1)), (2, 2))
+            
+            for user in users:
+                shard = f'shard_{user.pk % 2}'
+                self.assertFalse(DailySchedule.objects.using(shard).exists())
+                self.assertEqual(ArchivedSchedule.objects.using(shard).get().user_id, user.pk)
+    
+    def test_default_tasks_provisioned_in_owners_shard(self):
+        """Test provisioned users' default tasks are stored in their shard"""
+        with override_settings(DATABASE_ROUTING={'SHARDS': ['shard_0', 'shard_1']}):
+            self.category.save()
+            result = provision_users([{'username': f'user{n}', 'email': f'user{n}@example.com'} for n in range(2)],
+                                     processes=1, default_tasks=True)
+            self.assertEqual(result['created'], 2)
+            
+            self.assertFalse(Task.objects.using('default').exists())
+            for user in User.objects.all():
+                shard = f'shard_{user.pk % 2}'
+                self.assertEqual(list(Task.objects.using(shard).values_list('user_id', 'title')), [(user.pk, 'Focused Work')])
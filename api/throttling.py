@@ -0,0 +1,131 @@
+import math
+import threading
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# KEYS[1]: bucket; ARGV: capacity, tokens per second, expiry in seconds.
+# Uses the server's clock so every worker refills buckets the same way.
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {allowed, tostring(tokens)}
+"""
+
+_local_lock = threading.Lock()
+
+
+def refill(state, capacity, rate, now):
+    """Tokens in a bucket stored as (tokens, stamp) at time now"""
+    if state is None:
+        return capacity
+    tokens, stamp = state
+    return min(capacity, tokens + max(0, now - stamp) * rate)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Throttle allowing bursts of up to N requests, refilled at N per period.
+
+    The rate is the usual DRF 'N/period' string, looked up by ``scope`` in
+    ``DEFAULT_THROTTLE_RATES`` (or None to disable). Buckets live in the
+    ``cache_alias`` cache. With Redis each check is one script call,
+    atomic across workers; other backends read and write the bucket under
+    a process lock, which is exact for the process-local LocMemCache and
+    best effort for caches shared by several processes.
+    """
+    cache_alias = 'default'
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+    # Methods counted against the budget, None for all
+    methods = None
+
+    def get_rate(self):
+        # Read per instance so that overridden settings apply
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_cache_key(self, request, view):
+        if self.methods is not None and request.method not in self.methods:
+            return None
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.cache = caches[self.cache_alias]
+        self.capacity = self.num_requests
+        self.refill_rate = self.num_requests / self.duration
+        allowed, self.tokens = self.take()
+        return allowed
+
+    def take(self):
+        """Take a token from the bucket: (allowed, tokens left)"""
+        # Expire once a bucket would be full again anyway
+        expiry = math.ceil(self.duration)
+        if isinstance(self.cache, RedisCache):
+            key = self.cache.make_and_validate_key(self.key)
+            client = self.cache._cache.get_client(key, write=True)
+            allowed, tokens = client.eval(TAKE_SCRIPT, 1, key, self.capacity, self.refill_rate, expiry)
+            return bool(allowed), float(tokens)
+
+        with _local_lock:
+            now = self.timer()
+            tokens = refill(self.cache.get(self.key), self.capacity, self.refill_rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.cache.set(self.key, (tokens, now), expiry)
+        return allowed, tokens
+
+    def wait(self):
+        """Seconds until the bucket holds a whole token again"""
+        return max(0, 1 - self.tokens) / self.refill_rate
+
+
+class ReadRateThrottle(TokenBucketThrottle):
+    """Budget for reads (GET, HEAD, OPTIONS) of every endpoint"""
+    scope = 'read'
+    methods = SAFE_METHODS
+
+
+class GenerationRateThrottle(TokenBucketThrottle):
+    """Budget for bulk writes: generating a schedule's tasks, copying days"""
+    scope = 'generation'
+
+
+class AuthRateThrottle(TokenBucketThrottle):
+    """
+    Budget for requests that check or set a password, per client address.
+
+    The address is REMOTE_ADDR, or X-Forwarded-For as set by the
+    ``NUM_PROXIES`` trusted proxies (see REST_FRAMEWORK); a header the
+    client made up does not buy it a new budget.
+    """
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
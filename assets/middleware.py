@@ -0,0 +1,88 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+# Content hash ManifestStaticFilesStorage puts in file names: name.0123456789ab.ext
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Unhashed names can change in place, so they are only cached briefly
+SHORT_MAX_AGE = 300
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts, ignoring any refused with q=0"""
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.partition(';')
+        quality = params.strip().removeprefix('q=')
+        try:
+            refused = params and float(quality) == 0
+        except ValueError:
+            refused = False
+        if not refused:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serves collected static files from STATIC_ROOT.
+
+    The brotli or gzip copy written by collectstatic is sent when the client
+    accepts it. Fingerprinted names never change content, so they are cached
+    for a year as immutable; anything else gets a short max-age and
+    Last-Modified revalidation. Requests for files that are not in
+    STATIC_ROOT fall through to the rest of the stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = settings.STATIC_ROOT
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD') and self.root
+                and request.path_info.startswith(self.prefix)):
+            response = self.serve(request, request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        stat = os.stat(path)
+        hashed = bool(HASHED_NAME.search(name))
+        if not hashed and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(path)
+            encoding, served = None, path
+            accepted = accepted_encodings(request)
+            for coding, suffix in ENCODINGS:
+                if coding in accepted and os.path.isfile(path + suffix):
+                    encoding, served = coding, path + suffix
+                    break
+            response = FileResponse(open(served, 'rb'), content_type=content_type or 'application/octet-stream')
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.headers['Cache-Control'] = IMMUTABLE if hashed else f'public, max-age={SHORT_MAX_AGE}'
+        response.headers['Last-Modified'] = http_date(stat.st_mtime)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
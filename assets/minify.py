@@ -0,0 +1,232 @@
+import re
+
+
+WHITESPACE = ' \t\r\n\f\v\u00a0\ufeff\u2028\u2029'
+LINE_TERMINATORS = re.compile(r'[\r\n\u2028\u2029]')
+WORD = re.compile(r'(?:[\w$]|\\.)+')
+
+# Keywords after which a "/" begins a regex literal rather than a division
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'void', 'delete', 'throw', 'new'}
+# Keywords or identifiers depending on context, so a "/" after them could be either
+CONTEXTUAL_KEYWORDS = {'of', 'await', 'yield', 'let', 'async'}
+# A "(" after these opens a statement's head, so a "/" after its ")" begins a regex
+STATEMENT_KEYWORDS = {'if', 'while', 'for', 'with'}
+
+
+class _Unsure(Exception):
+    """The source cannot be read with certainty, e.g. a "/" that could be a regex or a division"""
+
+
+def _skip_string(source, i):
+    """Index just past the string literal starting at source[i]"""
+    quote, n = source[i], len(source)
+    i += 1
+    while i < n and source[i] not in '\r\n':
+        if source[i] == '\\':
+            i += 2
+        elif source[i] == quote:
+            return i + 1
+        else:
+            i += 1
+    raise _Unsure
+
+
+def _skip_template(source, i):
+    """Index just past the template chunk starting at source[i] (a "`" or "}"), and whether it ends in "${" """
+    n = len(source)
+    i += 1
+    while i < n:
+        if source[i] == '\\':
+            i += 2
+        elif source[i] == '`':
+            return i + 1, False
+        elif source.startswith('${', i):
+            return i + 2, True
+        else:
+            i += 1
+    raise _Unsure
+
+
+def _skip_regex(source, i):
+    """Index just past the regex literal starting at source[i], without its flags"""
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n and source[i] not in '\r\n':
+        char = source[i]
+        if char == '\\':
+            i += 1
+        elif char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            return i + 1
+        i += 1
+    raise _Unsure
+
+
+def _regex_allowed(prev, before):
+    """Whether a "/" after the tokens ``before`` and ``prev`` (kind, text, paren) begins a regex"""
+    if prev is None:
+        return True
+    kind, text, paren = prev
+    if kind == 'literal':
+        return False
+    if kind == 'word':
+        # A property name such as x.in is an operand like any other
+        if before is not None and before[1] == '.':
+            return False
+        if text in CONTEXTUAL_KEYWORDS:
+            raise _Unsure
+        return text in REGEX_KEYWORDS
+    if text == ')':
+        if paren is None:
+            raise _Unsure
+        return paren
+    if text == '}':
+        # The end of a block or of an object literal / function expression
+        raise _Unsure
+    # After "]" comes a division; "++" and "--" can only be followed by one
+    return text not in (']', '++', '--')
+
+
+def _js_tokens(source):
+    """
+    The source as (kind, text) pairs: 'space' and 'comment' between tokens,
+    'literal' (strings, template chunks, regexes), 'word' and 'punct'.
+    """
+    n = len(source)
+    i = 0
+    prev = before = None
+    braces = []  # per open "{" or "${": whether it is a template substitution
+    parens = []  # per open "(": whether it heads an if/while/for/with, None when unsure
+    while i < n:
+        char = source[i]
+        if char in WHITESPACE:
+            end = i + 1
+            while end < n and source[end] in WHITESPACE:
+                end += 1
+            yield 'space', source[i:end]
+            i = end
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            end = n if end == -1 else end
+            yield 'comment', source[i:end]
+            i = end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if end == -1:
+                raise _Unsure
+            yield 'comment', source[i:end + 2]
+            i = end + 2
+            continue
+
+        paren = None
+        if char in '\'"':
+            kind, end = 'literal', _skip_string(source, i)
+        elif char == '`' or (char == '}' and braces and braces[-1]):
+            if char == '}':
+                braces.pop()
+            end, substitution = _skip_template(source, i)
+            # Code inside "${" starts like an expression
+            kind = 'punct' if substitution else 'literal'
+            if substitution:
+                braces.append(True)
+        elif char == '/':
+            if _regex_allowed(prev, before):
+                kind, end = 'literal', _skip_regex(source, i)
+            else:
+                kind, end = 'punct', i + 1
+        elif WORD.match(source, i):
+            kind, end = 'word', WORD.match(source, i).end()
+        else:
+            kind, end = 'punct', i + 1
+            if source.startswith(('++', '--'), i):
+                end = i + 2
+            elif char == '{':
+                braces.append(False)
+            elif char == '}':
+                if not braces:
+                    raise _Unsure
+                braces.pop()
+            elif char == '(':
+                heads_statement = (prev is not None and prev[0] == 'word'
+                                   and (before is None or before[1] != '.'))
+                if heads_statement and prev[1] in CONTEXTUAL_KEYWORDS:
+                    parens.append(None)
+                else:
+                    parens.append(heads_statement and prev[1] in STATEMENT_KEYWORDS)
+            elif char == ')':
+                if not parens:
+                    raise _Unsure
+                paren = parens.pop()
+
+        text = source[i:end]
+        yield kind, text
+        before, prev = prev, (kind, text, paren)
+        i = end
+
+
+def minify_js(source):
+    """
+    Conservative JavaScript minifier.
+
+    Removes comments, indentation and blank lines, leaving string, template
+    and regex literals untouched. Line breaks are kept so automatic
+    semicolon insertion is unaffected. Sources it cannot read with
+    certainty (a "/" that could start a regex or be a division, unbalanced
+    brackets, unterminated literals) are returned unchanged.
+    """
+    out = []
+    pending = ''
+    try:
+        for kind, text in _js_tokens(source):
+            if kind in ('space', 'comment'):
+                if LINE_TERMINATORS.search(text):
+                    pending = '\n'
+                else:
+                    pending = pending or ' '
+                continue
+            # Whitespace is only kept between tokens, and then as a single character
+            if pending and out:
+                out.append(pending)
+            pending = ''
+            out.append(text)
+    except _Unsure:
+        return source
+    return ''.join(out) + '\n'
+
+
+CSS_STRING_OR_COMMENT = re.compile(r'/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+CSS_SPACE = re.compile(r'\s+')
+CSS_STATEMENT = re.compile(r'[^{};]*[{};]|[^{};]+$')
+# Spaces around ":" are only insignificant in declarations: "a :hover" is not "a:hover"
+CSS_SELECTOR_PUNCTUATION = re.compile(r'\s*([{}>,;])\s*')
+CSS_DECLARATION_PUNCTUATION = re.compile(r'\s*([{}:>,;])\s*')
+CSS_BLOCK_PUNCTUATION = re.compile(r'\s*([{};])\s*')
+
+
+def _minify_css_statement(match):
+    statement = match.group()
+    if statement.endswith('{'):
+        return CSS_SELECTOR_PUNCTUATION.sub(r'\1', statement)
+    return CSS_DECLARATION_PUNCTUATION.sub(r'\1', statement)
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet, leaving strings untouched"""
+    strings = []
+
+    def hold(match):
+        if match.group().startswith('/*'):
+            return ' '
+        strings.append(match.group())
+        return f'\0{len(strings) - 1}\0'
+
+    source = CSS_SPACE.sub(' ', CSS_STRING_OR_COMMENT.sub(hold, source))
+    source = CSS_BLOCK_PUNCTUATION.sub(r'\1', CSS_STATEMENT.sub(_minify_css_statement, source))
+    source = source.replace(';}', '}').strip()
+    return re.sub(r'\0(\d+)\0', lambda match: strings[int(match.group(1))], source) + '\n'
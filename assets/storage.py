@@ -0,0 +1,85 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .minify import minify_css, minify_js
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+# Smaller files are not worth an extra encoded copy
+MIN_COMPRESS_SIZE = 256
+
+
+def encoded_variants(content):
+    """{suffix: bytes} of the precompressed copies worth keeping for content"""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that minifies CSS and JS and precompresses text files.
+
+    CSS and JS are minified as they are saved, and the content hash in each
+    file name is that of the minified file. After hashing, a gzip copy
+    (and a brotli copy when the ``brotli`` package is installed) is written
+    next to every compressible file for the static middleware to serve.
+    """
+
+    # Names missing from the manifest (e.g. before collectstatic) are left unhashed
+    manifest_strict = False
+
+    def _minified(self, name, content):
+        name = name or getattr(content, 'name', None) or ''
+        minify = MINIFIERS.get(os.path.splitext(name)[1])
+        if minify is None or '.min.' in name:
+            return content
+        content.seek(0)
+        return ContentFile(minify(content.read().decode()).encode())
+
+    def _save(self, name, content):
+        return super()._save(name, self._minified(name, content))
+
+    def file_hash(self, name, content=None):
+        # Hash what is served, so a change to the minifier also changes names
+        if content is not None:
+            content = self._minified(name, content)
+        return super().file_hash(name, content)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, *args, **kwargs):
+        processed = set()
+        for name, hashed_name, result in super().post_process(*args, **kwargs):
+            if not isinstance(result, Exception):
+                processed.update((name, hashed_name))
+            yield name, hashed_name, result
+
+        if not kwargs.get('dry_run'):
+            for name in processed:
+                if name and name.endswith(COMPRESSIBLE):
+                    self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            content = f.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, data in encoded_variants(content).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(data))
@@ -0,0 +1,148 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import views
+from .minify import minify_css, minify_js
+
+
+class MinifyTest(SimpleTestCase):
+    def test_js_comments_and_indentation_removed(self):
+        """Test comments and indentation go while line breaks stay"""
+        source = '// header\nfunction add(a, b) {\n    /* sum */\n    return a + b;\n}\n'
+        self.assertEqual(minify_js(source), 'function add(a, b) {\nreturn a + b;\n}\n')
+    
+    def test_js_literals_untouched(self):
+        """Test strings, templates and regexes containing comment markers are kept"""
+        source = "const url = 'http://x/*y*/';\nconst t = `a  // b`;\nconst re = /\\/\\/[/]*/g;\n"
+        self.assertEqual(minify_js(source), source)
+    
+    def test_js_division_is_not_a_regex(self):
+        """Test a slash after an operand is treated as division"""
+        self.assertEqual(minify_js('x = a / b; // half\ny = c / d;'), 'x = a / b;\ny = c / d;\n')
+    
+    def test_js_division_after_operators(self):
+        """Test slashes after postfix operators and parenthesized operands are divisions"""
+        source = "a = x++ / y; // it's\nb = (c + d) / 2; // half\n"
+        self.assertEqual(minify_js(source), 'a = x++ / y;\nb = (c + d) / 2;\n')
+        self.assertEqual(minify_js('if (a) /b/.test(c) // d\n'), 'if (a) /b/.test(c)\n')
+    
+    def test_js_nested_templates_untouched(self):
+        """Test code and comment markers inside nested template literals are kept"""
+        source = 't = `a ${ `b ${c} // d` } /* e */ ${f}`;\n'
+        self.assertEqual(minify_js(source), source)
+    
+    def test_js_ambiguous_source_unchanged(self):
+        """Test a source with a slash that could be a regex or a division is left as it is"""
+        source = 'f(function () {}\n/ 2); // half\n'
+        self.assertEqual(minify_js(source), source)
+    
+    def test_css(self):
+        """Test stylesheets lose comments and redundant whitespace"""
+        source = '/* main */\nbody {\n    color: #333;\n    margin: 0 auto;\n}\n'
+        self.assertEqual(minify_css(source), 'body{color:#333;margin:0 auto}\n')
+    
+    def test_css_selectors_and_strings_kept(self):
+        """Test spaces that are significant in selectors and strings are kept"""
+        source = 'a :hover, p > em {\n    content: " :  , ";\n}\n'
+        self.assertEqual(minify_css(source), 'a :hover,p>em{content:" :  , "}\n')
+
+
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.settings_override = override_settings(STATIC_ROOT=cls.root, DEBUG=False)
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.root, 'staticfiles.json')) as f:
+            cls.manifest = json.load(f)['paths']
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.root)
+        super().tearDownClass()
+    
+    def setUp(self):
+        views._shells.clear()
+    
+    def static_url(self, name):
+        return settings.STATIC_URL + name
+    
+    def test_collectstatic_minifies_and_fingerprints(self):
+        """Test the hashed name is derived from the minified content"""
+        hashed = self.manifest['js/scripts.js']
+        with open(os.path.join(self.root, hashed), 'rb') as f:
+            content = f.read()
+        with open(os.path.join(settings.BASE_DIR, 'static', 'js', 'scripts.js')) as f:
+            self.assertEqual(content, minify_js(f.read()).encode())
+        self.assertIn(hashlib.md5(content).hexdigest()[:12], hashed)
+        
+        with open(os.path.join(self.root, hashed + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), content)
+    
+    def test_hashed_file_cached_as_immutable(self):
+        """Test fingerprinted files are served precompressed and cached for a year"""
+        response = self.client.get(self.static_url(self.manifest['js/scripts.js']),
+                                   HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        gzip.decompress(b''.join(response.streaming_content))
+    
+    def test_identity_when_gzip_refused(self):
+        """Test clients that do not accept gzip get the plain file"""
+        response = self.client.get(self.static_url(self.manifest['css/styles.css']),
+                                   HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'*{'))
+    
+    def test_unhashed_file_revalidated(self):
+        """Test unversioned names get a short max-age and honour If-Modified-Since"""
+        response = self.client.get(self.static_url('css/styles.css'))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=300')
+        
+        response = self.client.get(self.static_url('css/styles.css'),
+                                   HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+    
+    def test_missing_file_falls_through(self):
+        """Test paths outside the collected files are left to the URL config"""
+        self.assertEqual(self.client.get(self.static_url('../manage.py')).status_code, 404)
+        self.assertEqual(self.client.get(self.static_url('js/missing.js')).status_code, 404)
+    
+    def test_shell_references_hashed_assets(self):
+        """Test the page links the fingerprinted files and supports revalidation"""
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertContains(response, self.static_url(self.manifest['js/scripts.js']))
+        self.assertContains(response, self.static_url(self.manifest['css/styles.css']))
+        
+        response = self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+    
+    def test_shell_gzipped(self):
+        """Test the page is sent gzipped to clients that accept it"""
+        plain = self.client.get(reverse('home'))
+        response = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+    
+    def test_shell_rendered_once(self):
+        """Test the page is rendered once per process outside DEBUG"""
+        self.client.get(reverse('home'))
+        with self.assertTemplateNotUsed('base.html'):
+            self.client.get(reverse('home'))
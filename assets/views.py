@@ -0,0 +1,60 @@
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+from .middleware import accepted_encodings
+
+
+class RenderedShell:
+    """The rendered page with its ETag and gzip copy"""
+
+    def __init__(self, template_name):
+        self.content = render_to_string(template_name).encode()
+        self.gzipped = gzip.compress(self.content, compresslevel=9, mtime=0)
+        self.etag = '"%s"' % hashlib.md5(self.content, usedforsecurity=False).hexdigest()
+
+
+_shells = {}
+
+
+def get_shell(template_name):
+    """
+    The shell rendered once per process.
+
+    It only depends on static file names, which change with a deploy (and
+    thus a restart), so rendering it per request is wasted work. With DEBUG
+    it is rendered every time so template edits show up.
+    """
+    if settings.DEBUG:
+        return RenderedShell(template_name)
+    shell = _shells.get(template_name)
+    if shell is None:
+        shell = _shells[template_name] = RenderedShell(template_name)
+    return shell
+
+
+@require_safe
+def app_shell(request, template_name='base.html'):
+    """
+    The single page app's HTML.
+
+    Browsers must revalidate it on every load (no-cache) since it names the
+    current fingerprinted assets, but an unchanged page costs a 304.
+    """
+    shell = get_shell(template_name)
+    if shell.etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    elif 'gzip' in accepted_encodings(request):
+        response = HttpResponse(shell.gzipped, content_type='text/html; charset=utf-8')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(shell.content, content_type='text/html; charset=utf-8')
+    response.headers['ETag'] = shell.etag
+    response.headers['Cache-Control'] = 'no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
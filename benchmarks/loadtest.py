@@ -0,0 +1,222 @@
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from .utils import summarize
+
+
+# Endpoints of the client scenario, named like their URL patterns
+ENDPOINTS = ('login', 'today-schedule', 'daily-task-update', 'progress-stats')
+LOCK_ERRORS = re.compile(r'^database_lock_errors_total\{route="([^"]*)"\} (\S+)$', re.MULTILINE)
+
+
+class Connection:
+    """
+    Keep-alive HTTP/1.1 client on asyncio streams, enough for JSON APIs.
+
+    Reads bodies framed by Content-Length, chunked encoding or the end of
+    the connection, and reconnects when the server closes it.
+    """
+
+    def __init__(self, host, port, headers=None):
+        self.host = host
+        self.port = port
+        self.headers = {'Host': f'{host}:{port}', 'Accept': 'application/json', **(headers or {})}
+        self.reader = self.writer = None
+
+    async def request(self, method, path, data=None, headers=None):
+        """Send a request with an optional JSON body; returns (status, body bytes)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(data).encode() if data is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Content-Length: {len(body)}']
+        if data is not None:
+            lines.append('Content-Type: application/json')
+        lines += [f'{name}: {value}' for name, value in {**self.headers, **(headers or {})}.items()]
+        try:
+            self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+            await self.writer.drain()
+            return await self._response()
+        except BaseException:
+            self.close()
+            raise
+
+    async def _response(self):
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Server closed the connection')
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while size := int((await self.reader.readline()).split(b';')[0], 16):
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readline()
+            await self.reader.readline()
+            body = b''.join(chunks)
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+def lock_errors(metrics_text):
+    """Database lock errors by route from a metrics scrape"""
+    return {route: float(value) for route, value in LOCK_ERRORS.findall(metrics_text)}
+
+
+class LoadTest:
+    """
+    Simulated users against a running server.
+
+    Each client logs in as one of ``usernames`` (clients share users when
+    there are fewer). Then, at least once and until ``duration`` seconds
+    have passed, it loads today's schedule, completes one of its open
+    tasks (or reopens a done one, so the writes keep coming), loads its
+    progress stats and waits a random think time averaging
+    ``think_time`` seconds. Clients start
+    spread over ``ramp_up`` seconds and each sends its own address in
+    X-Forwarded-For. A server trusting one proxy (``NUM_PROXIES``) then
+    throttles logins per client as in production; otherwise every client
+    shares the load test's address.
+    ``paths`` maps the ENDPOINTS to URLs, with ``{pk}`` in the task's.
+    """
+
+    def __init__(self, url, usernames, password, paths, clients=10, duration=30, ramp_up=0, think_time=1,
+                 metrics_path=None, metrics_token=None, seed=0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.usernames = usernames
+        self.password = password
+        self.paths = paths
+        self.clients = clients
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.metrics_path = metrics_path
+        self.metrics_token = metrics_token
+        self.random = random.Random(seed)
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, connection, endpoint, method, path, data=None, headers=None):
+        """Timed request recorded under ``endpoint``; returns (status, body), status 0 on connection errors"""
+        start = time.perf_counter()
+        try:
+            status, body = await connection.request(method, path, data, headers)
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            status, body = 0, b''
+        self.samples[endpoint].append(time.perf_counter() - start)
+        self.statuses[endpoint][status] += 1
+        return status, body
+
+    async def client(self, index, deadline):
+        await asyncio.sleep(self.ramp_up * index / self.clients)
+        address = f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}'
+        connection = Connection(self.host, self.port, {'X-Forwarded-For': address})
+        username = self.usernames[index % len(self.usernames)]
+        try:
+            status, body = await self.call(connection, 'login', 'POST', self.paths['login'],
+                                           {'username': username, 'password': self.password})
+            if status != 200:
+                return
+            auth = {'Authorization': f"Bearer {json.loads(body)['access']}"}
+
+            # At least one round, however long logging in took
+            while True:
+                status, body = await self.call(connection, 'today-schedule', 'GET', self.paths['today-schedule'],
+                                               headers=auth)
+                tasks = json.loads(body)['daily_tasks'] if status == 200 else []
+                if tasks:
+                    pending = [task for task in tasks if not task['is_completed']]
+                    task = self.random.choice(pending or tasks)
+                    await self.call(connection, 'daily-task-update', 'PATCH',
+                                    self.paths['daily-task-update'].format(pk=task['id']),
+                                    {'is_completed': bool(pending)}, auth)
+                await self.call(connection, 'progress-stats', 'GET', self.paths['progress-stats'], headers=auth)
+                if time.monotonic() >= deadline:
+                    break
+                if self.think_time:
+                    await asyncio.sleep(self.random.expovariate(1 / self.think_time))
+        finally:
+            connection.close()
+
+    async def scrape_lock_errors(self):
+        if not self.metrics_path:
+            return None
+        connection = Connection(self.host, self.port)
+        headers = {'Authorization': f'Bearer {self.metrics_token}'} if self.metrics_token else None
+        try:
+            status, body = await connection.request('GET', self.metrics_path, headers=headers)
+        except OSError:
+            return None
+        finally:
+            connection.close()
+        return lock_errors(body.decode()) if status == 200 else None
+
+    async def _run(self):
+        before = await self.scrape_lock_errors()
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.ramp_up + self.duration
+        outcomes = await asyncio.gather(*(self.client(index, deadline) for index in range(self.clients)),
+                                        return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        after = await self.scrape_lock_errors()
+        # Clients stop on responses they cannot parse, such as HTML error pages
+        failed = sum(isinstance(outcome, Exception) for outcome in outcomes)
+        return elapsed, before, after, failed
+
+    def run(self):
+        """Run the clients and return the report: per endpoint and in total"""
+        elapsed, before, after, failed = asyncio.run(self._run())
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            if self.samples[endpoint]:
+                locks = after.get(endpoint, 0) - before.get(endpoint, 0) if after is not None and before is not None \
+                    else None
+                endpoints[endpoint] = self._summary(self.samples[endpoint], self.statuses[endpoint], elapsed, locks)
+        samples = [sample for endpoint in endpoints for sample in self.samples[endpoint]]
+        statuses = defaultdict(int)
+        for endpoint in endpoints:
+            for status, count in self.statuses[endpoint].items():
+                statuses[status] += count
+        locks = [result['lock_errors'] for result in endpoints.values()]
+        return {
+            'clients': self.clients,
+            'failed_clients': failed,
+            'seconds': round(elapsed, 2),
+            'endpoints': endpoints,
+            'total': self._summary(samples, statuses, elapsed, None if None in locks else sum(locks))
+            if samples else None,
+        }
+
+    def _summary(self, samples, statuses, elapsed, locks):
+        errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+        return {
+            **summarize(samples),
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / elapsed, 1),
+            'errors': errors,
+            'error_rate': round(errors / len(samples), 4),
+            'throttled': statuses.get(429, 0),
+            'lock_errors': int(locks) if locks is not None else None,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from api.rows import ValuesRepresentation
+from benchmarks.seed import seed
+from benchmarks.utils import scratch_database, summarize
+from schedules.models import DailySchedule, DailyTask
+from schedules.serializers import DailyScheduleSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+class Command(BaseCommand):
+    help = 'Compare serializer and values() list serialization of tasks and schedules (runs in a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=5)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'list':10} {'rows':>7} {'serializer':>12} {'values()':>10} {'speedup':>8}")
+        with scratch_database():
+            user = seed(users=1, tasks_per_user=options['rows'], days=0)[0]
+            tasks = Task.objects.filter(user=user).select_related('category')
+            self.compare('tasks', tasks.count(), TaskSerializer, tasks, options['iterations'])
+
+        with scratch_database():
+            # Enough recurring tasks and days for roughly --rows daily tasks
+            user = seed(users=1, tasks_per_user=40, days=max(1, options['rows'] // 30))[0]
+            schedules = DailySchedule.objects.filter(user=user).prefetch_related(
+                Prefetch('daily_tasks', queryset=DailyTask.objects.select_related('category'))
+            )
+            rows = DailyTask.objects.filter(schedule__user=user).count()
+            self.compare('schedules', rows, DailyScheduleSerializer, schedules, options['iterations'])
+
+    def compare(self, name, rows, serializer_class, queryset, iterations):
+        def regular():
+            return serializer_class(queryset.all(), many=True).data
+
+        def fast():
+            return ValuesRepresentation(serializer_class()).represent(queryset.all())
+
+        if JSONRenderer().render(regular()) != JSONRenderer().render(fast()):
+            raise AssertionError(f'{name}: values() output differs from the serializer output')
+        before, after = timed(regular, iterations), timed(fast, iterations)
+        self.stdout.write(
+            f"{name:10} {rows:>7} {before['p50_ms']:>10.1f}ms {after['p50_ms']:>8.1f}ms "
+            f"{before['p50_ms'] / after['p50_ms']:>7.1f}x"
+        )
@@ -0,0 +1,55 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.middleware import brotli, compression_settings
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from benchmarks.seed import seed
+from benchmarks.utils import scratch_database, summarize
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+class Command(BaseCommand):
+    help = 'Measure encode time and payload size of a task list per renderer (runs in a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            user = seed(users=1, tasks_per_user=options['tasks'], days=0)[0]
+            tasks = Task.objects.filter(user=user).select_related('category')
+            data = TaskSerializer(tasks, many=True).data
+        self.stdout.write(f'{len(data)} tasks')
+
+        renderers = {'json (stdlib)': JSONRenderer().render}
+        if orjson is not None:
+            renderers['json (orjson)'] = FastJSONRenderer().render
+        if msgpack is not None:
+            renderers['msgpack'] = MessagePackRenderer().render
+
+        config = compression_settings()
+        self.stdout.write(f"{'renderer':24} {'p50':>10} {'p95':>10} {'bytes':>9} {'gzip':>9} {'br':>9}")
+        for name, render in renderers.items():
+            stats = timed(lambda: render(data), options['iterations'])
+            body = render(data)
+            gzipped = len(gzip.compress(body, config['GZIP_LEVEL'], mtime=0))
+            brotlied = len(brotli.compress(body, quality=config['BROTLI_QUALITY'])) if brotli else '-'
+            self.stdout.write(
+                f"{name:24} {stats['p50_ms']:>8.2f}ms {stats['p95_ms']:>8.2f}ms "
+                f"{len(body):>9} {gzipped:>9} {brotlied:>9}"
+            )
+
@@ -0,0 +1,143 @@
+import gzip
+import re
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.generic import TemplateView
+from django.views.static import serve
+
+from assets import views as asset_views
+from assets.middleware import StaticFilesMiddleware
+from benchmarks.utils import summarize
+
+
+ASSET_URL = re.compile(r'(?:href|src)="([^"]+)"')
+ACCEPT_ENCODING = 'gzip, deflate, br'
+PLAIN_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+
+
+class BrowserCache:
+    """
+    Just enough of a browser HTTP cache to replay page loads.
+
+    Responses that are still fresh are reused without a request; others are
+    revalidated with their ETag or Last-Modified when they have one.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def store(self, path, response, now):
+        cache_control = response.headers.get('Cache-Control', '')
+        max_age = re.search(r'max-age=(\d+)', cache_control)
+        fresh_until = now + int(max_age.group(1)) if max_age and 'no-cache' not in cache_control else now
+        self.entries[path] = (fresh_until, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+
+    def lookup(self, path, now):
+        """(fresh, conditional request headers) for path"""
+        if path not in self.entries:
+            return False, {}
+        fresh_until, etag, last_modified = self.entries[path]
+        if now < fresh_until:
+            return True, {}
+        headers = {}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        if last_modified:
+            headers['HTTP_IF_MODIFIED_SINCE'] = last_modified
+        return False, headers
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = 'Compare first and repeat page load transfer size and latency before and after the static pipeline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as plain_root, tempfile.TemporaryDirectory() as built_root:
+            plain_storages = {**settings.STORAGES, 'staticfiles': {'BACKEND': PLAIN_STORAGE}}
+            with override_settings(STATIC_ROOT=plain_root, STORAGES=plain_storages, DEBUG=False):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                results = {'before': self.measure(self.plain_fetcher(plain_root), options['iterations'])}
+            with override_settings(STATIC_ROOT=built_root, DEBUG=False):
+                call_command('collectstatic', interactive=False, verbosity=0)
+                asset_views._shells.clear()
+                results['after'] = self.measure(self.pipeline_fetcher(), options['iterations'])
+            asset_views._shells.clear()
+
+        self.stdout.write(f"{'':8} {'load':7} {'requests':>8} {'bytes':>9} {'p50':>10} {'p95':>10}")
+        for label, loads in results.items():
+            for load, result in loads.items():
+                self.stdout.write(
+                    f"{label:8} {load:7} {result['requests']:>8} {result['bytes']:>9} "
+                    f"{result['p50_ms']:>8.2f}ms {result['p95_ms']:>8.2f}ms"
+                )
+
+    def plain_fetcher(self, root):
+        """The previous setup: the page rendered per request, files served as collected"""
+        factory = RequestFactory()
+        page = TemplateView.as_view(template_name='base.html')
+
+        def fetch(path, headers):
+            request = factory.get(path, HTTP_ACCEPT_ENCODING=ACCEPT_ENCODING, **headers)
+            if path == '/':
+                return page(request).render()
+            return serve(request, path[len(settings.STATIC_URL):], document_root=root)
+        return fetch
+
+    def pipeline_fetcher(self):
+        factory = RequestFactory()
+        handler = StaticFilesMiddleware(asset_views.app_shell)
+
+        def fetch(path, headers):
+            return handler(factory.get(path, HTTP_ACCEPT_ENCODING=ACCEPT_ENCODING, **headers))
+        return fetch
+
+    def load(self, fetch, cache, now):
+        """Fetch the page and its assets like a browser; returns (requests, bytes)"""
+        requests = transferred = 0
+        paths = ['/']
+        while paths:
+            path = paths.pop(0)
+            fresh, headers = cache.lookup(path, now)
+            if fresh:
+                continue
+            response = fetch(path, headers)
+            content = body(response)
+            requests += 1
+            transferred += len(content)
+            if response.status_code == 200:
+                cache.store(path, response, now)
+            if path == '/' and response.status_code == 200:
+                html = gzip.decompress(content) if response.get('Content-Encoding') == 'gzip' else content
+                paths += [url for url in ASSET_URL.findall(html.decode()) if url.startswith(settings.STATIC_URL)]
+            elif path == '/' and response.status_code == 304:
+                paths += [url for url in cache.entries if url != '/']
+        return requests, transferred
+
+    def measure(self, fetch, iterations):
+        # Views are called directly; the rest of the middleware is the same for both setups
+        results = {}
+        for name in ('first', 'repeat'):
+            samples = []
+            for _ in range(iterations):
+                cache = BrowserCache()
+                # A repeat visit an hour later: short max-ages have expired
+                if name == 'repeat':
+                    self.load(fetch, cache, 0)
+                start = time.perf_counter()
+                requests, transferred = self.load(fetch, cache, 3600 if name == 'repeat' else 0)
+                samples.append(time.perf_counter() - start)
+            results[name] = {'requests': requests, 'bytes': transferred, **summarize(samples)}
+        return results
@@ -0,0 +1,80 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.blacklist import blacklist_filter
+from accounts.models import User
+from accounts.serializers import FilteredTokenRefreshSerializer
+from benchmarks.utils import scratch_database, summarize
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+class Command(BaseCommand):
+    help = 'Measure token refresh latency with many blacklisted tokens (runs in a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1_000_000,
+                            help='Blacklisted tokens to seed')
+        parser.add_argument('--lookups', type=int, default=2000,
+                            help='Timed lookups per measurement')
+        parser.add_argument('--chunk-size', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.run(options)
+
+    def run(self, options):
+        user = User.objects.create_user(username='bench', email='bench@example.com', password='benchpass123')
+        expires = timezone.now() + timedelta(days=1)
+
+        start = time.perf_counter()
+        remaining = options['tokens']
+        while remaining > 0:
+            size = min(remaining, options['chunk_size'])
+            outstanding = OutstandingToken.objects.bulk_create([
+                OutstandingToken(user=user, jti=uuid.uuid4().hex, token='', expires_at=expires)
+                for _ in range(size)
+            ])
+            BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in outstanding])
+            remaining -= size
+        self.stdout.write(f"Seeded {options['tokens']} blacklisted tokens in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        blacklist_filter.rebuild()
+        self.stdout.write(
+            f'Built filter in {time.perf_counter() - start:.1f}s '
+            f'({len(blacklist_filter._bloom.bits) / 1024 / 1024:.1f} MiB)'
+        )
+
+        lookups = options['lookups']
+        results = {
+            'db check (not blacklisted)': timed(
+                lambda: BlacklistedToken.objects.filter(token__jti=uuid.uuid4().hex).exists(), lookups),
+            'filter check (not blacklisted)': timed(
+                lambda: blacklist_filter.might_contain(uuid.uuid4().hex), lookups),
+        }
+
+        refresh = str(RefreshToken.for_user(user))
+        for label, serializer_class in (('refresh (stock)', TokenRefreshSerializer),
+                                        ('refresh (filtered)', FilteredTokenRefreshSerializer)):
+            results[label] = timed(
+                lambda: serializer_class(data={'refresh': refresh}).is_valid(raise_exception=True), lookups)
+
+        for label, stats in results.items():
+            self.stdout.write(
+                f"{label:32} p50={stats['p50_ms']:8.3f}ms  p95={stats['p95_ms']:8.3f}ms  p99={stats['p99_ms']:8.3f}ms"
+            )
@@ -0,0 +1,115 @@
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from accounts.models import User
+from benchmarks.loadtest import ENDPOINTS, LoadTest
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(env, timeout=30):
+    """Run ``manage.py runserver`` on a free local port; yields its URL"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'runserver', '--noreload', f'127.0.0.1:{port}'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise CommandError(f'The server exited with status {process.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f'The server did not start within {timeout}s')
+                time.sleep(0.2)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class Command(BaseCommand):
+    help = ('Load test the API with concurrent simulated users: login, today\'s schedule, task completions and '
+            'progress stats. Run seed_data first; users are picked by username prefix.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help='Simulated users running at once')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run after the ramp-up')
+        parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which clients start')
+        parser.add_argument('--think-time', type=float, default=1,
+                            help='Mean seconds a client waits between rounds; 0 for none')
+        parser.add_argument('--url', help='Test this running server instead of starting runserver')
+        parser.add_argument('--metrics-token', help='Bearer token for the metrics scrape of --url')
+        parser.add_argument('--prefix', default='seed', help='Username prefix of the seeded users')
+        parser.add_argument('--password', default='seedpass123', help='Password of the seeded users')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write JSON results to this file')
+
+    def handle(self, *args, **options):
+        usernames = list(User.objects.filter(username__startswith=options['prefix'])
+                         .order_by('pk').values_list('username', flat=True)[:options['clients']])
+        if not usernames:
+            raise CommandError(f"No users named {options['prefix']}*; create them with seed_data")
+
+        paths = {endpoint: reverse(endpoint) for endpoint in ENDPOINTS if endpoint != 'daily-task-update'}
+        paths['daily-task-update'] = reverse('daily-task-update', kwargs={'pk': 0}).replace('/0/', '/{pk}/')
+
+        if options['url']:
+            report = self.load_test(options['url'], usernames, paths, options['metrics_token'], options)
+        else:
+            token = secrets.token_urlsafe()
+            # Jobs (schedule generation, streaks) run in the server unless JOBS_EAGER says otherwise.
+            # The load test is the server's only proxy: it sets each client's X-Forwarded-For.
+            env = {'JOBS_EAGER': '1', **os.environ, 'METRICS_TOKEN': token, 'NUM_PROXIES': '1'}
+            with local_server(env) as url:
+                report = self.load_test(url, usernames, paths, token, options)
+
+        self.stdout.write(f"\n{'endpoint':20} {'requests':>9} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} "
+                          f"{'errors':>7} {'429':>5} {'locks':>6}")
+        for name, result in [*report['endpoints'].items(), ('total', report['total'])]:
+            if result is None:
+                continue
+            locks = result['lock_errors'] if result['lock_errors'] is not None else '-'
+            line = (f"{name:20} {result['requests']:>9} {result['throughput_rps']:>8} {result['p50_ms']:>7.1f}ms "
+                    f"{result['p95_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms {result['error_rate']:>7.1%} "
+                    f"{result['throttled']:>5} {locks:>6}")
+            self.stdout.write(self.style.ERROR(line) if result['errors'] else line)
+        if report['failed_clients']:
+            self.stdout.write(self.style.WARNING(f"{report['failed_clients']} clients stopped on unreadable responses"))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+    def load_test(self, url, usernames, paths, metrics_token, options):
+        self.stdout.write(f"{options['clients']} clients against {url} for {options['duration']}s")
+        return LoadTest(
+            url, usernames, options['password'], paths,
+            clients=options['clients'],
+            duration=options['duration'],
+            ramp_up=options['ramp_up'],
+            think_time=options['think_time'],
+            metrics_path=reverse('metrics'),
+            metrics_token=metrics_token,
+            seed=options['seed'],
+        ).run()
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.runner import BenchmarkRunner, compare
+from benchmarks.utils import scratch_database
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API endpoint against seeded data in a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--tasks-per-user', type=int, default=20)
+        parser.add_argument('--days', type=int, default=30, help='Days of schedule history per user')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', nargs='*', help='Only run scenarios whose name contains one of these terms')
+        parser.add_argument('--output', help='Write JSON results to this file')
+        parser.add_argument('--compare', help='Print p50 and query deltas against a previous JSON result')
+
+    def handle(self, *args, **options):
+        runner = BenchmarkRunner(
+            users=options['users'],
+            tasks_per_user=options['tasks_per_user'],
+            days=options['days'],
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['only'],
+            seed=options['seed'],
+        )
+
+        with scratch_database():
+            report = runner.run(progress=self.report_progress)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote results to {options['output']}"))
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            self.stdout.write(f"\n{'scenario':36} {'before':>10} {'after':>10} {'ratio':>7} {'queries':>9}")
+            for name, before, after, ratio, queries_before, queries_after in compare(baseline, report):
+                ratio = f'{ratio:.2f}x' if ratio is not None else '-'
+                self.stdout.write(
+                    f'{name:36} {before:>8.2f}ms {after:>8.2f}ms {ratio:>7} {queries_before:>4}->{queries_after:<4}'
+                )
+
+    def report_progress(self, name, result):
+        line = (
+            f"{name:36} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+            f"p99={result['p99_ms']:8.2f}ms queries={result['queries']:4} mem={result['peak_memory_kb']:8.1f}KiB"
+        )
+        self.stdout.write(line if result['ok'] else self.style.ERROR(f"{line} status={result.get('status')}"))
@@ -0,0 +1,127 @@
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .scenarios import SCENARIOS, CallScenario, Context
+from .seed import seed
+from .utils import summarize
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkRunner:
+    def __init__(self, users=10, tasks_per_user=20, days=30, iterations=20, warmup=2, only=None, seed=0):
+        self.volumes = {'users': users, 'tasks_per_user': tasks_per_user, 'days': days, 'seed': seed}
+        self.iterations = iterations
+        self.warmup = warmup
+        self.only = only
+
+    def scenarios(self):
+        if not self.only:
+            return SCENARIOS
+        return [scenario for scenario in SCENARIOS if any(term in scenario.name for term in self.only)]
+
+    def setup(self):
+        users = seed(**self.volumes)
+        admin = User.objects.create_superuser(username='benchadmin', email='benchadmin@example.com',
+                                              password='benchadmin123')
+        self.context = Context(users[0], admin)
+        self.clients = {None: APIClient()}
+        for auth, user in (('user', users[0]), ('admin', admin)):
+            self.clients[auth] = APIClient()
+            self.clients[auth].force_authenticate(user=user)
+
+    def _call(self, scenario):
+        """Prepare (untimed) and return a zero-argument callable for one iteration"""
+        if isinstance(scenario, CallScenario):
+            func = scenario.prepare(self.context)
+
+            def call():
+                func()
+            return call
+
+        path, data = scenario.prepare(self.context)
+        client = self.clients[scenario.auth]
+        return lambda: getattr(client, scenario.method)(path, data, format='json')
+
+    def measure(self, scenario):
+        samples = []
+        for i in range(self.warmup + self.iterations):
+            call = self._call(scenario)
+            start = time.perf_counter()
+            call()
+            elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                samples.append(elapsed)
+
+        # One extra, instrumented iteration: tracing would skew the timings above
+        call = self._call(scenario)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = summarize(samples)
+        result['queries'] = len(queries)
+        result['peak_memory_kb'] = round(peak / 1024, 1)
+        if response is not None:
+            result['status'] = response.status_code
+            result['ok'] = response.status_code == scenario.expected_status
+        else:
+            result['ok'] = True
+        return result
+
+    def run(self, progress=None):
+        # Scenarios repeat requests far faster than clients are allowed to
+        unthrottled = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': dict.fromkeys(settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})),
+        }
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver'], REST_FRAMEWORK=unthrottled):
+            self.setup()
+            results = {}
+            for scenario in self.scenarios():
+                results[scenario.name] = self.measure(scenario)
+                if progress:
+                    progress(scenario.name, results[scenario.name])
+
+        return {
+            'meta': {
+                'revision': _git_revision(),
+                'timestamp': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': self.iterations,
+                'volumes': self.volumes,
+            },
+            'results': results,
+        }
+
+
+def compare(baseline, current):
+    """Rows of (name, baseline p50, current p50, ratio, baseline queries, current queries)"""
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        ratio = result['p50_ms'] / before['p50_ms'] if before['p50_ms'] else None
+        rows.append((name, before['p50_ms'], result['p50_ms'], ratio, before['queries'], result['queries']))
+    return rows
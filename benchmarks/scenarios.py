@@ -0,0 +1,201 @@
+from datetime import date, timedelta
+from itertools import count
+
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.provisioning import provision_users
+from schedules.analytics import compute_analytics
+from schedules.models import AnalyticsReport, DailySchedule, DailyTask
+from sync.events import make_ticket
+from sync.models import Change
+from tasks.models import Category, Task
+from .seed import BENCH_PASSWORD
+
+
+_counter = count()
+
+
+class Scenario:
+    """
+    One benchmarked operation.
+
+    ``prepare`` runs untimed before every iteration and returns the request
+    path and payload, so scenarios that consume state (logout, delete) can
+    create it fresh each time. ``auth`` picks the client: 'user', 'admin' or
+    None for anonymous requests.
+    """
+
+    def __init__(self, name, method, url_name, prepare, auth='user', expected_status=200):
+        self.name = name
+        self.method = method
+        self.url_name = url_name
+        self.prepare = prepare
+        self.auth = auth
+        self.expected_status = expected_status
+
+
+class CallScenario:
+    """Benchmark of a plain Python callable rather than an endpoint"""
+
+    def __init__(self, name, prepare):
+        self.name = name
+        self.prepare = prepare
+
+
+def _task_payload(ctx):
+    return {
+        'category': ctx.category.id,
+        'title': 'Benchmark Task',
+        'description': 'Created by the benchmark suite',
+        'start_time': '09:00:00',
+        'end_time': '10:00:00',
+        'priority': 'medium',
+        'is_recurring': False,
+    }
+
+
+def _new_task(ctx):
+    return Task.objects.create(user=ctx.user, category=ctx.category, title='Disposable',
+                               start_time='09:00:00', end_time='10:00:00')
+
+
+def _register(ctx):
+    n = next(_counter)
+    return reverse('register'), {
+        'username': f'newbench{n}',
+        'email': f'newbench{n}@example.com',
+        'password': BENCH_PASSWORD,
+        'password2': BENCH_PASSWORD,
+    }
+
+
+def _provision(ctx):
+    n = next(_counter)
+    return reverse('provision'), {'users': [{'username': f'invitee{n}', 'email': f'invitee{n}@example.com'}]}
+
+
+def _accept_invite(ctx):
+    n = next(_counter)
+    result = provision_users([{'username': f'accept{n}', 'email': f'accept{n}@example.com'}], processes=1)
+    invite = result['invites'][0]
+    return reverse('accept-invite'), {
+        'uid': invite['uid'],
+        'token': invite['token'],
+        'password': BENCH_PASSWORD,
+        'password2': BENCH_PASSWORD,
+    }
+
+
+def _delta_sync(ctx):
+    # A client one change behind: the benchmark user's task was just edited
+    cursor = Change.objects.filter(user=ctx.user).order_by('-id').values_list('id', flat=True).first() or 0
+    ctx.task.save()
+    return reverse('sync') + f'?since={cursor}', None
+
+
+def _events(ctx):
+    return reverse('sync-events') + f'?ticket={make_ticket(ctx.user.pk)}', None
+
+
+def _copy(url_name, source):
+    # A new target week each iteration so the copy always inserts
+    def prepare(ctx):
+        target = date.today() + timedelta(days=1000 + 7 * next(_counter))
+        return reverse(url_name), {'source_start': source(ctx), 'source_end': source(ctx) + timedelta(days=6),
+                                   'target_start': target}
+    return prepare
+
+
+def _analytics(ctx):
+    if not AnalyticsReport.objects.exists():
+        AnalyticsReport.objects.create(data=compute_analytics(processes=1))
+    return reverse('analytics'), None
+
+
+def _generate_from_tasks(ctx):
+    # A new future date each iteration so generation always inserts
+    n = next(_counter)
+    schedule = DailySchedule.objects.create(user=ctx.user, date=date.today() + timedelta(days=1000 + n))
+    return schedule.generate_from_tasks
+
+
+SCENARIOS = [
+    # accounts/urls.py
+    Scenario('register POST', 'post', 'register', _register, auth=None, expected_status=201),
+    Scenario('login POST', 'post', 'login',
+             lambda ctx: (reverse('login'), {'username': ctx.user.username, 'password': BENCH_PASSWORD}), auth=None),
+    Scenario('logout POST', 'post', 'logout',
+             lambda ctx: (reverse('logout'), {'refresh': str(RefreshToken.for_user(ctx.user))})),
+    Scenario('profile GET', 'get', 'profile', lambda ctx: (reverse('profile'), None)),
+    Scenario('profile PATCH', 'patch', 'profile', lambda ctx: (reverse('profile'), {'time_zone': 'UTC'})),
+    Scenario('change-password PUT', 'put', 'change-password',
+             lambda ctx: (reverse('change-password'), {'old_password': BENCH_PASSWORD, 'new_password': BENCH_PASSWORD})),
+    Scenario('provision POST', 'post', 'provision', _provision, auth='admin', expected_status=201),
+    Scenario('accept-invite POST', 'post', 'accept-invite', _accept_invite, auth=None),
+    Scenario('token-refresh POST', 'post', 'token_refresh',
+             lambda ctx: (reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(ctx.user))}), auth=None),
+
+    # tasks/urls.py
+    Scenario('category-list GET', 'get', 'category-list', lambda ctx: (reverse('category-list'), None)),
+    Scenario('category-detail GET', 'get', 'category-detail',
+             lambda ctx: (reverse('category-detail', kwargs={'pk': ctx.category.id}), None)),
+    Scenario('task-list GET', 'get', 'task-list', lambda ctx: (reverse('task-list'), None)),
+    Scenario('task-list GET (fields)', 'get', 'task-list',
+             lambda ctx: (reverse('task-list') + '?fields=id,title,date,start_time,end_time,is_completed', None)),
+    Scenario('task-list POST', 'post', 'task-list', lambda ctx: (reverse('task-list'), _task_payload(ctx)),
+             expected_status=201),
+    Scenario('today-task-list GET', 'get', 'today-task-list', lambda ctx: (reverse('today-task-list'), None)),
+    Scenario('task-detail GET', 'get', 'task-detail',
+             lambda ctx: (reverse('task-detail', kwargs={'pk': ctx.task.id}), None)),
+    Scenario('task-detail PUT', 'put', 'task-detail',
+             lambda ctx: (reverse('task-detail', kwargs={'pk': ctx.task.id}), _task_payload(ctx))),
+    Scenario('task-detail DELETE', 'delete', 'task-detail',
+             lambda ctx: (reverse('task-detail', kwargs={'pk': _new_task(ctx).id}), None), expected_status=204),
+    Scenario('recurring-task-list GET', 'get', 'recurring-task-list',
+             lambda ctx: (reverse('recurring-task-list'), None)),
+    Scenario('task-copy POST', 'post', 'task-copy', _copy('task-copy', lambda ctx: ctx.task.date),
+             expected_status=201),
+
+    # schedules/urls.py
+    Scenario('schedule-list GET', 'get', 'schedule-list', lambda ctx: (reverse('schedule-list'), None)),
+    Scenario('schedule-list GET (summary)', 'get', 'schedule-list',
+             lambda ctx: (reverse('schedule-list') + '?view=summary', None)),
+    Scenario('schedule-list POST', 'post', 'schedule-list', lambda ctx: (reverse('schedule-list'), {}),
+             expected_status=201),
+    Scenario('schedule-detail GET', 'get', 'schedule-detail',
+             lambda ctx: (reverse('schedule-detail', kwargs={'pk': ctx.schedule.id}), None)),
+    Scenario('today-schedule GET', 'get', 'today-schedule', lambda ctx: (reverse('today-schedule'), None)),
+    Scenario('schedule-copy POST', 'post', 'schedule-copy', _copy('schedule-copy', lambda ctx: ctx.schedule.date),
+             expected_status=201),
+    Scenario('daily-task-update PATCH', 'patch', 'daily-task-update',
+             lambda ctx: (reverse('daily-task-update', kwargs={'pk': ctx.daily_task.id}), {'is_completed': True})),
+    Scenario('progress-streak GET', 'get', 'progress-streak', lambda ctx: (reverse('progress-streak'), None)),
+    Scenario('progress-stats GET', 'get', 'progress-stats', lambda ctx: (reverse('progress-stats'), None)),
+    Scenario('progress-heatmap GET', 'get', 'progress-heatmap', lambda ctx: (reverse('progress-heatmap'), None)),
+    Scenario('analytics GET', 'get', 'analytics', _analytics, auth='admin'),
+    Scenario('analytics POST', 'post', 'analytics', lambda ctx: (reverse('analytics'), None), auth='admin',
+             expected_status=202),
+
+    # sync/urls.py
+    Scenario('sync GET (snapshot)', 'get', 'sync', lambda ctx: (reverse('sync'), None)),
+    Scenario('sync GET (delta)', 'get', 'sync', _delta_sync),
+    # Connection setup only; the stream itself is not consumed
+    Scenario('sync-events GET', 'get', 'sync-events', _events),
+    Scenario('sync-events-ticket POST', 'post', 'sync-events-ticket', lambda ctx: (reverse('sync-events-ticket'), None)),
+
+    # Model-level hot path
+    CallScenario('DailySchedule.generate_from_tasks', _generate_from_tasks),
+]
+
+
+class Context:
+    """Objects the scenarios operate on, owned by the benchmark user"""
+
+    def __init__(self, user, admin):
+        self.user = user
+        self.admin = admin
+        self.category = Category.objects.first()
+        self.task = Task.objects.filter(user=user).first()
+        self.schedule = DailySchedule.objects.filter(user=user).first()
+        self.daily_task = DailyTask.objects.filter(schedule__user=user).first()
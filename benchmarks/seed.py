@@ -0,0 +1,17 @@
+from accounts.models import User
+from .synthetic import SyntheticDataGenerator
+
+
+BENCH_PASSWORD = 'benchpass123'
+
+
+def seed(users=10, tasks_per_user=20, days=30, seed=0):
+    """
+    Populate the database with benchmark data.
+
+    Returns the created users; the first one is the user benchmarks run as.
+    """
+    generator = SyntheticDataGenerator(users=users, tasks_per_user=tasks_per_user, days=days, seed=seed,
+                                       password=BENCH_PASSWORD, prefix='bench')
+    user_ids = generator.run()
+    return list(User.objects.filter(pk__in=user_ids).order_by('pk'))
@@ -0,0 +1,197 @@
+import random
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+from accounts.models import User, Profile
+from schedules.models import DailySchedule, DailyTask, ProgressStreak, Reminder
+from tasks.models import Category, Task
+from .bulk import BulkLoader
+
+
+TITLES = {
+    'spiritual': ['Morning Prayer', 'Scripture Reading', 'Meditation', 'Evening Prayer'],
+    'family': ['Family Dinner', 'Call Parents', 'Play with Kids', 'Family Walk'],
+    'study': ['Online Course', 'Read a Chapter', 'Language Practice', 'Revise Notes'],
+    'work': ['Deep Work', 'Team Standup', 'Email Triage', 'Project Planning'],
+    'personal': ['Journal', 'Budget Review', 'Hobby Time', 'Tidy Up'],
+    'health': ['Morning Run', 'Gym Session', 'Stretching', 'Meal Prep'],
+    'other': ['Errands', 'Volunteer', 'Admin', 'Side Project'],
+}
+TIME_ZONES = ['UTC', 'Africa/Lagos', 'Africa/Nairobi', 'Europe/London', 'America/New_York', 'Asia/Kolkata']
+PRIORITIES = ['high', 'medium', 'low']
+
+USER_FIELDS = ('id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name',
+               'email', 'is_staff', 'is_active', 'date_joined')
+PROFILE_FIELDS = ('id', 'user_id', 'name', 'preferred_daily_start_time', 'time_zone')
+TASK_FIELDS = ('id', 'user_id', 'category_id', 'title', 'description', 'date', 'start_time', 'end_time',
+               'priority', 'is_recurring', 'recurrence_pattern', 'is_completed', 'created_at', 'updated_at')
+SCHEDULE_FIELDS = ('id', 'user_id', 'date', 'created_at', 'updated_at')
+DAILY_TASK_FIELDS = ('id', 'schedule_id', 'original_task_id', 'title', 'category_id', 'start_time', 'end_time',
+                     'priority', 'is_completed', 'completed_at', 'created_at', 'updated_at')
+REMINDER_FIELDS = ('id', 'user_id', 'task_id', 'reminder_type', 'reminder_time', 'is_sent', 'sent_at', 'created_at')
+STREAK_FIELDS = ('id', 'user_id', 'current_streak', 'longest_streak', 'last_updated')
+
+# The attributes DailySchedule.should_occur_today reads from a task
+RecurringTask = namedtuple('RecurringTask', 'id category_id title start_time end_time priority '
+                                            'is_recurring date recurrence_pattern')
+
+
+def _at(day, at):
+    return datetime.combine(day, at, tzinfo=dt_timezone.utc)
+
+
+class SyntheticDataGenerator:
+    """
+    Deterministic generator of realistic users, tasks and schedule history.
+
+    Every user gets a "diligence" drawn from a beta distribution that drives
+    how often their daily tasks are completed (lower at weekends), and a
+    small chance of skipping a day entirely. Streaks are derived from the
+    generated history with the same 80% rule as ProgressStreak.update_streak.
+    """
+
+    def __init__(self, users=1000, tasks_per_user=12, days=90, seed=0, password='seedpass123',
+                 prefix='seed', reminder_rate=0.2, chunk_size=50000, using='default'):
+        self.users = users
+        self.tasks_per_user = tasks_per_user
+        self.days = days
+        self.rng = random.Random(seed)
+        self.password = password
+        self.prefix = prefix
+        self.reminder_rate = reminder_rate
+        self.loader = BulkLoader(using=using, chunk_size=chunk_size)
+
+    def _slot(self):
+        start_hour = self.rng.randint(5, 21)
+        start = time(start_hour, self.rng.choice([0, 15, 30, 45]))
+        end_minutes = min(start_hour * 60 + start.minute + self.rng.choice([15, 30, 45, 60, 90]), 23 * 60 + 59)
+        return start, time(end_minutes // 60, end_minutes % 60)
+
+    def run(self):
+        """Generate everything; returns the new user ids"""
+        call_command('load_default_categories', stdout=StringIO())
+        self.categories = list(Category.objects.order_by('pk').values_list('pk', 'name'))
+
+        self.ids = {model: self.loader.next_id(model)
+                    for model in (User, Profile, Task, DailySchedule, DailyTask, Reminder, ProgressStreak)}
+        self.today = date.today()
+        self.start = self.today - timedelta(days=self.days)
+        # One unsaved schedule per day, reused to evaluate recurrence for every user
+        self.day_schedules = [DailySchedule(date=self.start + timedelta(days=d)) for d in range(self.days)]
+        self.hashed_password = make_password(self.password)
+
+        user_ids = [self._user(index) for index in range(self.users)]
+        self.counts = self.loader.finish()
+        return user_ids
+
+    def _next(self, model):
+        pk = self.ids[model]
+        self.ids[model] = pk + 1
+        return pk
+
+    def _user(self, index):
+        rng, insert = self.rng, self.loader.insert
+        user_id = self._next(User)
+        joined = _at(self.start - timedelta(days=rng.randint(1, 60)), time(12))
+        insert(User, USER_FIELDS, (
+            user_id, self.hashed_password, None, False, f'{self.prefix}{user_id}', 'Seed', f'User {user_id}',
+            f'{self.prefix}{user_id}@example.com', False, True, joined,
+        ))
+        insert(Profile, PROFILE_FIELDS, (
+            self._next(Profile), user_id, f'Seed User {user_id}',
+            time(rng.randint(5, 8), rng.choice([0, 30])), rng.choice(TIME_ZONES),
+        ))
+
+        recurring = self._tasks(user_id, index, joined)
+        self._history(user_id, recurring)
+        return user_id
+
+    def _tasks(self, user_id, index, joined):
+        rng, insert = self.rng, self.loader.insert
+        recurring = []
+        recurring_count = max(1, round(self.tasks_per_user * 0.6))
+        for i in range(self.tasks_per_user):
+            # Rotate through categories so every Category value is used
+            category_id, category_name = self.categories[(index + i) % len(self.categories)]
+            title = rng.choice(TITLES.get(category_name, TITLES['other']))
+            start_time, end_time = self._slot()
+            priority = rng.choice(PRIORITIES)
+            task_id = self._next(Task)
+
+            if i < recurring_count:
+                pattern = rng.choices(['daily', 'weekly', 'monthly'], weights=[70, 20, 10])[0]
+                task_date = self.start - timedelta(days=rng.randint(0, 30))
+                recurring.append(RecurringTask(task_id, category_id, title, start_time, end_time, priority,
+                                               True, task_date, pattern))
+                completed = False
+            else:
+                pattern = 'none'
+                task_date = self.start + timedelta(days=rng.randint(0, self.days + 14))
+                completed = task_date < self.today and rng.random() < 0.7
+
+            created = max(joined, _at(task_date - timedelta(days=1), time(20)))
+            insert(Task, TASK_FIELDS, (
+                task_id, user_id, category_id, title, '', task_date, start_time, end_time, priority,
+                pattern != 'none', pattern, completed, created, created,
+            ))
+        return recurring
+
+    def _history(self, user_id, recurring):
+        rng, insert = self.rng, self.loader.insert
+        diligence = rng.betavariate(4, 1.5)
+        current = longest = 0
+        last_active = None
+
+        for schedule in self.day_schedules:
+            day = schedule.date
+            if rng.random() < 0.08:
+                # Skipped day: no schedule, streak broken
+                current = 0
+                continue
+
+            schedule_id = self._next(DailySchedule)
+            created = _at(day, time(6))
+            insert(DailySchedule, SCHEDULE_FIELDS, (schedule_id, user_id, day, created, created))
+
+            due = [task for task in recurring if schedule.should_occur_today(task)]
+            if rng.random() < 0.1:
+                # Occasional manual task added for the day
+                start_time, end_time = self._slot()
+                category_id, category_name = rng.choice(self.categories)
+                due.append(RecurringTask(None, category_id, rng.choice(TITLES.get(category_name, TITLES['other'])),
+                                         start_time, end_time, 'medium', False, day, 'none'))
+
+            rate = diligence * (0.8 if day.weekday() >= 5 else 1.0)
+            completed_count = 0
+            for task in due:
+                completed = rng.random() < rate
+                completed_count += completed
+                completed_at = _at(day, task.end_time) if completed else None
+                daily_task_id = self._next(DailyTask)
+                insert(DailyTask, DAILY_TASK_FIELDS, (
+                    daily_task_id, schedule_id, task.id, task.title, task.category_id, task.start_time,
+                    task.end_time, task.priority, completed, completed_at, created, completed_at or created,
+                ))
+
+                if rng.random() < self.reminder_rate:
+                    remind_at = _at(day, task.start_time) - timedelta(minutes=15)
+                    insert(Reminder, REMINDER_FIELDS, (
+                        self._next(Reminder), user_id, daily_task_id, rng.choice(['notification', 'email']),
+                        remind_at, True, remind_at + timedelta(seconds=rng.randint(0, 90)), created,
+                    ))
+
+            # Same rule as ProgressStreak.update_streak: 80%+ completion extends the streak
+            if due and round(completed_count / len(due) * 100) >= 80:
+                current += 1
+                longest = max(longest, current)
+            else:
+                current = 0
+            last_active = day
+
+        insert(ProgressStreak, STREAK_FIELDS, (
+            self._next(ProgressStreak), user_id, current, longest, last_active or self.today,
+        ))
@@ -0,0 +1,151 @@
+from django.core.management import call_command
+from django.db import models
+from django.conf import settings
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.urls import URLPattern
+from io import StringIO
+
+import accounts.urls
+import schedules.urls
+import sync.urls
+import tasks.urls
+from accounts.models import User
+from schedules.models import DailySchedule, DailyTask, ProgressStreak, Reminder
+from tasks.models import Category, Task
+from .loadtest import ENDPOINTS, LoadTest, lock_errors
+from .runner import BenchmarkRunner, compare
+from .scenarios import SCENARIOS
+from .synthetic import SyntheticDataGenerator
+from .utils import summarize
+
+
+class SummarizeTest(TestCase):
+    def test_percentiles(self):
+        """Test latency summary uses nearest-rank percentiles in milliseconds"""
+        result = summarize([i / 1000 for i in range(1, 101)])
+        self.assertEqual(result['iterations'], 100)
+        self.assertEqual(result['p50_ms'], 50)
+        self.assertEqual(result['p99_ms'], 99)
+        self.assertEqual(result['max_ms'], 100)
+    
+    def test_single_sample(self):
+        """Test a single sample is its own percentile"""
+        result = summarize([0.002])
+        self.assertEqual(result['p50_ms'], 2)
+        self.assertEqual(result['p99_ms'], 2)
+
+
+class ScenarioCoverageTest(TestCase):
+    def test_every_endpoint_has_a_scenario(self):
+        """Test every named API route is benchmarked"""
+        covered = {getattr(scenario, 'url_name', None) for scenario in SCENARIOS}
+        for module in (accounts.urls, schedules.urls, sync.urls, tasks.urls):
+            for pattern in module.urlpatterns:
+                if isinstance(pattern, URLPattern):
+                    self.assertIn(pattern.name, covered)
+
+
+class BenchmarkRunnerTest(TestCase):
+    def test_run_all_scenarios(self):
+        """Test every scenario runs and returns its expected status"""
+        runner = BenchmarkRunner(users=2, tasks_per_user=8, days=7, iterations=1, warmup=0)
+        report = runner.run()
+        
+        self.assertEqual(set(report['results']), {scenario.name for scenario in SCENARIOS})
+        for name, result in report['results'].items():
+            self.assertTrue(result['ok'], f'{name} returned {result.get("status")}')
+            self.assertGreaterEqual(result['queries'], 0)
+            self.assertGreater(result['peak_memory_kb'], 0)
+        self.assertEqual(report['meta']['volumes']['users'], 2)
+    
+    def test_compare(self):
+        """Test comparing two reports yields p50 ratios"""
+        baseline = {'results': {'a': {'p50_ms': 2.0, 'queries': 4}}}
+        current = {'results': {'a': {'p50_ms': 1.0, 'queries': 2}, 'b': {'p50_ms': 1.0, 'queries': 1}}}
+        self.assertEqual(compare(baseline, current), [('a', 2.0, 1.0, 0.5, 4, 2)])
+
+
+
+class SyntheticDataGeneratorTest(TestCase):
+    def generate(self, **kwargs):
+        options = {'users': 5, 'tasks_per_user': 10, 'days': 21, 'seed': 42}
+        options.update(kwargs)
+        return SyntheticDataGenerator(**options).run()
+    
+    def snapshot(self):
+        return list(DailyTask.objects.order_by('pk').values_list('title', 'start_time', 'is_completed'))
+    
+    def test_deterministic(self):
+        """Test the same seed produces the same data"""
+        self.generate()
+        first = self.snapshot()
+        DailyTask.objects.all().delete()
+        DailySchedule.objects.all().delete()
+        Task.objects.all().delete()
+        User.objects.all().delete()
+        
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+    
+    def test_generated_rows(self):
+        """Test users, tasks, history, reminders and streaks are generated consistently"""
+        user_ids = self.generate()
+        
+        self.assertEqual(User.objects.filter(pk__in=user_ids).count(), 5)
+        self.assertEqual(Task.objects.count(), 50)
+        self.assertEqual(set(Task.objects.values_list('category__name', flat=True)),
+                         {name for name, _ in Category.CATEGORY_CHOICES})
+        self.assertTrue(Task.objects.filter(is_recurring=True, recurrence_pattern='daily').exists())
+        self.assertTrue(DailySchedule.objects.exists())
+        self.assertTrue(Reminder.objects.exists())
+        self.assertTrue(User.objects.get(pk=user_ids[0]).check_password('seedpass123'))
+        
+        # Generated daily tasks come from recurring tasks owned by the same user
+        mismatched = DailyTask.objects.exclude(original_task=None).exclude(
+            original_task__user=models.F('schedule__user'))
+        self.assertFalse(mismatched.exists())
+        
+        for streak in ProgressStreak.objects.all():
+            self.assertLessEqual(streak.current_streak, streak.longest_streak)
+    
+    def test_generator_appends_to_existing_data(self):
+        """Test generating twice does not collide on ids or usernames"""
+        self.generate()
+        self.generate(seed=7)
+        self.assertEqual(User.objects.count(), 10)
+        
+        # Inserts through the ORM still work after explicit ids
+        User.objects.create_user(username='after', email='after@example.com', password='testpass123')
+    
+    def test_seed_data_command(self):
+        """Test the seed_data command reports generated rows"""
+        out = StringIO()
+        call_command('seed_data', users=2, tasks_per_user=4, days=7, stdout=out)
+        self.assertIn('Generated', out.getvalue())
+        self.assertEqual(User.objects.count(), 2)
+
+
+@override_settings(JOBS={**settings.JOBS, 'EAGER': True}, METRICS={'TOKEN': 'scrape-secret'})
+class LoadTestTest(LiveServerTestCase):
+    def test_scenario(self):
+        """Test simulated clients run every endpoint of the scenario against a live server"""
+        user_ids = SyntheticDataGenerator(users=2, tasks_per_user=10, days=2, password='loadpass123',
+                                          prefix='load').run()
+        usernames = list(User.objects.filter(pk__in=user_ids).values_list('username', flat=True))
+        paths = {endpoint: reverse(endpoint) for endpoint in ENDPOINTS if endpoint != 'daily-task-update'}
+        paths['daily-task-update'] = reverse('daily-task-update', kwargs={'pk': 0}).replace('/0/', '/{pk}/')
+        
+        report = LoadTest(self.live_server_url, usernames, 'loadpass123', paths, clients=3, duration=1,
+                          think_time=0, metrics_path=reverse('metrics'), metrics_token='scrape-secret').run()
+        
+        self.assertEqual(report['failed_clients'], 0)
+        self.assertEqual(set(report['endpoints']), set(ENDPOINTS))
+        self.assertEqual(report['endpoints']['login']['requests'], 3)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertEqual(report['total']['lock_errors'], 0)
+    
+    def test_lock_errors_parsed(self):
+        """Test lock error counts are read from the metrics exposition"""
+        text = 'database_lock_errors_total{route="login"} 2\ndatabase_lock_errors_total{route="progress-stats"} 1\n'
+        self.assertEqual(lock_errors(text), {'login': 2, 'progress-stats': 1})
@@ -18,8 +18,9 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.views.generic import TemplateView
 from rest_framework_simplejwt.views import TokenRefreshView
+from assets.views import app_shell
+from monitoring.views import metrics
 
 
 
@@ -29,11 +30,13 @@ urlpatterns = [
     path('api/auth/', include('accounts.urls')),
     path('api/tasks/', include('tasks.urls')),
     path('api/schedules/', include('schedules.urls')),
+    path('api/sync/', include('sync.urls')),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('internal/metrics', metrics, name='metrics'),
 
 
     # Serve the base template for all frontend routes
-    path('', TemplateView.as_view(template_name='base.html'), name='home'),
+    path('', app_shell, name='home'),
 
 ]
 
@@ -0,0 +1,58 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.worker import Worker
+
+
+def _run_worker(threads, burst):
+    # Entry point of child worker processes
+    import django
+    django.setup()
+    worker = Worker(threads=threads)
+    # The parent turns Ctrl+C into SIGTERM so in-flight jobs can finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+    worker.run(burst=burst)
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the job queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Jobs run concurrently per process')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes; use more than one for CPU-bound jobs')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no due jobs are left instead of waiting for more')
+
+    def handle(self, *args, **options):
+        threads, burst = options['threads'], options['burst']
+        if options['processes'] <= 1:
+            worker = Worker(threads=threads)
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: worker.stop())
+            processed = worker.run(burst=burst)
+            self.stdout.write(self.style.SUCCESS(f'Worker stopped after {processed} jobs'))
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        children = [context.Process(target=_run_worker, args=(threads, burst), daemon=False)
+                    for _ in range(options['processes'])]
+        for child in children:
+            child.start()
+
+        def stop(*args):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, stop)
+        for child in children:
+            child.join()
+        self.stdout.write(self.style.SUCCESS(f"{options['processes']} worker processes stopped"))
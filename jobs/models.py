@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """A unit of background work, claimed and run by ``run_jobs`` workers"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)  # Higher runs first
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    # At most one queued job per key; enqueuing a duplicate is a no-op
+    dedup_key = models.CharField(max_length=200, null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            # Claiming only ever scans queued jobs
+            models.Index(fields=['-priority', 'run_at', 'id'], condition=models.Q(status='queued'),
+                         name='job_claim_idx'),
+            models.Index(fields=['status', 'locked_at'], name='job_status_locked_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['dedup_key'], condition=models.Q(status='queued'),
+                                    name='unique_queued_job_dedup_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
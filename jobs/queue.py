@@ -0,0 +1,129 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+DEFAULTS = {
+    'EAGER': False,
+    'POLL_INTERVAL': 1.0,
+    'LEASE_SECONDS': 300,
+    'RETRY_DELAY': 10,
+    'KEEP_FINISHED_DAYS': 7,
+    'PERIODIC': {},
+}
+
+registry = {}
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, 'JOBS', {})}
+
+
+def register(name):
+    """Decorator making a function runnable as the job ``name``; it gets the job's kwargs"""
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, priority=0, dedup_key=None, run_at=None, max_attempts=3, **kwargs):
+    """
+    Queue a job; returns the Job, or None when a job with the same
+    ``dedup_key`` is already queued.
+
+    Called inside a transaction, the job only becomes visible to workers
+    if that transaction commits. With ``JOBS['EAGER']`` the job runs in
+    process once the current transaction commits instead.
+    """
+    if name not in registry:
+        raise KeyError(f'No job registered as {name!r}')
+
+    if job_settings()['EAGER']:
+        transaction.on_commit(lambda: registry[name](**kwargs))
+        return None
+
+    job = Job(name=name, kwargs=kwargs, priority=priority, dedup_key=dedup_key,
+              run_at=run_at or timezone.now(), max_attempts=max_attempts)
+    if dedup_key is None:
+        job.save()
+        return job
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        return None
+    return job
+
+
+def claim(worker, limit):
+    """
+    Mark up to ``limit`` due jobs as running for ``worker`` and return them.
+
+    Where the database supports it, candidate rows are locked with
+    ``SKIP LOCKED`` so concurrent workers pass over each other's rows
+    instead of queueing on them. The update is conditional on the job
+    still being queued either way, so on databases without row locks
+    (SQLite) two workers can never both claim a job.
+    """
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('-priority', 'run_at', 'id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids, status='queued').update(
+            status='running', locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(locked_by=token, status='running').order_by('-priority', 'run_at', 'id'))
+
+
+def complete(job):
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(status='done', finished_at=timezone.now())
+
+
+def fail(job, error):
+    """Queue the job again with exponential backoff, or give up after max_attempts"""
+    now = timezone.now()
+    jobs = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    if job.attempts >= job.max_attempts:
+        jobs.update(status='failed', finished_at=now, last_error=error)
+        return
+    delay = job_settings()['RETRY_DELAY'] * 2 ** (job.attempts - 1)
+    try:
+        with transaction.atomic():
+            jobs.update(status='queued', run_at=now + timedelta(seconds=delay), locked_by='', last_error=error)
+    except IntegrityError:
+        # A fresh job with the same dedup key was queued meanwhile and will do the work
+        jobs.update(status='failed', finished_at=now, last_error=error)
+
+
+def requeue_expired():
+    """Return jobs of workers that died mid-job to the queue"""
+    expired = timezone.now() - timedelta(seconds=job_settings()['LEASE_SECONDS'])
+    requeued = 0
+    for job in Job.objects.filter(status='running', locked_at__lt=expired):
+        try:
+            with transaction.atomic():
+                requeued += Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+                    status='queued', locked_by='', last_error='Lease expired',
+                )
+        except IntegrityError:
+            Job.objects.filter(pk=job.pk).update(status='failed', finished_at=timezone.now(),
+                                                 last_error='Lease expired; superseded by a queued duplicate')
+    return requeued
+
+
+def prune_finished():
+    cutoff = timezone.now() - timedelta(days=job_settings()['KEEP_FINISHED_DAYS'])
+    return Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()[0]
@@ -0,0 +1,261 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from schedules.models import DailySchedule, DailyTask, ProgressStreak, Reminder
+from tasks.models import Category, Task
+from . import queue
+from .models import Job
+from .worker import Worker
+
+User = get_user_model()
+
+calls = []
+
+
+@queue.register('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.register('tests.explode')
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+    
+    def test_dedup_key(self):
+        """Test a duplicate of a queued job is not queued again"""
+        first = queue.enqueue('tests.record', dedup_key='same', value=1)
+        self.assertIsNotNone(first)
+        self.assertIsNone(queue.enqueue('tests.record', dedup_key='same', value=2))
+        
+        # Once the job is running, new work under the key is queued again
+        queue.claim('worker', 1)
+        self.assertIsNotNone(queue.enqueue('tests.record', dedup_key='same', value=3))
+    
+    def test_unknown_job(self):
+        """Test enqueuing an unregistered job fails fast"""
+        with self.assertRaises(KeyError):
+            queue.enqueue('tests.missing')
+    
+    def test_claim_order(self):
+        """Test due jobs are claimed by priority and future jobs are left alone"""
+        low = queue.enqueue('tests.record', value='low')
+        high = queue.enqueue('tests.record', priority=10, value='high')
+        queue.enqueue('tests.record', priority=20, run_at=timezone.now() + timedelta(hours=1), value='later')
+        
+        claimed = queue.claim('worker', 5)
+        self.assertEqual([job.pk for job in claimed], [high.pk, low.pk])
+        self.assertTrue(all(job.status == 'running' and job.attempts == 1 for job in claimed))
+        self.assertEqual(queue.claim('worker', 5), [])
+    
+    def test_expired_lease_requeued(self):
+        """Test jobs of a worker that died are returned to the queue"""
+        job = queue.enqueue('tests.record', value=1)
+        queue.claim('dead-worker', 1)
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        
+        self.assertEqual(queue.requeue_expired(), 1)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'queued')
+    
+    @override_settings(JOBS={'EAGER': True})
+    def test_eager_mode(self):
+        """Test eager jobs run in process once the transaction commits"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(queue.enqueue('tests.record', value='now'))
+        self.assertEqual(calls, ['now'])
+        self.assertFalse(Job.objects.exists())
+    
+    @override_settings(JOBS={'PERIODIC': {'tests.record': 60}})
+    def test_periodic_jobs_scheduled_once(self):
+        """Test periodic jobs are queued once per slot however many workers schedule them"""
+        Worker().housekeeping()
+        Worker().housekeeping()
+        self.assertEqual(Job.objects.filter(name='tests.record').count(), 1)
+
+
+# Workers run jobs on their own threads, which only see committed data
+class WorkerTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+    
+    def test_worker_runs_jobs(self):
+        """Test a burst worker runs every due job and marks it done"""
+        for value in range(3):
+            queue.enqueue('tests.record', value=value)
+        
+        processed = Worker(threads=2, poll_interval=0.01).run(burst=True)
+        self.assertEqual(processed, 3)
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertEqual(Job.objects.filter(status='done').count(), 3)
+    
+    @override_settings(JOBS={'RETRY_DELAY': 0})
+    def test_retries_then_fails(self):
+        """Test failing jobs are retried with backoff until max_attempts"""
+        job = queue.enqueue('tests.explode', max_attempts=2)
+        with self.assertLogs('jobs.worker', level='WARNING'):
+            Worker(poll_interval=0.01).run(burst=True)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('RuntimeError: boom', job.last_error)
+    
+    def test_database_errors_survived(self):
+        """Test a failed claim or housekeeping pass is logged and the worker keeps polling"""
+        queue.enqueue('tests.record', value=1)
+        claim = queue.claim
+        outcomes = [OperationalError('database is locked')]
+        
+        def flaky_claim(*args, **kwargs):
+            if outcomes:
+                raise outcomes.pop()
+            return claim(*args, **kwargs)
+        
+        with mock.patch('jobs.queue.claim', side_effect=flaky_claim), \
+                mock.patch('jobs.queue.prune_finished', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('jobs.worker', level='ERROR') as logs:
+            processed = Worker(poll_interval=0.01).run(burst=True)
+        
+        self.assertEqual(processed, 1)
+        self.assertEqual(calls, [1])
+        self.assertEqual(len(logs.records), 2)
+    
+    def test_retry_backoff(self):
+        """Test a failed attempt is requeued for later"""
+        job = queue.enqueue('tests.explode')
+        with self.assertLogs('jobs.worker', level='WARNING'):
+            Worker(poll_interval=0.01).run(burst=True)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_at, timezone.now())
+
+
+class ConcurrentClaimTest(TransactionTestCase):
+    def test_each_job_claimed_once(self):
+        """Test competing workers never claim the same job"""
+        for value in range(40):
+            queue.enqueue('tests.record', value=value)
+        
+        claimed = []
+        
+        def claim_all(name):
+            while True:
+                jobs = queue.claim(name, 3)
+                if not jobs:
+                    break
+                claimed.extend(job.pk for job in jobs)
+        
+        threads = [threading.Thread(target=claim_all, args=(f'worker{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), sorted(Job.objects.values_list('pk', flat=True)))
+
+
+class ScheduleJobsTest(APITransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        Task.objects.create(
+            user=self.user,
+            category=self.category,
+            title='Daily Standup',
+            date=timezone.localdate() - timedelta(days=1),
+            start_time='09:00:00',
+            end_time='09:15:00',
+            is_recurring=True,
+            recurrence_pattern='daily'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def test_todays_schedule_regenerated_in_background(self):
+        """Test a new schedule is generated by the request and later task changes by a job"""
+        response = self.client.get(reverse('today-schedule'))
+        self.assertEqual([task['title'] for task in response.data['daily_tasks']], ['Daily Standup'])
+        self.assertFalse(Job.objects.exists())
+        
+        Task.objects.create(user=self.user, category=self.category, title='Daily Review',
+                            date=timezone.localdate() - timedelta(days=1), start_time='17:00:00',
+                            end_time='17:15:00', is_recurring=True, recurrence_pattern='daily')
+        self.client.get(reverse('today-schedule'))
+        response = self.client.get(reverse('today-schedule'))
+        self.assertEqual(Job.objects.filter(name='schedules.generate').count(), 1)
+        self.assertEqual([task['title'] for task in response.data['daily_tasks']], ['Daily Standup'])
+        
+        Worker(poll_interval=0.01).run(burst=True)
+        response = self.client.get(reverse('today-schedule'))
+        self.assertEqual([task['title'] for task in response.data['daily_tasks']], ['Daily Standup', 'Daily Review'])
+    
+    def test_streak_updated_in_background(self):
+        """Test completing a daily task queues the streak update"""
+        ProgressStreak.objects.create(user=self.user)
+        ProgressStreak.objects.update(last_updated=timezone.localdate() - timedelta(days=1))
+        schedule = DailySchedule.objects.create(user=self.user)
+        daily_task = DailyTask.objects.create(
+            schedule=schedule,
+            title='Standup',
+            category=self.category,
+            start_time='09:00:00',
+            end_time='09:15:00'
+        )
+        response = self.client.patch(reverse('daily-task-update', args=[daily_task.pk]), {'is_completed': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Job.objects.get(name='schedules.update_streak').kwargs['day'], schedule.date.isoformat())
+        
+        Worker(poll_interval=0.01).run(burst=True)
+        self.assertEqual(ProgressStreak.objects.get(user=self.user).current_streak, 1)
+    
+    def test_due_reminders_sent(self):
+        """Test due reminders are sent, by email where asked, and future ones left"""
+        schedule = DailySchedule.objects.create(user=self.user)
+        daily_task = DailyTask.objects.create(
+            schedule=schedule,
+            title='Standup',
+            category=self.category,
+            start_time='09:00:00',
+            end_time='09:15:00'
+        )
+        now = timezone.now()
+        email = Reminder.objects.create(user=self.user, task=daily_task, reminder_type='email',
+                                        reminder_time=now - timedelta(minutes=1))
+        notification = Reminder.objects.create(user=self.user, task=daily_task,
+                                               reminder_time=now - timedelta(minutes=2))
+        later = Reminder.objects.create(user=self.user, task=daily_task, reminder_time=now + timedelta(hours=1))
+        
+        queue.enqueue('schedules.send_due_reminders')
+        Worker(poll_interval=0.01).run(burst=True)
+        
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@example.com'])
+        self.assertTrue(Reminder.objects.get(pk=email.pk).is_sent)
+        self.assertTrue(Reminder.objects.get(pk=notification.pk).is_sent)
+        self.assertFalse(Reminder.objects.get(pk=later.pk).is_sent)
+    
+    def test_run_jobs_command(self):
+        """Test the worker command drains the queue in burst mode"""
+        queue.enqueue('schedules.send_due_reminders')
+        out = StringIO()
+        call_command('run_jobs', burst=True, stdout=out)
+        self.assertIn('after 1 jobs', out.getvalue())
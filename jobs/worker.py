@@ -0,0 +1,107 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import DatabaseError, close_old_connections
+
+from monitoring import metrics
+from . import queue
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between lease checks, pruning and periodic job scheduling
+HOUSEKEEPING_INTERVAL = 30
+
+
+class Worker:
+    """
+    Claims due jobs and runs them on a thread pool.
+
+    Jobs are claimed only as threads free up, so one slow job never holds
+    back others claimed in the same batch.
+    """
+
+    def __init__(self, threads=4, name=None, poll_interval=None):
+        config = queue.job_settings()
+        self.threads = threads
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = config['POLL_INTERVAL'] if poll_interval is None else poll_interval
+        self.periodic = config['PERIODIC']
+        self.stop_event = threading.Event()
+        self.housekept_at = 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self, burst=False):
+        """Process jobs until stopped; with ``burst``, until the queue is empty"""
+        processed = 0
+        with ThreadPoolExecutor(self.threads, thread_name_prefix='job') as pool:
+            running = set()
+            while not self.stop_event.is_set():
+                if time.monotonic() - self.housekept_at >= HOUSEKEEPING_INTERVAL:
+                    try:
+                        self.housekeeping()
+                    except DatabaseError:
+                        logger.exception('Housekeeping failed; retrying in %ss', HOUSEKEEPING_INTERVAL)
+                        close_old_connections()
+
+                # A transient error (e.g. SQLite's "database is locked") must
+                # not stop the worker and strand the jobs it is running
+                free = self.threads - len(running)
+                try:
+                    jobs = queue.claim(self.name, free) if free else []
+                except DatabaseError:
+                    logger.exception('Claiming jobs failed; retrying')
+                    close_old_connections()
+                    jobs = None
+                running.update(pool.submit(self.execute, job) for job in jobs or ())
+
+                if running:
+                    done, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    processed += len(done)
+                elif burst and jobs is not None:
+                    break
+                else:
+                    self.stop_event.wait(self.poll_interval)
+            wait(running)
+            processed += len(running)
+        close_old_connections()
+        return processed
+
+    def execute(self, job):
+        try:
+            with metrics.job_duration.time(job=job.name):
+                queue.registry[job.name](**job.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning('Job %s #%s failed (attempt %s of %s)\n%s',
+                           job.name, job.pk, job.attempts, job.max_attempts, error)
+            queue.fail(job, error)
+            metrics.jobs_processed.inc(job=job.name, outcome='error')
+        else:
+            queue.complete(job)
+            metrics.jobs_processed.inc(job=job.name, outcome='done')
+        finally:
+            close_old_connections()
+
+    def housekeeping(self):
+        self.housekept_at = time.monotonic()
+        requeued = queue.requeue_expired()
+        if requeued:
+            logger.warning('Requeued %s jobs whose worker stopped responding', requeued)
+        queue.prune_finished()
+
+        # Each periodic job is queued for the start of its next slot, keyed by
+        # the slot, so any number of workers can schedule it without duplicates
+        now = time.time()
+        for name, interval in self.periodic.items():
+            slot = int(now // interval) + 1
+            queue.enqueue(name, dedup_key=f'periodic:{name}:{slot}',
+                          run_at=datetime.fromtimestamp(slot * interval, tz=dt_timezone.utc))
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from .conf import get_settings
+        from .metrics import registry
+
+        config = get_settings('METRICS')
+        registry.configure(config['DIRECTORY'], config['FLUSH_INTERVAL'])
@@ -0,0 +1,29 @@
+from django.conf import settings
+
+
+DEFAULTS = {
+    'METRICS': {
+        'DIRECTORY': None,
+        'FLUSH_INTERVAL': 5,
+        'ALLOWED_NETWORKS': [],
+        'TOKEN': None,
+    },
+    'PROFILING': {
+        'DIRECTORY': settings.BASE_DIR / 'profiles',
+        'KEEP': 500,
+        'HEADER': 'X-Profile',
+        'TOKEN_MAX_AGE': 3600,
+        'SAMPLING_INTERVAL_MS': 1,
+        'FLAG_REFRESH_SECONDS': 10,
+    },
+    'REQUEST_TIMING': {
+        'SAMPLE_RATE': 0.01,
+        'SLOW_QUERY_MS': 100,
+        'SERVER_TIMING_HEADER': False,
+    },
+}
+
+
+def get_settings(name):
+    """Merge a monitoring settings dict over its defaults"""
+    return {**DEFAULTS[name], **getattr(settings, name, {})}
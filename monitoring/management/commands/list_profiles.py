@@ -0,0 +1,57 @@
+import pstats
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.conf import get_settings
+from monitoring.profiling import ProfileStore
+
+
+class Command(BaseCommand):
+    help = 'Summarise stored request profiles, slowest first per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=3,
+                            help='Profiles listed per endpoint')
+        parser.add_argument('--route', help='Only list profiles of this URL name')
+        parser.add_argument('--show', metavar='ID',
+                            help='Print the most expensive functions of one profile')
+        parser.add_argument('--limit', type=int, default=25,
+                            help='Functions printed with --show')
+        parser.add_argument('--sort', default='cumulative',
+                            help='pstats sort key used with --show')
+
+    def handle(self, *args, **options):
+        config = get_settings('PROFILING')
+        store = ProfileStore(config['DIRECTORY'], config['KEEP'])
+        if options['show']:
+            self.show(store, options)
+            return
+
+        by_route = defaultdict(list)
+        for meta in store.all():
+            route = meta['route'] or meta['path']
+            if options['route'] in (None, route):
+                by_route[route].append(meta)
+        if not by_route:
+            self.stdout.write('No profiles stored')
+            return
+
+        # Endpoints ordered by their slowest profile
+        routes = sorted(by_route.items(), key=lambda item: -max(m['duration_ms'] for m in item[1]))
+        for route, metas in routes:
+            metas.sort(key=lambda m: -m['duration_ms'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{route} ({len(metas)} profiles)'))
+            for meta in metas[:options['top']]:
+                self.stdout.write(
+                    f"  {meta['duration_ms']:>10.1f}ms  {meta['status']}  {meta['method']:<6} {meta['path']}  "
+                    f"{meta['mode']}  {meta['started_at']}  {meta['id']}"
+                )
+
+    def show(self, store, options):
+        try:
+            stats = pstats.Stats(store.path(options['show'], 'prof'), stream=self.stdout)
+        except FileNotFoundError:
+            raise CommandError(f"No profile with id {options['show']}")
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(f"Collapsed stacks: {store.path(options['show'], 'collapsed')}")
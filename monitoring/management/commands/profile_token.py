@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from monitoring.conf import get_settings
+from monitoring.profiling import MODES, make_token
+
+
+class Command(BaseCommand):
+    help = 'Print a signed header value that turns on profiling for a request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=MODES, default='cprofile',
+                            help='cprofile traces every call; sampling has lower overhead')
+
+    def handle(self, *args, **options):
+        config = get_settings('PROFILING')
+        self.stdout.write(f"{config['HEADER']}: {make_token(options['mode'])}")
+        self.stderr.write(f"Valid for {config['TOKEN_MAX_AGE']} seconds")
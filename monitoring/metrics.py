@@ -0,0 +1,296 @@
+import atexit
+import bisect
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+class Registry:
+    """
+    Process-local metric values, optionally shared through a directory.
+
+    Updates only touch an in-memory dict under one lock. When a directory is
+    configured each process periodically (and at exit) writes a snapshot of
+    its values to its own file, and exposition sums the snapshots of every
+    process, so any worker can serve metrics for the whole deployment. Clear
+    the directory when the application is deployed.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.directory = None
+        self.flush_interval = 5
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        # Also called in a forked child so it does not report its parent's values
+        self.pid = os.getpid()
+        self.filename = f'{self.pid}-{uuid.uuid4().hex[:8]}.json'
+        self.values = {}
+        self.flushed_at = time.monotonic()
+
+    def configure(self, directory=None, flush_interval=5):
+        self.directory = str(directory) if directory else None
+        self.flush_interval = flush_interval
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def update(self, key, func):
+        """Apply func to the current value stored under key"""
+        with self.lock:
+            if os.getpid() != self.pid:
+                self._reset()
+            self.values[key] = func(self.values.get(key))
+            due = self.directory and time.monotonic() - self.flushed_at >= self.flush_interval
+            if due:
+                self.flushed_at = time.monotonic()
+        if due:
+            self.flush()
+
+    def _snapshot(self):
+        with self.lock:
+            return [[name, list(labels), value] for (name, labels), value in self.values.items()]
+
+    def flush(self):
+        if not self.directory or os.getpid() != self.pid:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.filename)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self._snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def collect(self):
+        """Values of every process, merged: {(name, labels): value}"""
+        merged = {}
+        snapshots = [self._snapshot()]
+        if self.directory and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json') and entry.name != self.filename:
+                    try:
+                        with open(entry.path) as f:
+                            snapshots.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue
+
+        for snapshot in snapshots:
+            for name, labels, value in snapshot:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                key = (name, tuple(labels))
+                merged[key] = metric.merge(merged.get(key), value)
+        return merged
+
+    def exposition(self):
+        """All metrics in the Prometheus text format"""
+        values = self.collect()
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.samples(values))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def _key(self, labels):
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return (self.name, tuple(str(labels[name]) for name in self.labelnames))
+
+    def _series(self, values):
+        for (name, labels), value in sorted(values.items()):
+            if name == self.name:
+                yield list(zip(self.labelnames, labels)), value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        self.registry.update(self._key(labels), lambda value: (value or 0) + amount)
+
+    def merge(self, total, value):
+        return (total or 0) + value
+
+    def samples(self, values):
+        for pairs, value in self._series(values):
+            yield f'{self.name}{_labels(pairs)} {_number(value)}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=registry):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # Stored as [count per bucket..., count above the last bucket, sum]
+        index = bisect.bisect_left(self.buckets, value)
+
+        def add(state):
+            state = state or [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+            return state
+        self.registry.update(self._key(labels), add)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def samples(self, values):
+        for pairs, state in self._series(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                yield f'{self.name}_bucket{_labels(pairs + [("le", _number(bound))])} {cumulative}'
+            yield f'{self.name}_sum{_labels(pairs)} {_number(state[-1])}'
+            yield f'{self.name}_count{_labels(pairs)} {cumulative}'
+
+
+class CallbackGauge(Metric):
+    """
+    Gauge computed when metrics are scraped.
+
+    ``callback`` returns a number, or ``(labels dict, number)`` pairs when
+    the gauge has labels. It only runs in the scraping process.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=(), registry=registry):
+        super().__init__(name, documentation, labelnames, registry)
+        self.callback = callback
+
+    def merge(self, total, value):
+        return value
+
+    def samples(self, values):
+        result = self.callback()
+        if not self.labelnames:
+            result = [({}, result)]
+        for labels, value in result:
+            yield f'{self.name}{_labels([(name, labels[name]) for name in self.labelnames])} {_number(value)}'
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+http_requests = Counter(
+    'http_requests_total', 'HTTP responses by view, method and status', ['route', 'method', 'status'],
+)
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by view', ['route', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+database_lock_errors = Counter(
+    'database_lock_errors_total', 'Requests failed waiting for a database lock, by view', ['route'],
+)
+schedule_generation_duration = Histogram(
+    'schedule_generation_duration_seconds', 'Time to generate the daily tasks of one schedule',
+)
+schedule_generation_rows = Counter(
+    'schedule_generation_rows_total', 'Daily tasks created by schedule generation',
+)
+job_duration = Histogram(
+    'job_duration_seconds', 'Duration of background jobs and management commands', ['job'],
+    buckets=LATENCY_BUCKETS + (300, 900, 3600),
+)
+jobs_processed = Counter(
+    'jobs_processed_total', 'Background jobs run by outcome (done or error)', ['job', 'outcome'],
+)
+streak_updates = Counter(
+    'streak_updates_total', 'Progress streak updates by outcome', ['outcome'],
+)
+reminder_send_lag = Histogram(
+    'reminder_send_lag_seconds', 'Delay between a reminder falling due and being sent',
+    buckets=LAG_BUCKETS,
+)
+cache_requests = Counter(
+    'cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ['cache', 'result'],
+)
+
+
+def _overdue_reminders():
+    """Number of unsent due reminders and the age of the oldest, in seconds"""
+    from django.db.models import Count, Min
+    from django.utils import timezone
+    from schedules.models import Reminder
+
+    now = timezone.now()
+    overdue = Reminder.objects.filter(is_sent=False, reminder_time__lte=now).aggregate(
+        count=Count('pk'), oldest=Min('reminder_time'),
+    )
+    lag = (now - overdue['oldest']).total_seconds() if overdue['oldest'] else 0
+    return overdue['count'], lag
+
+
+CallbackGauge(
+    'reminders_overdue', 'Unsent reminders that are already due',
+    lambda: _overdue_reminders()[0],
+)
+CallbackGauge(
+    'reminders_overdue_max_lag_seconds', 'How long the oldest unsent due reminder has been waiting',
+    lambda: _overdue_reminders()[1],
+)
+
+
+def _queued_jobs():
+    from django.db.models import Count
+    from jobs.models import Job
+
+    return [({'job': name}, count) for name, count in
+            Job.objects.filter(status='queued').values_list('name').annotate(count=Count('pk')).order_by()]
+
+
+CallbackGauge(
+    'jobs_queued', 'Background jobs waiting to run, by job',
+    _queued_jobs, labelnames=['job'],
+)
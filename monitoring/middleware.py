@@ -0,0 +1,228 @@
+import json
+import logging
+import math
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.db import OperationalError, connections
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import metrics
+from .conf import get_settings
+from .models import ProfiledUser
+from .profiling import ProfileStore, profile_call, read_token
+from .timing import RequestTimings, current_timings, query_timer
+
+
+logger = logging.getLogger('monitoring.requests')
+
+KNOWN_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+# SQLSTATEs of PostgreSQL's lock_not_available and deadlock_detected
+LOCK_SQLSTATES = {'55P03', '40P01'}
+
+
+def is_lock_error(exception):
+    """Whether a database error came from waiting on a lock: SQLite's busy timeout, a PostgreSQL lock timeout or deadlock"""
+    if not isinstance(exception, OperationalError):
+        return False
+    cause = exception.__cause__
+    sqlstate = getattr(cause, 'sqlstate', None) or getattr(cause, 'pgcode', None)
+    return sqlstate in LOCK_SQLSTATES or 'is locked' in str(exception)
+
+
+def _route(request):
+    match = request.resolver_match
+    return match.view_name if match else '<unresolved>'
+
+
+class RequestMetricsMiddleware:
+    """
+    Request count and latency metrics per view, method and status, and
+    requests that failed on database locks per view.
+
+    Install it first in MIDDLEWARE so the latency includes the other
+    middleware. Unresolved paths are reported under one route so that
+    scanners cannot blow up the number of series.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        route = _route(request)
+        method = request.method if request.method in KNOWN_METHODS else 'other'
+        metrics.http_requests.inc(route=route, method=method, status=response.status_code)
+        metrics.http_request_duration.observe(duration, route=route, method=method)
+        return response
+
+    def process_exception(self, request, exception):
+        if is_lock_error(exception):
+            metrics.database_lock_errors.inc(route=_route(request))
+
+
+class RequestTimingMiddleware:
+    """
+    Per-request query count, SQL, rendering and view timings.
+
+    Sampled requests log one JSON line on the ``monitoring.requests``
+    logger; unsampled requests pay for a single random draw. The timings
+    tell clients about the queries run, so the ``Server-Timing`` header is
+    only sent with ``SERVER_TIMING_HEADER`` on, and then only to staff.
+    Install it last in MIDDLEWARE so that ``process_view`` runs immediately
+    before the view and ``process_template_response`` before rendering.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = get_settings('REQUEST_TIMING')
+        self.sample_rate = config['SAMPLE_RATE']
+        self.slow_query_ms = config['SLOW_QUERY_MS']
+        self.header = config['SERVER_TIMING_HEADER']
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timings = RequestTimings(self.slow_query_ms)
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_timer))
+                response = self.get_response(request)
+            if timings.view_started is not None:
+                timings.view_ms = (time.perf_counter() - timings.view_started) * 1000
+        finally:
+            current_timings.reset(token)
+
+        user = getattr(request, 'user', None)
+        if self.header and user is not None and user.is_staff:
+            response['Server-Timing'] = (
+                f'db;dur={timings.sql_ms:.1f};desc="{timings.queries} queries", '
+                f'render;dur={timings.render_ms:.1f}, '
+                f'view;dur={timings.view_ms:.1f}'
+            )
+
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }
+        logger.info(json.dumps(record), extra={'timings': record})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered (serialized to JSON, MessagePack, ...) after this
+        timings = current_timings.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: self._rendered(timings))
+        return response
+
+    def _rendered(self, timings):
+        timings.render_ms = (time.perf_counter() - timings.render_started) * 1000
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in call-level profiling of individual requests.
+
+    A request is profiled when it carries a header (``X-Profile`` by
+    default) signed with ``monitoring.profiling.make_token``, or when it
+    comes from a staff user with an unexpired ProfiledUser flag. The
+    profile is stored by request id and the id returned in ``X-Profile-Id``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = get_settings('PROFILING')
+        self.header = 'HTTP_' + config['HEADER'].upper().replace('-', '_')
+        self.token_max_age = config['TOKEN_MAX_AGE']
+        self.interval = config['SAMPLING_INTERVAL_MS'] / 1000
+        self.flag_refresh = config['FLAG_REFRESH_SECONDS']
+        self.store = ProfileStore(config['DIRECTORY'], config['KEEP'])
+        self._flags = {}
+        self._flags_loaded_at = -math.inf
+
+    def flagged_users(self):
+        """Profiling mode by user id for flagged staff, refreshed periodically"""
+        now = time.monotonic()
+        if now - self._flags_loaded_at >= self.flag_refresh:
+            flags = ProfiledUser.objects.filter(expires_at__gt=timezone.now(), user__is_staff=True)
+            self._flags = {str(user_id): mode for user_id, mode in flags.values_list('user_id', 'mode')}
+            self._flags_loaded_at = now
+        return self._flags
+
+    def _user_id(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+
+        # API requests authenticate inside the view; read the JWT directly
+        auth = request.META.get('HTTP_AUTHORIZATION', '')
+        if auth.startswith('Bearer '):
+            try:
+                return AccessToken(auth[len('Bearer '):])[api_settings.USER_ID_CLAIM]
+            except (TokenError, KeyError):
+                return None
+        return None
+
+    def requested_mode(self, request):
+        value = request.META.get(self.header)
+        if value:
+            return read_token(value, self.token_max_age)
+
+        flags = self.flagged_users()
+        if flags:
+            user_id = self._user_id(request)
+            if user_id is not None:
+                return flags.get(str(user_id))
+        return None
+
+    def __call__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        request_id = request.META.get('HTTP_X_REQUEST_ID', '')
+        if not re.fullmatch(r'[A-Za-z0-9_-]{1,64}', request_id):
+            request_id = uuid.uuid4().hex
+
+        started_at = timezone.now()
+        start = time.perf_counter()
+        response, stats, collapsed = profile_call(lambda: self.get_response(request), mode, self.interval)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        match = request.resolver_match
+        self.store.save(request_id, stats, collapsed, {
+            'id': request_id,
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'mode': mode,
+            'duration_ms': round(duration_ms, 3),
+            'started_at': started_at.isoformat(),
+        })
+        response['X-Profile-Id'] = request_id
+        return response
@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils import timezone
+from accounts.models import User
+
+
+class ProfiledUser(models.Model):
+    """Staff account whose requests are profiled until ``expires_at``"""
+    MODE_CHOICES = [
+        ('cprofile', 'cProfile'),
+        ('sampling', 'Sampling'),
+    ]
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profiling',
+                                limit_choices_to={'is_staff': True})
+    expires_at = models.DateTimeField()
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='sampling')
+    
+    def __str__(self):
+        return f"Profiling {self.user.username} until {self.expires_at}"
+    
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
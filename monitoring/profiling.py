@@ -0,0 +1,195 @@
+import cProfile
+import json
+import marshal
+import os
+import sys
+import threading
+from collections import Counter
+
+from django.core import signing
+
+
+SIGNING_SALT = 'monitoring.profile'
+MODES = ('cprofile', 'sampling')
+
+
+def make_token(mode='cprofile'):
+    """Signed value for the profiling request header"""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(mode)
+
+
+def read_token(value, max_age):
+    """Profiling mode requested by a header value, or None if it is not validly signed"""
+    try:
+        mode = signing.TimestampSigner(salt=SIGNING_SALT).unsign(value, max_age=max_age)
+    except signing.BadSignature:
+        return None
+    return mode if mode in MODES else None
+
+
+def _label(code):
+    return f'{code.co_filename}:{code.co_name}'
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's stack from a background thread.
+
+    Samples are kept as collapsed stacks (root first); a pstats-compatible
+    table is synthesized from them so both output formats are available.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+
+    def _run(self, thread_id):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, args=(threading.get_ident(),), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return {';'.join(_label(code) for code in stack): count for stack, count in self.samples.items()}
+
+    def pstats(self):
+        """Stats in the marshal format read by pstats.Stats"""
+        stats = {}
+
+        def key(code):
+            return (code.co_filename, code.co_firstlineno, code.co_name)
+
+        for stack, count in self.samples.items():
+            seconds = count * self.interval
+            seen = set()
+            for depth, code in enumerate(stack):
+                func = key(code)
+                cc, nc, tt, ct, callers = stats.get(func, (0, 0, 0.0, 0.0, {}))
+                if depth == len(stack) - 1:
+                    tt += seconds
+                if func not in seen:
+                    ct += seconds
+                    seen.add(func)
+                if depth:
+                    caller = key(stack[depth - 1])
+                    edge = callers.get(caller, (0, 0, 0.0, 0.0))
+                    leaf_seconds = seconds if depth == len(stack) - 1 else 0.0
+                    callers[caller] = (edge[0] + count, edge[1] + count, edge[2] + leaf_seconds, edge[3] + seconds)
+                # Call counts are unknown when sampling; report sample counts
+                stats[func] = (cc + count, nc + count, tt, ct, callers)
+        return stats
+
+
+def collapsed_from_pstats(stats, min_seconds=0.0001):
+    """
+    Approximate collapsed stacks from a cProfile call graph.
+
+    cProfile only records caller/callee pairs, so each call edge's
+    cumulative time is split across the paths reaching its caller in
+    proportion to that caller's time on each path.
+    """
+    callees = {}
+    roots = []
+    for func, (_, _, _, ct, callers) in stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    def label(func):
+        filename, _, name = func
+        return f'{filename}:{name}'
+
+    collapsed = Counter()
+
+    def walk(func, seconds, path, depth):
+        total = stats[func][3] or seconds
+        child_seconds = 0.0
+        for child, edge_ct in callees.get(func, []):
+            if child in path or depth > 100:
+                continue
+            share = seconds * edge_ct / total
+            if share >= min_seconds:
+                child_seconds += share
+                walk(child, share, path + (child,), depth + 1)
+        own = seconds - child_seconds
+        if own >= min_seconds:
+            collapsed[';'.join(label(f) for f in path)] += own
+
+    for root in roots:
+        walk(root, stats[root][3], (root,), 0)
+    # Collapsed stack counts are integers; use microseconds
+    return {stack: int(seconds * 1_000_000) for stack, seconds in collapsed.items() if seconds * 1_000_000 >= 1}
+
+
+class ProfileStore:
+    """Profiles on disk: <id>.prof (pstats), <id>.collapsed and <id>.json metadata"""
+
+    def __init__(self, directory, keep=500):
+        self.directory = str(directory)
+        self.keep = keep
+
+    def path(self, request_id, suffix):
+        return os.path.join(self.directory, f'{request_id}.{suffix}')
+
+    def save(self, request_id, stats, collapsed, meta):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(request_id, 'prof'), 'wb') as f:
+            marshal.dump(stats, f)
+        with open(self.path(request_id, 'collapsed'), 'w') as f:
+            for stack, count in sorted(collapsed.items()):
+                f.write(f'{stack} {count}\n')
+        with open(self.path(request_id, 'json'), 'w') as f:
+            json.dump(meta, f)
+        self.prune()
+
+    def prune(self):
+        metas = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in metas[:max(len(metas) - self.keep, 0)]:
+            request_id = entry.name[:-len('.json')]
+            for suffix in ('json', 'prof', 'collapsed'):
+                try:
+                    os.remove(self.path(request_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def all(self):
+        if not os.path.isdir(self.directory):
+            return []
+        metas = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                with open(entry.path) as f:
+                    metas.append(json.load(f))
+        return metas
+
+
+def profile_call(func, mode, interval=0.001):
+    """Run func under the requested profiler; returns (result, pstats dict, collapsed dict)"""
+    if mode == 'sampling':
+        with SamplingProfiler(interval) as profiler:
+            result = func()
+        return result, profiler.pstats(), profiler.collapsed()
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func)
+    profiler.create_stats()
+    return result, profiler.stats, collapsed_from_pstats(profiler.stats)
+
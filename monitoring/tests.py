@@ -0,0 +1,301 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import Category, Task
+from schedules.models import DailySchedule, DailyTask, Reminder
+from .metrics import Counter, Histogram, Registry
+from .middleware import is_lock_error
+from .models import ProfiledUser
+from .profiling import ProfileStore, make_token
+
+User = get_user_model()
+
+
+@override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0, 'SERVER_TIMING_HEADER': True})
+class RequestTimingMiddlewareTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        category = Category.objects.create(name='work', color='#F9A602')
+        self.task = Task.objects.create(
+            user=self.user,
+            category=category,
+            title='Test Task',
+            start_time='09:00:00',
+            end_time='10:00:00'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def test_server_timing_header(self):
+        """Test sampled requests report db, serializer and view timings"""
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn('render;dur=', header)
+        self.assertIn('view;dur=', header)
+        self.assertNotIn('desc="0 queries"', header)
+    
+    def test_server_timing_header_only_for_staff(self):
+        """Test the header is not sent to other users, nor to anyone unless turned on"""
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.get(reverse('task-list'))
+        self.assertNotIn('Server-Timing', response)
+        
+        self.user.is_staff = True
+        self.user.save()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0}):
+            response = client.get(reverse('task-list'))
+        self.assertNotIn('Server-Timing', response)
+    
+    def test_structured_log_line(self):
+        """Test one JSON log line is emitted per sampled request"""
+        with self.assertLogs('monitoring.requests', level='INFO') as logs:
+            self.client.get(reverse('task-list'))
+        
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['route'], 'task-list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreater(record['render_ms'], 0)
+        self.assertGreaterEqual(record['view_ms'], record['render_ms'])
+    
+    @override_settings(REQUEST_TIMING={'SAMPLE_RATE': 0})
+    def test_unsampled_request(self):
+        """Test requests outside the sample are not instrumented"""
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', response)
+    
+    @override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1.0, 'SLOW_QUERY_MS': 0})
+    def test_slow_query_logged_with_origin(self):
+        """Test slow queries are logged with the project frame that issued them"""
+        with self.assertLogs('monitoring.sql', level='WARNING') as logs:
+            # A serializer-backed view (task-list builds its rows from values())
+            self.client.get(reverse('task-detail', args=[self.task.pk]))
+        
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn('SELECT', messages[0])
+        # Origins point past the ORM, e.g. at the serializer doing N+1 lookups
+        self.assertTrue(all('django/db' not in message.split(':', 1)[0] for message in messages))
+        self.assertTrue(any('rest_framework/' in message for message in messages))
+
+
+class RequestProfilingMiddlewareTest(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = ProfileStore(directory.name)
+        profiling = override_settings(PROFILING={'DIRECTORY': directory.name})
+        profiling.enable()
+        self.addCleanup(profiling.disable)
+
+        self.user = User.objects.create_user(
+            username='staffuser',
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    
+    def test_unprofiled_request(self):
+        """Test requests without a header or flag are not profiled"""
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self.store.all(), [])
+    
+    def test_signed_header(self):
+        """Test a signed header profiles the request and stores all outputs"""
+        response = self.client.get(reverse('task-list'), HTTP_X_PROFILE=make_token('cprofile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        profile_id = response['X-Profile-Id']
+        meta, = self.store.all()
+        self.assertEqual(meta['id'], profile_id)
+        self.assertEqual(meta['route'], 'task-list')
+        self.assertEqual(meta['mode'], 'cprofile')
+        self.assertTrue(os.path.exists(self.store.path(profile_id, 'prof')))
+        with open(self.store.path(profile_id, 'collapsed')) as f:
+            self.assertIn('get_response', f.read())
+    
+    def test_bad_signature_ignored(self):
+        """Test an unsigned or tampered header does not turn profiling on"""
+        response = self.client.get(reverse('task-list'), HTTP_X_PROFILE='cprofile')
+        self.assertNotIn('X-Profile-Id', response)
+        
+        response = self.client.get(reverse('task-list'), HTTP_X_PROFILE=make_token('cprofile') + 'x')
+        self.assertNotIn('X-Profile-Id', response)
+    
+    def test_flagged_staff_user(self):
+        """Test requests of a flagged staff user are profiled until the flag expires"""
+        flag = ProfiledUser.objects.create(
+            user=self.user,
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        response = self.client.get(reverse('task-list'))
+        self.assertIn('X-Profile-Id', response)
+        self.assertEqual(self.store.all()[0]['mode'], 'sampling')
+        
+        flag.expires_at = timezone.now() - timedelta(minutes=1)
+        flag.save()
+        with override_settings(PROFILING={'DIRECTORY': self.store.directory, 'FLAG_REFRESH_SECONDS': 0}):
+            self.client.handler.load_middleware()
+            response = self.client.get(reverse('task-list'))
+        self.assertNotIn('X-Profile-Id', response)
+    
+    def test_list_profiles_command(self):
+        """Test stored profiles are summarised per endpoint and can be shown"""
+        response = self.client.get(reverse('task-list'), HTTP_X_PROFILE=make_token('cprofile'))
+        self.client.get(reverse('category-list'), HTTP_X_PROFILE=make_token('cprofile'))
+        
+        out = StringIO()
+        call_command('list_profiles', stdout=out)
+        self.assertIn('task-list (1 profiles)', out.getvalue())
+        self.assertIn('category-list (1 profiles)', out.getvalue())
+        
+        out = StringIO()
+        call_command('list_profiles', show=response['X-Profile-Id'], stdout=out)
+        self.assertIn('cumulative', out.getvalue())
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+    
+    def make_registry(self):
+        registry = Registry()
+        registry.configure(self.directory, flush_interval=0)
+        requests = Counter('requests_total', 'Requests', ['status'], registry=registry)
+        latency = Histogram('latency_seconds', 'Latency', buckets=(0.1, 1), registry=registry)
+        return registry, requests, latency
+    
+    def test_text_format(self):
+        """Test counters and cumulative histogram buckets are exposed"""
+        registry, requests, latency = self.make_registry()
+        requests.inc(status=200)
+        requests.inc(2, status=200)
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+        
+        text = registry.exposition()
+        self.assertIn('# TYPE requests_total counter', text)
+        self.assertIn('requests_total{status="200"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count 3', text)
+        self.assertIn('latency_seconds_sum 5.55', text)
+    
+    def test_label_names_checked(self):
+        """Test incrementing with the wrong labels is an error"""
+        registry, requests, latency = self.make_registry()
+        with self.assertRaises(ValueError):
+            requests.inc(code=200)
+    
+    def test_processes_merged_through_directory(self):
+        """Test values flushed by other processes are summed into the exposition"""
+        first, first_requests, first_latency = self.make_registry()
+        second, second_requests, second_latency = self.make_registry()
+        first_requests.inc(status=200)
+        second_requests.inc(status=200)
+        second_requests.inc(status=500)
+        first_latency.observe(0.5)
+        second_latency.observe(0.5)
+        
+        text = first.exposition()
+        self.assertIn('requests_total{status="200"} 2', text)
+        self.assertIn('requests_total{status="500"} 1', text)
+        self.assertIn('latency_seconds_count 2', text)
+
+
+@override_settings(METRICS={'TOKEN': 'scrape-secret'})
+class MetricsEndpointTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def scrape(self, **extra):
+        return self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret', **extra)
+    
+    def test_request_and_reminder_metrics(self):
+        """Test view latency and status and the reminder backlog are exposed"""
+        category = Category.objects.create(name='work', color='#F9A602')
+        schedule = DailySchedule.objects.create(user=self.user)
+        task = DailyTask.objects.create(
+            schedule=schedule,
+            title='Standup',
+            category=category,
+            start_time='09:00:00',
+            end_time='09:15:00'
+        )
+        Reminder.objects.create(user=self.user, task=task, reminder_time=timezone.now() - timedelta(minutes=5))
+        self.client.get(reverse('task-list'))
+        
+        response = self.scrape()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        self.assertIn('http_requests_total{route="task-list",method="GET",status="200"}', text)
+        self.assertIn('http_request_duration_seconds_count{route="task-list",method="GET"}', text)
+        self.assertIn('reminders_overdue 1', text)
+    
+    def test_lock_errors_counted(self):
+        """Test requests failing on a database lock are counted per view"""
+        self.client.raise_request_exception = False
+        with mock.patch('tasks.views.TaskListCreateView.list', side_effect=OperationalError('database is locked')):
+            response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        text = self.scrape().content.decode()
+        self.assertIn('database_lock_errors_total{route="task-list"}', text)
+        self.assertFalse(is_lock_error(OperationalError('no such table: tasks_task')))
+    
+    def test_token_required(self):
+        """Test scrapes without the token get a 404, even from loopback behind a local proxy"""
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for authorization in ('Bearer wrong', 'Bearer scrape-secrét'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION=authorization)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        
+        response = self.scrape(REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_allowed_networks(self):
+        """Test opted-in networks can scrape without the token"""
+        with override_settings(METRICS={'ALLOWED_NETWORKS': ['10.0.0.0/8']}):
+            response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.2.3')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,93 @@
+import logging
+import os
+import time
+import traceback
+from contextvars import ContextVar
+
+import django.db
+from django.conf import settings
+
+
+sql_logger = logging.getLogger('monitoring.sql')
+
+# Timings of the request being instrumented in this context, if any
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.view_started = None
+        self.render_started = None
+        self.view_ms = 0.0
+
+    def record_query(self, sql, duration_ms):
+        self.queries += 1
+        self.sql_ms += duration_ms
+        if duration_ms >= self.slow_query_ms:
+            sql_logger.warning(
+                'Slow query (%.1fms) from %s: %s', duration_ms, query_origin(), sql[:500],
+                extra={'duration_ms': round(duration_ms, 3), 'sql': sql},
+            )
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_ms, 3),
+            'render_ms': round(self.render_ms, 3),
+            'view_ms': round(self.view_ms, 3),
+        }
+
+
+DJANGO_DB_DIR = os.path.dirname(django.db.__file__)
+MONITORING_DIR = os.path.dirname(__file__)
+
+
+def _short(frame):
+    filename = frame.filename
+    for prefix in ('site-packages' + os.sep, str(settings.BASE_DIR) + os.sep):
+        if prefix in filename:
+            filename = filename.split(prefix, 1)[1]
+    return f'{filename}:{frame.lineno} in {frame.name}'
+
+
+def query_origin():
+    """
+    Where a query came from: the innermost frame outside the ORM, followed
+    by the innermost frame of this project's apps when that is different
+    (e.g. a DRF mixin evaluating a queryset built in a view).
+    """
+    base_dir = str(settings.BASE_DIR) + os.sep
+    caller = project = None
+    for frame in reversed(traceback.extract_stack()):
+        filename = frame.filename
+        if filename.startswith((DJANGO_DB_DIR, MONITORING_DIR)):
+            continue
+        if caller is None:
+            caller = frame
+        if (filename.startswith(base_dir) and 'site-packages' not in filename
+                and os.sep in filename[len(base_dir):]):
+            project = frame
+            break
+
+    if caller is None:
+        return 'unknown'
+    if project is None or project is caller:
+        return _short(caller)
+    return f'{_short(caller)} (via {_short(project)})'
+
+
+def query_timer(execute, sql, params, many, context):
+    """Connection execute wrapper feeding the current request's timings"""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.record_query(sql, (time.perf_counter() - start) * 1000)
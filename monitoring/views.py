@@ -0,0 +1,28 @@
+import hmac
+import ipaddress
+
+from django.http import Http404, HttpResponse
+
+from .conf import get_settings
+from .metrics import registry
+
+
+def _allowed(request, config):
+    token = config['TOKEN']
+    # Constant time, and on bytes since headers may hold non-ASCII characters
+    authorization = request.META.get('HTTP_AUTHORIZATION', '').encode()
+    if token and hmac.compare_digest(authorization, f'Bearer {token}'.encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in config['ALLOWED_NETWORKS'])
+
+
+def metrics(request):
+    """Prometheus scrape endpoint; hidden from clients without the token or an allowed address"""
+    config = get_settings('METRICS')
+    if not _allowed(request, config):
+        raise Http404
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,3 +1,97 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
+
+from api.admin import LargeTableAdminMixin
+from api.signals import bulk_updated
+from .jobs import enqueue_generation
+from .models import AnalyticsReport, ArchivedSchedule, DailySchedule, DailyTask, ProgressStreak, Reminder
+
+
+# Date columns are filtered with list_filter's ranges (Today, Past 7 days,
+# This month...), which use their indexes, rather than date_hierarchy, whose
+# year links come from a SELECT DISTINCT over every row of the table
+
+@admin.register(DailySchedule)
+class DailyScheduleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'date', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+    actions = ['regenerate']
+
+    @admin.action(description='Regenerate the recurring tasks of the selected schedules')
+    def regenerate(self, request, queryset):
+        schedules = list(queryset.values_list('pk', 'user_id'))
+        for schedule_id, user_id in schedules:
+            enqueue_generation(schedule_id, user_id)
+        self.message_user(request, f'Generation queued for {len(schedules)} schedules')
+
+
+@admin.register(DailyTask)
+class DailyTaskAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'owner', 'schedule_date', 'category', 'start_time', 'end_time', 'priority',
+                    'is_completed')
+    list_select_related = ('schedule__user', 'category')
+    list_filter = ('is_completed', 'priority')
+    # Newest first by primary key: the model's start_time ordering has no index
+    ordering = ('-pk',)
+    raw_id_fields = ('schedule', 'original_task')
+    autocomplete_fields = ('category',)
+
+    @admin.display(description='user', ordering='schedule__user__username')
+    def owner(self, daily_task):
+        return daily_task.schedule.user
+
+    @admin.display(description='date', ordering='schedule__date')
+    def schedule_date(self, daily_task):
+        return daily_task.schedule.date
+
+
+@admin.register(Reminder)
+class ReminderAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('task', 'user', 'reminder_type', 'reminder_time', 'is_sent', 'sent_at')
+    list_select_related = ('user', 'task__schedule')
+    list_filter = ('is_sent', 'reminder_type', 'reminder_time')
+    # Backwards along the reminder_time index, ties broken by the primary key
+    ordering = ('-reminder_time',)
+    raw_id_fields = ('user', 'task')
+    actions = ['mark_sent']
+
+    @admin.action(description='Mark the selected reminders as sent')
+    def mark_sent(self, request, queryset):
+        unsent = queryset.filter(is_sent=False)
+        with transaction.atomic():
+            owners = defaultdict(list)
+            for user_id, pk in unsent.values_list('user_id', 'pk'):
+                owners[user_id].append(pk)
+            # One UPDATE, so the sync change log is written explicitly
+            updated = unsent.update(is_sent=True, sent_at=timezone.now())
+            for user_id, pks in owners.items():
+                bulk_updated.send(sender=Reminder, user_id=user_id, pks=pks)
+        self.message_user(request, f'{updated} reminders marked as sent')
+
+
+@admin.register(ArchivedSchedule)
+class ArchivedScheduleAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'date', 'total_tasks', 'completed_tasks', 'archived_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(ProgressStreak)
+class ProgressStreakAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'current_streak', 'longest_streak', 'last_updated')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
 
-# Register your models here.
+@admin.register(AnalyticsReport)
+class AnalyticsReportAdmin(admin.ModelAdmin):
+    list_display = ('created_at',)
+    readonly_fields = ('data', 'created_at')
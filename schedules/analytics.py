@@ -0,0 +1,198 @@
+import bisect
+import math
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import django
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from accounts.models import User
+from tasks.models import Category, duration_hours
+from .models import ArchivedSchedule, DailyTask, ProgressStreak
+
+
+# Completion rates are counted in steps of 1/RATE_STEPS (0.1 percentage points)
+RATE_STEPS = 1000
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+# Lower bounds of the streak histogram buckets, in days
+STREAK_BUCKETS = (0, 1, 2, 3, 7, 14, 30, 60, 90, 180, 365)
+# Users per shard, and grouped rows fetched per round trip within a shard
+SHARD_SIZE = 5000
+CHUNK_SIZE = 5000
+
+
+class Sketch:
+    """
+    Mergeable summary of the users in a shard.
+
+    Holds counts rather than values, so its size does not grow with the
+    number of users or tasks, and two sketches merge into the sketch of
+    both shards by adding them up.
+    """
+
+    def __init__(self):
+        self.users = 0
+        self.tasks = 0
+        self.rates = [0] * (RATE_STEPS + 1)
+        self.category_hours = Counter()
+        self.current_streaks = Counter()
+        self.longest_streaks = Counter()
+
+    def add_user(self, total, completed):
+        """Count one user's completion rate"""
+        self.users += 1
+        self.tasks += total
+        self.rates[round(completed / total * RATE_STEPS)] += 1
+
+    def merge(self, other):
+        self.users += other.users
+        self.tasks += other.tasks
+        self.rates = [a + b for a, b in zip(self.rates, other.rates)]
+        self.category_hours.update(other.category_hours)
+        self.current_streaks.update(other.current_streaks)
+        self.longest_streaks.update(other.longest_streaks)
+        return self
+
+    def percentile(self, q):
+        """Nearest-rank percentile of the users' completion rates, in percent"""
+        rank = max(1, math.ceil(q / 100 * self.users))
+        seen = 0
+        for step, count in enumerate(self.rates):
+            seen += count
+            if seen >= rank:
+                return round(step * 100 / RATE_STEPS, 1)
+        return None
+
+    def report(self, category_names):
+        """The sketch as a JSON-serialisable report; category_names maps category ids to names"""
+        mean = sum(step * count for step, count in enumerate(self.rates)) / self.users if self.users else None
+        hours = sum(self.category_hours.values())
+        return {
+            'users': self.users,
+            'daily_tasks': self.tasks,
+            'completion_rate': {
+                **{f'p{q}': self.percentile(q) if self.users else None for q in PERCENTILES},
+                'mean': round(mean * 100 / RATE_STEPS, 1) if mean is not None else None,
+            },
+            'category_share': [
+                {'category': category_names.get(category_id, str(category_id)), 'hours': round(total, 2),
+                 'share': round(total / hours, 4)}
+                for category_id, total in self.category_hours.most_common()
+            ] if hours else [],
+            'streaks': {
+                'current': _streak_histogram(self.current_streaks),
+                'longest': _streak_histogram(self.longest_streaks),
+            },
+        }
+
+
+def _streak_histogram(counts):
+    users = [0] * len(STREAK_BUCKETS)
+    for length, count in counts.items():
+        users[bisect.bisect_right(STREAK_BUCKETS, length) - 1] += count
+    uppers = [bound - 1 for bound in STREAK_BUCKETS[1:]] + [None]
+    return [{'from': lower, 'to': upper, 'users': count}
+            for lower, upper, count in zip(STREAK_BUCKETS, uppers, users)]
+
+
+def scan_shard(first_id, last_id, chunk_size=CHUNK_SIZE):
+    """
+    Sketch of the users with ids from first_id to last_id.
+
+    The database groups a user's daily tasks by category and times, which
+    folds each recurring task's copies into one row. Rows come sorted by
+    user through a chunked (server-side where supported) cursor, so only
+    one user's totals are held at a time, besides the shard's per-user
+    totals of archived schedules.
+    """
+    sketch = Sketch()
+    archived = {
+        user_id: (total, completed) for user_id, total, completed in
+        ArchivedSchedule.objects.filter(user_id__gte=first_id, user_id__lte=last_id)
+        .values_list('user_id').annotate(total=Sum('total_tasks'), completed=Sum('completed_tasks'))
+        .order_by().values_list('user_id', 'total', 'completed')
+    }
+
+    def add_user(user_id, total, completed):
+        archived_total, archived_completed = archived.pop(user_id, (0, 0))
+        if total + archived_total:
+            sketch.add_user(total + archived_total, completed + archived_completed)
+
+    groups = (DailyTask.objects.filter(schedule__user_id__gte=first_id, schedule__user_id__lte=last_id)
+              .values_list('schedule__user_id', 'category_id', 'start_time', 'end_time')
+              .annotate(total=Count('pk'), completed=Count('pk', filter=Q(is_completed=True)))
+              .order_by('schedule__user_id'))
+    user = None
+    total = completed = 0
+    for user_id, category_id, start_time, end_time, count, done in groups.iterator(chunk_size=chunk_size):
+        if user_id != user:
+            if user is not None:
+                add_user(user, total, completed)
+            user, total, completed = user_id, 0, 0
+        total += count
+        completed += done
+        sketch.category_hours[category_id] += duration_hours(start_time, end_time) * count
+    if user is not None:
+        add_user(user, total, completed)
+    # Users whose schedules are all archived
+    for user_id in list(archived):
+        add_user(user_id, 0, 0)
+
+    streaks = ProgressStreak.objects.filter(user_id__gte=first_id, user_id__lte=last_id)
+    for field, counts in (('current_streak', sketch.current_streaks), ('longest_streak', sketch.longest_streaks)):
+        counts.update(dict(streaks.values_list(field).annotate(users=Count('pk')).order_by()))
+    return sketch
+
+
+def shards(shard_size=SHARD_SIZE):
+    """(first id, last id) ranges covering every user id"""
+    bounds = User.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return []
+    return [(start, min(start + shard_size - 1, bounds['last']))
+            for start in range(bounds['first'], bounds['last'] + 1, shard_size)]
+
+
+def compute_analytics(processes=None, shard_size=SHARD_SIZE, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Platform-wide distributions over every user's schedules.
+
+    Reports completion rate percentiles across users, each category's
+    share of scheduled time and histograms of current and longest streaks.
+    Shards of user ids are scanned across ``processes`` worker processes
+    (all CPUs by default, in process with 1) and their sketches merged.
+    ``progress`` is called with the number of shards done and the total.
+    Archived schedules count towards completion rates through their daily
+    totals; category shares cover live schedules only, since archived
+    tasks are packed.
+    """
+    started = time.perf_counter()
+    ranges = shards(shard_size)
+    total = Sketch()
+    if processes == 1 or len(ranges) <= 1:
+        sketches = (scan_shard(first, last, chunk_size) for first, last in ranges)
+        executor = None
+    else:
+        # Spawned rather than forked: safe from the job worker's threads, and
+        # the workers open their own database connections. The initializer is
+        # django.setup itself since this module cannot be imported before it
+        executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=django.setup)
+        sketches = executor.map(scan_shard, *zip(*ranges), repeat(chunk_size))
+    try:
+        for done, sketch in enumerate(sketches, 1):
+            total.merge(sketch)
+            if progress:
+                progress(done, len(ranges))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    report = total.report(dict(Category.objects.filter(pk__in=total.category_hours).values_list('pk', 'name')))
+    report['computed_at'] = timezone.now().isoformat()
+    report['seconds'] = round(time.perf_counter() - started, 2)
+    return report
@@ -0,0 +1,141 @@
+import json
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, time as dt_time
+
+from django.db import router, transaction
+
+from api.routing import route_to_shard, routing_settings
+from tasks.models import Category
+from .heatmap import invalidate_users
+from .models import ArchivedSchedule, DailySchedule, DailyTask, Reminder
+
+
+# DailyTask columns kept in the archive, in packed order
+PACKED_FIELDS = ('id', 'original_task_id', 'title', 'category_id', 'start_time', 'end_time', 'priority',
+                 'is_completed', 'completed_at', 'created_at', 'updated_at')
+TIME_FIELDS = ('start_time', 'end_time')
+DATETIME_FIELDS = ('completed_at', 'created_at', 'updated_at')
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, (dt_time, datetime)) else value
+
+
+def pack_tasks(rows):
+    """Compress DailyTask rows (tuples in PACKED_FIELDS order) into an archive blob"""
+    packed = [[_encode(value) for value in row] for row in rows]
+    return zlib.compress(json.dumps(packed, separators=(',', ':')).encode())
+
+
+def _merge_tasks(archive, rows):
+    """Add DailyTask rows to an existing archive's blob and totals"""
+    packed = json.loads(zlib.decompress(archive.tasks)) + [[_encode(value) for value in row] for row in rows]
+    start_index, id_index = PACKED_FIELDS.index('start_time'), PACKED_FIELDS.index('id')
+    packed.sort(key=lambda row: (row[start_index], row[id_index]))
+    archive.tasks = pack_tasks(packed)
+    archive.total_tasks = len(packed)
+    archive.completed_tasks = sum(1 for row in packed if row[PACKED_FIELDS.index('is_completed')])
+
+
+def unpack_tasks(archive):
+    """Unsaved DailyTask instances of an archived schedule, with their categories attached"""
+    rows = [dict(zip(PACKED_FIELDS, row)) for row in json.loads(zlib.decompress(archive.tasks))]
+    categories = Category.objects.in_bulk({row['category_id'] for row in rows})
+
+    tasks = []
+    for values in rows:
+        for name in TIME_FIELDS:
+            values[name] = dt_time.fromisoformat(values[name])
+        for name in DATETIME_FIELDS:
+            if values[name] is not None:
+                values[name] = datetime.fromisoformat(values[name])
+        category = categories.get(values.pop('category_id'))
+        tasks.append(DailyTask(schedule_id=archive.id, category=category, **values))
+    return tasks
+
+
+def archive_schedules(before, chunk_size=500, pause=0, progress=None):
+    """
+    Move schedules dated before ``before`` into ArchivedSchedule.
+
+    Each chunk is archived and deleted in its own short transaction, with
+    its schedules locked against concurrent task inserts, so an interrupted
+    run loses nothing and the next run carries on from where it stopped.
+    Reminders of archived tasks are deleted with them. A schedule dated
+    like an existing archive (recreated on an archived day, say) has its
+    tasks merged into that archive. Each shard is archived in turn.
+    Returns the number of schedules and tasks archived.
+    """
+    archived_schedules = archived_tasks = 0
+    for alias in routing_settings()['SHARDS'] or [None]:
+        with route_to_shard(alias):
+            using = router.db_for_write(DailySchedule) or 'default'
+            for schedules, tasks in _archive_chunks(using, before, chunk_size):
+                archived_schedules += schedules
+                archived_tasks += tasks
+                if progress:
+                    progress(archived_schedules, archived_tasks)
+                if pause:
+                    time.sleep(pause)
+
+    return archived_schedules, archived_tasks
+
+
+def _archive_chunks(using, before, chunk_size):
+    """Archive the schedules of the database ``using``, yielding the schedules and tasks of each chunk"""
+    schedules = DailySchedule.objects.using(using).filter(date__lt=before).order_by('pk')
+    last_pk = 0
+
+    while True:
+        with transaction.atomic(using=using):
+            chunk = list(
+                schedules.filter(pk__gt=last_pk).select_for_update()
+                .values_list('pk', 'user_id', 'date', 'created_at', 'updated_at')[:chunk_size]
+            )
+            if not chunk:
+                return
+            last_pk = chunk[-1][0]
+            ids = [row[0] for row in chunk]
+
+            tasks = defaultdict(list)
+            rows = (DailyTask.objects.using(using).filter(schedule_id__in=ids)
+                    .order_by('schedule_id', 'start_time', 'pk')
+                    .values_list('schedule_id', *PACKED_FIELDS))
+            for row in rows:
+                tasks[row[0]].append(row[1:])
+
+            completed_index = PACKED_FIELDS.index('is_completed')
+            archives = ArchivedSchedule.objects.using(using).select_for_update().filter(
+                user_id__in={row[1] for row in chunk}, date__in={row[2] for row in chunk})
+            existing = {(archive.user_id, archive.date): archive for archive in archives}
+            new, merged = [], []
+            for pk, user_id, day, created_at, updated_at in chunk:
+                archive = existing.get((user_id, day))
+                if archive is not None:
+                    _merge_tasks(archive, tasks[pk])
+                    archive.updated_at = max(archive.updated_at, updated_at)
+                    merged.append(archive)
+                    continue
+                new.append(ArchivedSchedule(
+                    id=pk, user_id=user_id, date=day, created_at=created_at, updated_at=updated_at,
+                    total_tasks=len(tasks[pk]),
+                    completed_tasks=sum(1 for row in tasks[pk] if row[completed_index]),
+                    tasks=pack_tasks(tasks[pk]),
+                ))
+            # No ignore_conflicts: a conflict must roll the chunk back rather
+            # than drop an archive whose schedule is then deleted
+            ArchivedSchedule.objects.using(using).bulk_create(new)
+            ArchivedSchedule.objects.using(using).bulk_update(
+                merged, ['tasks', 'total_tasks', 'completed_tasks', 'updated_at'])
+
+            # Leaf tables first, as plain DELETEs: the cascade collector would
+            # load every task and reminder just to delete it
+            Reminder.objects.filter(task__schedule_id__in=ids)._raw_delete(using)
+            DailyTask.objects.filter(schedule_id__in=ids)._raw_delete(using)
+            DailySchedule.objects.filter(pk__in=ids)._raw_delete(using)
+
+        # Raw deletes send no signals; cleared once committed so no request caches the old rows again
+        invalidate_users({row[1] for row in chunk})
+        yield len(chunk), sum(len(rows) for rows in tasks.values())
@@ -0,0 +1,95 @@
+import base64
+import calendar
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+
+from api.signals import bulk_created, bulk_updated
+from .models import ArchivedSchedule, DailySchedule, DailyTask
+
+
+# Byte of a day without tasks; other days hold their completion percentage
+NO_TASKS = 255
+# Cached until the user's schedules change
+TIMEOUT = 24 * 60 * 60
+
+
+def _cache_key(user_id):
+    # One entry per user holding every year asked for, so one delete clears them
+    return f'heatmap:{user_id}'
+
+
+def compute_heatmap(user_id, year):
+    """
+    The user's completion percentage for each day of the year, one byte per day.
+
+    One grouped query counts the tasks of every schedule in the year, and
+    another reads the totals of the archived ones. Days without tasks are
+    NO_TASKS.
+    """
+    first = date(year, 1, 1)
+    totals = {}
+    counts = (DailyTask.objects.filter(schedule__user_id=user_id, schedule__date__year=year)
+              .values_list('schedule__date')
+              .annotate(total=Count('pk'), completed=Count('pk', filter=Q(is_completed=True)))
+              .order_by())
+    archived = (ArchivedSchedule.objects.filter(user_id=user_id, date__year=year, total_tasks__gt=0)
+                .values_list('date', 'total_tasks', 'completed_tasks'))
+    # A day can have both until a schedule recreated on an archived day is archived too
+    for day, total, completed in (*counts, *archived):
+        day_total, day_completed = totals.get(day, (0, 0))
+        totals[day] = (day_total + total, day_completed + completed)
+
+    days = bytearray([NO_TASKS]) * (366 if calendar.isleap(year) else 365)
+    for day, (total, completed) in totals.items():
+        days[(day - first).days] = round(completed / total * 100)
+    return bytes(days)
+
+
+def year_heatmap(user_id, year):
+    """The heatmap of compute_heatmap, from the cache when the user's schedules have not changed"""
+    key = _cache_key(user_id)
+    years = cache.get(key) or {}
+    if year not in years:
+        years[year] = compute_heatmap(user_id, year)
+        cache.set(key, years, TIMEOUT)
+    return years[year]
+
+
+def encode_heatmap(year, days):
+    return {
+        'year': year,
+        'start': date(year, 1, 1).isoformat(),
+        'no_tasks': NO_TASKS,
+        'days': base64.b64encode(days).decode('ascii'),
+    }
+
+
+def invalidate(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def invalidate_users(user_ids):
+    """Drop the heatmaps of several users, e.g. after their schedules were archived"""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_schedule(sender, instance, **kwargs):
+    invalidate(instance.user_id)
+
+
+def invalidate_daily_task(sender, instance, **kwargs):
+    invalidate(instance.schedule.user_id)
+
+
+def invalidate_bulk(sender, user_id, **kwargs):
+    invalidate(user_id)
+
+
+for model, handler in ((DailySchedule, invalidate_schedule), (DailyTask, invalidate_daily_task)):
+    post_save.connect(handler, sender=model, dispatch_uid=f'heatmap.save.{model.__name__}')
+    post_delete.connect(handler, sender=model, dispatch_uid=f'heatmap.delete.{model.__name__}')
+    bulk_created.connect(invalidate_bulk, sender=model, dispatch_uid=f'heatmap.bulk.{model.__name__}')
+    bulk_updated.connect(invalidate_bulk, sender=model, dispatch_uid=f'heatmap.bulk_update.{model.__name__}')
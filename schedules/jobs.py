@@ -0,0 +1,94 @@
+import logging
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from api.routing import route_to_shard, route_to_user, routing_settings
+from jobs.queue import enqueue, register
+from .analytics import compute_analytics
+from .models import AnalyticsReport, DailySchedule, ProgressStreak, Reminder
+
+
+logger = logging.getLogger(__name__)
+
+# Reminders sent per job run; a run that fills its batch queues another
+REMINDER_BATCH_SIZE = 100
+
+
+def enqueue_generation(schedule_id, user_id=None):
+    # Clients see the generated tasks arrive through sync / sync events.
+    # The owner's id finds the schedule's shard.
+    enqueue('schedules.generate', priority=10, dedup_key=f'generate:{schedule_id}', schedule_id=schedule_id,
+            user_id=user_id)
+
+
+@register('schedules.generate')
+def generate_schedule(schedule_id, user_id=None):
+    with route_to_user(user_id):
+        schedule = DailySchedule.objects.filter(pk=schedule_id).first()
+        # The schedule may have been deleted or archived since the job was queued
+        if schedule is not None:
+            schedule.generate_from_tasks()
+
+
+@register('schedules.update_streak')
+def update_streak(schedule_id, user_id=None, day=None):
+    # The day of the completion, so that a job run after midnight counts it for the right day
+    with route_to_user(user_id):
+        schedule = DailySchedule.objects.filter(pk=schedule_id).first()
+        if schedule is not None:
+            ProgressStreak.update_streak(schedule, date.fromisoformat(day) if day else None)
+
+
+@register('schedules.send_due_reminders')
+def send_due_reminders():
+    """
+    Send every reminder that has fallen due.
+
+    Email reminders are mailed; notification reminders reach the user's
+    devices through the sync change feed once they are marked as sent.
+    Each shard is sent from in turn.
+    """
+    full = False
+    for alias in routing_settings()['SHARDS'] or [None]:
+        with route_to_shard(alias):
+            full |= _send_due_reminders(router.db_for_write(Reminder) or 'default')
+    if full:
+        enqueue('schedules.send_due_reminders', dedup_key='schedules.send_due_reminders')
+
+
+def _send_due_reminders(using):
+    """Send a batch of due reminders from the database ``using``; whether the batch was full"""
+    with transaction.atomic(using=using):
+        # Users stay in the default database, so with shards they cannot be joined
+        due = (Reminder.objects.using(using).filter(is_sent=False, reminder_time__lte=timezone.now())
+               .select_related('task').order_by('reminder_time'))
+        if connections[using].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True, of=('self',))
+        reminders = list(due[:REMINDER_BATCH_SIZE])
+        emailed = {reminder.user_id for reminder in reminders if reminder.reminder_type == 'email'}
+        emails = dict(get_user_model().objects.filter(pk__in=emailed).values_list('pk', 'email')) if emailed else {}
+
+        for reminder in reminders:
+            if reminder.reminder_type == 'email':
+                try:
+                    send_mail(
+                        f'Reminder: {reminder.task.title}',
+                        f'"{reminder.task.title}" starts at {reminder.task.start_time:%H:%M}.',
+                        None,
+                        [emails[reminder.user_id]],
+                    )
+                except Exception:
+                    # Left unsent; the next run tries again
+                    logger.exception('Sending reminder %s failed', reminder.pk)
+                    continue
+            reminder.mark_as_sent()
+    return len(reminders) == REMINDER_BATCH_SIZE
+
+
+@register('schedules.compute_analytics')
+def compute_analytics_report():
+    AnalyticsReport.objects.create(data=compute_analytics())
@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from schedules.archive import archive_schedules
+
+
+class Command(BaseCommand):
+    help = 'Move old schedules and their tasks into the compact archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.SCHEDULE_ARCHIVE_AFTER_DAYS,
+                            help='Archive schedules more than this many days old')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Schedules archived per transaction')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Seconds to sleep between chunks to let other writers in')
+
+    def handle(self, *args, **options):
+        before = date.today() - timedelta(days=options['older_than'])
+
+        def progress(schedules, tasks):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{schedules} schedules, {tasks} tasks archived')
+
+        schedules, tasks = archive_schedules(before, options['chunk_size'], options['pause'], progress)
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {schedules} schedules ({tasks} tasks) dated before {before}')
+        )
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from schedules.analytics import CHUNK_SIZE, SHARD_SIZE, compute_analytics
+from schedules.models import AnalyticsReport
+
+
+class Command(BaseCommand):
+    help = 'Compute platform-wide completion, category and streak distributions and store the report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Worker processes scanning shards (default: one per CPU)')
+        parser.add_argument('--shard-size', type=int, default=SHARD_SIZE,
+                            help='User ids per shard')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        def progress(done, shards):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{done}/{shards} shards')
+
+        report = compute_analytics(options['processes'], options['shard_size'], options['chunk_size'], progress)
+        AnalyticsReport.objects.create(data=report)
+        if options['verbosity'] > 1:
+            self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Analysed {report['daily_tasks']} daily tasks of {report['users']} users in {report['seconds']}s"
+        ))
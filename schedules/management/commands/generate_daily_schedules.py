@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import date
+from monitoring import metrics
 from schedules.models import DailySchedule
 
 class Command(BaseCommand):
@@ -10,9 +11,10 @@ class Command(BaseCommand):
         today = date.today()
         
         # Get or create daily schedules for all users
-        for schedule in DailySchedule.objects.all():
-            # This will automatically generate tasks through the save method
-            schedule.save()
+        with metrics.job_duration.time(job='generate_daily_schedules'):
+            for schedule in DailySchedule.objects.all():
+                # This will automatically generate tasks through the save method
+                schedule.save()
         
         self.stdout.write(
             self.style.SUCCESS(f'Successfully generated daily schedules for {today}')
@@ -0,0 +1,64 @@
+from django.db import migrations, transaction
+from django.db.models import Count
+
+
+# Duplicated (schedule, original_task) pairs handled per transaction
+CHUNK_SIZE = 500
+
+
+def dedupe_generated_tasks(apps, schema_editor):
+    """
+    Keep one daily task per (schedule, original_task) before it becomes unique.
+
+    The completed copy (else the oldest) is kept, and reminders of the
+    others are moved to it. Deletions are logged for sync clients since
+    the model signals do not run in migrations.
+    """
+    DailyTask = apps.get_model('schedules', 'DailyTask')
+    Reminder = apps.get_model('schedules', 'Reminder')
+    Change = apps.get_model('sync', 'Change')
+    db = schema_editor.connection.alias
+
+    duplicated = list(
+        DailyTask.objects.using(db).exclude(original_task=None)
+        .values_list('schedule_id', 'original_task_id')
+        .annotate(copies=Count('id')).filter(copies__gt=1).order_by('schedule_id', 'original_task_id')
+    )
+    for start in range(0, len(duplicated), CHUNK_SIZE):
+        pairs = {(schedule_id, task_id) for schedule_id, task_id, _ in duplicated[start:start + CHUNK_SIZE]}
+        rows = (DailyTask.objects.using(db)
+                .filter(schedule_id__in={schedule_id for schedule_id, _ in pairs}, original_task__isnull=False)
+                .order_by('-is_completed', 'id')
+                .values_list('id', 'schedule_id', 'original_task_id', 'schedule__user_id'))
+        kept, dropped = {}, {}
+        for pk, schedule_id, task_id, user_id in rows:
+            pair = (schedule_id, task_id)
+            if pair not in pairs:
+                continue
+            if pair in kept:
+                dropped[pk] = (kept[pair], user_id)
+            else:
+                kept[pair] = pk
+
+        with transaction.atomic(using=db):
+            for pk, (keep, _) in dropped.items():
+                Reminder.objects.using(db).filter(task_id=pk).update(task_id=keep)
+            DailyTask.objects.using(db).filter(pk__in=list(dropped)).delete()
+            Change.objects.using(db).bulk_create([
+                Change(user_id=user_id, model='daily_task', object_id=pk, deleted=True)
+                for pk, (_, user_id) in dropped.items()
+            ])
+
+
+class Migration(migrations.Migration):
+    # Each chunk commits on its own rather than holding one long transaction
+    atomic = False
+
+    dependencies = [
+        ('schedules', '0003_archivedschedule'),
+        ('sync', '0002_change_streak'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_generated_tasks, migrations.RunPython.noop),
+    ]
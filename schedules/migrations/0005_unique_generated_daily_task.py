@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedules', '0004_dedupe_generated_daily_tasks'),
+        ('tasks', '0002_alter_task_options_task_date_task_recurrence_pattern'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='dailytask',
+            constraint=models.UniqueConstraint(fields=('schedule', 'original_task'), name='unique_generated_daily_task'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedules', '0006_analyticsreport'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyschedule',
+            index=models.Index(fields=['date'], name='schedule_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['reminder_time'], name='reminder_time_idx'),
+        ),
+    ]
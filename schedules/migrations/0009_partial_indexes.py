@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedules', '0008_unconstrained_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(condition=models.Q(('is_sent', False)), fields=['reminder_time'], name='reminder_unsent_idx'),
+        ),
+    ]
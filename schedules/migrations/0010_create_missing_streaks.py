@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import migrations
+
+
+# Users given streaks per INSERT
+CHUNK_SIZE = 5000
+
+
+def create_missing_streaks(apps, schema_editor):
+    """Give every existing user a streak row, as registration now does"""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    ProgressStreak = apps.get_model('schedules', 'ProgressStreak')
+    db = schema_editor.connection.alias
+
+    missing = list(User.objects.using(db).filter(progress_streak__isnull=True).values_list('id', flat=True))
+    for start in range(0, len(missing), CHUNK_SIZE):
+        ProgressStreak.objects.using(db).bulk_create(
+            [ProgressStreak(user_id=user_id) for user_id in missing[start:start + CHUNK_SIZE]],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedules', '0009_partial_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_streaks, migrations.RunPython.noop),
+    ]
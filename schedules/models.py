@@ -1,13 +1,60 @@
-from django.db import models
+from collections import defaultdict
+from django.db import connections, models, router, transaction
 from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from accounts.models import User
-from tasks.models import Task
+from tasks.models import Task, duration_hours
+from api.routing import route_to_user
+from api.signals import bulk_created, bulk_updated
+from monitoring import metrics
 from datetime import date, timedelta
 import calendar
 
+
+def insert_ignoring_conflicts(model, objs, unique_fields, using):
+    """
+    Insert the objects that break no unique constraint on ``unique_fields``
+    and return the new rows' ids, or None where the database cannot say.
+
+    On PostgreSQL and SQLite each batch is one INSERT ... ON CONFLICT DO
+    NOTHING RETURNING, which reports just the rows it inserted, even when
+    a concurrent insert of the same rows won. Other databases get
+    bulk_create(ignore_conflicts=True), which returns no ids.
+    """
+    connection = connections[using]
+    features = connection.features
+    if not (features.can_return_rows_from_bulk_insert and features.supports_update_conflicts_with_target):
+        model.objects.using(using).bulk_create(objs, ignore_conflicts=True)
+        return None
+
+    quote = connection.ops.quote_name
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    template = '({})'.format(', '.join(['%s'] * len(fields)))
+    batch_size = connection.ops.bulk_batch_size(fields, objs) or len(objs)
+    pks = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            params = [field.get_db_prep_save(field.pre_save(obj, True), connection)
+                      for obj in batch for field in fields]
+            cursor.execute('INSERT INTO {} ({}) VALUES {} ON CONFLICT ({}) DO NOTHING RETURNING {}'.format(
+                quote(opts.db_table),
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join([template] * len(batch)),
+                ', '.join(quote(opts.get_field(name).column) for name in unique_fields),
+                quote(opts.pk.column),
+            ), params)
+            pks.extend(pk for pk, in cursor.fetchall())
+    return pks
+
+
 class DailySchedule(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_schedules')
+    # No database constraint: with sharding (api/routing.py) users live in another
+    # database. Deleting a user still cascades, in Django rather than the database.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_schedules', db_constraint=False)
     date = models.DateField(default=date.today)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -15,6 +62,8 @@ class DailySchedule(models.Model):
     class Meta:
         unique_together = ['user', 'date']
         ordering = ['-date']
+        # For the ordering and date filters across users (the unique index leads with user)
+        indexes = [models.Index(fields=['date'], name='schedule_date_idx')]
     
     def __str__(self):
         return f"{self.user.username}'s Schedule for {self.date}"
@@ -34,31 +83,122 @@ class DailySchedule(models.Model):
         return round((self.completed_tasks_count / self.total_tasks_count) * 100)
     
     def generate_from_tasks(self):
-        """Generate daily tasks from user's recurring tasks"""
+        """
+        Generate daily tasks from user's recurring tasks.
+
+        Safe to run concurrently for one schedule: the missing tasks go in
+        with one multi-row INSERT that skips (schedule, original_task)
+        pairs another run inserted first.
+        """
+        with route_to_user(self.user_id):
+            self._generate_from_tasks()
+
+    def _generate_from_tasks(self):
         # Get all recurring tasks for this user
         recurring_tasks = Task.objects.filter(
-            user=self.user, 
+            user_id=self.user_id,
             is_recurring=True,
             is_completed=False,
             date__lte=self.date  # Tasks that should have started by this date
-        )
+        ).only('category_id', 'title', 'date', 'start_time', 'end_time', 'priority', 'is_recurring',
+               'recurrence_pattern')
         
-        for task in recurring_tasks:
-            # Check if this task should occur on this date based on recurrence pattern
-            if self.should_occur_today(task):
-                # Create or get the daily task
-                    DailyTask.objects.get_or_create(
+        with metrics.schedule_generation_duration.time():
+            existing = set(self.daily_tasks.exclude(original_task=None).values_list('original_task_id', flat=True))
+            new_tasks = [
+                DailyTask(
                     schedule=self,
-                    original_task=task,
-                    defaults={
-                        'title': task.title,
-                        'category': task.category,
-                        'start_time': task.start_time,
-                        'end_time': task.end_time,
-                        'priority': task.priority,
-                    }
+                    original_task_id=task.pk,
+                    title=task.title,
+                    category_id=task.category_id,
+                    start_time=task.start_time,
+                    end_time=task.end_time,
+                    priority=task.priority,
                 )
+                for task in recurring_tasks
+                # Check if this task should occur on this date based on recurrence pattern
+                if task.pk not in existing and self.should_occur_today(task)
+            ]
+            pks = []
+            if new_tasks:
+                # A concurrent generation may insert some of the same tasks first
+                using = router.db_for_write(DailyTask, instance=self)
+                pks = insert_ignoring_conflicts(DailyTask, new_tasks, ['schedule', 'original_task'], using)
+                if pks is None:
+                    # Includes rows a concurrent generation inserted, which
+                    # only backends without RETURNING cannot tell apart
+                    generated = [daily_task.original_task_id for daily_task in new_tasks]
+                    pks = list(self.daily_tasks.filter(original_task_id__in=generated).values_list('pk', flat=True))
+                if pks:
+                    bulk_created.send(sender=DailyTask, user_id=self.user_id, pks=pks)
+        metrics.schedule_generation_rows.inc(len(pks))
 
+    @classmethod
+    def copy_days(cls, user, dates):
+        """
+        Copy the tasks of the user's schedules to other dates in one transaction.
+
+        ``dates`` maps each target date to the source date copied there (see
+        tasks.models.tile_dates). Missing target schedules are created, and
+        copies start out not completed. Tasks a target schedule already has
+        (same title and times, or the same original task) are skipped.
+        Returns (number created, number skipped).
+        """
+        with route_to_user(user.pk), transaction.atomic(using=router.db_for_write(cls)):
+            sources = defaultdict(list)
+            tasks = DailyTask.objects.filter(schedule__user=user, schedule__date__in=set(dates.values()))
+            for task in tasks.select_related('schedule'):
+                sources[task.schedule.date].append(task)
+            
+            schedules = dict(cls.objects.filter(user=user, date__in=list(dates)).values_list('date', 'pk'))
+            missing = [cls(user=user, date=target) for target in dates if target not in schedules]
+            if missing:
+                cls.objects.bulk_create(missing, ignore_conflicts=True)
+                created = dict(cls.objects.filter(user=user, date__in=[schedule.date for schedule in missing])
+                               .values_list('date', 'pk'))
+                schedules.update(created)
+                bulk_created.send(sender=cls, user_id=user.pk, pks=list(created.values()))
+            
+            existing = set()
+            present = DailyTask.objects.filter(schedule_id__in=schedules.values()).values_list(
+                'schedule_id', 'title', 'start_time', 'end_time', 'original_task_id')
+            for schedule_id, title, start_time, end_time, original_task_id in present:
+                existing.add((schedule_id, title, start_time, end_time))
+                if original_task_id is not None:
+                    existing.add((schedule_id, original_task_id))
+            
+            copies, skipped = [], 0
+            for target, source in sorted(dates.items()):
+                schedule_id = schedules[target]
+                for task in sources[source]:
+                    keys = {(schedule_id, task.title, task.start_time, task.end_time)}
+                    if task.original_task_id is not None:
+                        keys.add((schedule_id, task.original_task_id))
+                    if keys & existing:
+                        skipped += 1
+                        continue
+                    existing |= keys
+                    copies.append(DailyTask(
+                        schedule_id=schedule_id,
+                        original_task_id=task.original_task_id,
+                        title=task.title,
+                        category_id=task.category_id,
+                        start_time=task.start_time,
+                        end_time=task.end_time,
+                        priority=task.priority,
+                    ))
+            
+            # Conflicts (a concurrent generation of the same original task) are skipped
+            DailyTask.objects.bulk_create(copies, ignore_conflicts=True)
+            # Ids are not returned when conflicts are ignored
+            copied = {(task.schedule_id, task.title, task.start_time, task.end_time) for task in copies}
+            rows = DailyTask.objects.filter(schedule_id__in={task.schedule_id for task in copies}).values_list(
+                'pk', 'schedule_id', 'title', 'start_time', 'end_time')
+            pks = [pk for pk, *key in rows if tuple(key) in copied]
+            if pks:
+                bulk_created.send(sender=DailyTask, user_id=user.pk, pks=pks)
+        return len(pks), skipped
+    
     def should_occur_today(self, task):
         """Check if a recurring task should occur on this date"""
         if not task.is_recurring:
@@ -117,6 +257,10 @@ class DailyTask(models.Model):
     
     class Meta:
         ordering = ['start_time']
+        constraints = [
+            # One generated copy of a recurring task per schedule (manual tasks have no original)
+            models.UniqueConstraint(fields=['schedule', 'original_task'], name='unique_generated_daily_task'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.schedule.date})"
@@ -133,9 +277,41 @@ class DailyTask(models.Model):
     
     def duration(self):
         # Calculate duration in hours
-        start = self.start_time.hour + self.start_time.minute / 60
-        end = self.end_time.hour + self.end_time.minute / 60
-        return round(end - start, 2)
+        return duration_hours(self.start_time, self.end_time)
+
+
+
+class ArchivedSchedule(models.Model):
+    """
+    A schedule moved out of DailySchedule/DailyTask by ``archive_schedules``.
+
+    The schedule keeps its id and daily totals; its tasks are packed into
+    one compressed blob (see ``schedules.archive``).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    # No database constraint: with sharding (api/routing.py) users live in another
+    # database. Deleting a user still cascades, in Django rather than the database.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_schedules', db_constraint=False)
+    date = models.DateField()
+    total_tasks = models.PositiveIntegerField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+    tasks = models.BinaryField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'date']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.user.username}'s Archived Schedule for {self.date}"
+    
+    @property
+    def completion_percentage(self):
+        if self.total_tasks == 0:
+            return 0
+        return round((self.completed_tasks / self.total_tasks) * 100)
 
 
 
@@ -148,29 +324,49 @@ class ProgressStreak(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Streak: {self.current_streak} days"
     
-    def update_streak(self, schedule):
-        """Update streak based on daily schedule completion"""
-        if schedule.completion_percentage >= 80:  # Consider day successful if 80%+ completed
-            if self.last_updated == date.today() - timedelta(days=1):
-                # Consecutive day
-                self.current_streak += 1
-            elif self.last_updated < date.today() - timedelta(days=1):
-                # Broken streak
-                self.current_streak = 1
-            # else: already updated today
-            
-            # Update longest streak if needed
-            if self.current_streak > self.longest_streak:
-                self.longest_streak = self.current_streak
-            
-            self.last_updated = date.today()
-            self.save()
-        else:
-            # Broken streak
-            self.current_streak = 0
-            self.last_updated = date.today()
-            self.save()
+    @classmethod
+    def update_streak(cls, schedule, day=None):
+        """
+        Update the schedule owner's streak from its completion on ``day``
+        (today by default); returns the outcome.
 
+        A day is successful at 80%+ completion, and completing a task below
+        that breaks the streak. Every change is one UPDATE conditioned on
+        the row's current state and computed from its current values, so
+        completions racing on the same day cannot lose an update or extend
+        the streak twice, and a late update cannot undo a later day's.
+        """
+        today = day or date.today()
+        yesterday = today - timedelta(days=1)
+        rows = cls.objects.filter(user_id=schedule.user_id)
+        streaks = rows.filter(last_updated__lte=today)
+        if schedule.completion_percentage >= 80:
+            if streaks.filter(last_updated=yesterday).update(
+                    current_streak=F('current_streak') + 1,
+                    longest_streak=Greatest('longest_streak', F('current_streak') + 1),
+                    last_updated=today):
+                outcome = 'extended'
+            # A streak at zero (new, or broken earlier today) starts again
+            elif streaks.filter(Q(last_updated__lt=yesterday) | Q(current_streak=0)).update(
+                    current_streak=1, longest_streak=Greatest('longest_streak', 1), last_updated=today):
+                outcome = 'restarted'
+            else:
+                # Already extended today, or no streak row yet
+                outcome = 'unchanged'
+        else:
+            outcome = 'broken' if streaks.update(current_streak=0, last_updated=today) else 'unchanged'
+        
+        if outcome == 'unchanged' and not rows.exists():
+            # Users are given a streak when they register; others get one here
+            if cls.objects.get_or_create(user_id=schedule.user_id)[1] and day is not None:
+                # auto_now dated the new row today rather than on the day counted
+                rows.update(last_updated=today)
+            return cls.update_streak(schedule, day)
+        if outcome != 'unchanged':
+            # .update() skips the post_save signal that logs the change for sync
+            bulk_updated.send(sender=cls, user_id=schedule.user_id, pks=list(rows.values_list('pk', flat=True)))
+        metrics.streak_updates.inc(outcome=outcome)
+        return outcome
 
 
 class Reminder(models.Model):
@@ -179,7 +375,9 @@ class Reminder(models.Model):
         ('email', 'Email'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminders')
+    # No database constraint: with sharding (api/routing.py) users live in another
+    # database. Deleting a user still cascades, in Django rather than the database.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reminders', db_constraint=False)
     task = models.ForeignKey(DailyTask, on_delete=models.CASCADE, related_name='reminders')
     reminder_type = models.CharField(max_length=20, choices=REMINDER_TYPE_CHOICES, default='notification')
     reminder_time = models.DateTimeField()
@@ -189,6 +387,11 @@ class Reminder(models.Model):
     
     class Meta:
         ordering = ['reminder_time']
+        indexes = [
+            models.Index(fields=['reminder_time'], name='reminder_time_idx'),
+            # Due reminders for send_due_reminders: only the few unsent rows
+            models.Index(fields=['reminder_time'], condition=models.Q(is_sent=False), name='reminder_unsent_idx'),
+        ]
     
     def __str__(self):
         return f"Reminder for {self.task.title} at {self.reminder_time}"
@@ -200,4 +403,16 @@ class Reminder(models.Model):
     def mark_as_sent(self):
         self.is_sent = True
         self.sent_at = timezone.now()
-        self.save()
\ No newline at end of file
+        self.save()
+        metrics.reminder_send_lag.observe(max((self.sent_at - self.reminder_time).total_seconds(), 0))
+
+class AnalyticsReport(models.Model):
+    """Platform-wide distributions computed by ``schedules.analytics.compute_analytics``"""
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Analytics report of {self.created_at:%Y-%m-%d %H:%M}"
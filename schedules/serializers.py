@@ -1,6 +1,10 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
-from .models import DailySchedule, DailyTask, ProgressStreak
-from tasks.serializers import CategorySerializer
+from api.sparse import SparseFieldsSerializerMixin
+from .archive import unpack_tasks
+from .models import ArchivedSchedule, DailySchedule, DailyTask, ProgressStreak
+from tasks.models import duration_hours
+from tasks.serializers import CategorySerializer, CopyDaysSerializer
 
 class DailyTaskSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
@@ -11,12 +15,16 @@ class DailyTaskSerializer(serializers.ModelSerializer):
         model = DailyTask
         fields = '__all__'
         read_only_fields = ('schedule', 'created_at', 'updated_at')
+        field_columns = {'duration': ['start_time', 'end_time']}
     
     def get_duration(self, obj):
         return obj.duration()
+    
+    def row_duration(self, row):
+        return duration_hours(row['start_time'], row['end_time'])
 
 
-class DailyScheduleSerializer(serializers.ModelSerializer):
+class DailyScheduleSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     daily_tasks = DailyTaskSerializer(many=True, read_only=True)
     completed_tasks_count = serializers.IntegerField(read_only=True)
     total_tasks_count = serializers.IntegerField(read_only=True)
@@ -26,6 +34,72 @@ class DailyScheduleSerializer(serializers.ModelSerializer):
         model = DailySchedule
         fields = '__all__'
         read_only_fields = ('user', 'created_at', 'updated_at')
+        # Counted from daily_tasks, which the view prefetches; the values() path
+        # (api.rows) reads the counts from row_annotations instead
+        field_columns = {
+            'completed_tasks_count': ['completed'],
+            'total_tasks_count': ['total'],
+            'completion_percentage': ['completed', 'total'],
+        }
+        row_annotations = {
+            'completed': Count('daily_tasks', filter=Q(daily_tasks__is_completed=True)),
+            'total': Count('daily_tasks'),
+        }
+    
+    def row_completed_tasks_count(self, row):
+        return row['completed']
+    
+    def row_total_tasks_count(self, row):
+        return row['total']
+    
+    def row_completion_percentage(self, row):
+        if row['total'] == 0:
+            return 0
+        return round((row['completed'] / row['total']) * 100)
+
+
+class DailyScheduleSummarySerializer(serializers.Serializer):
+    """A schedule without its tasks, from values() annotated with ``total`` and ``completed``"""
+    id = serializers.IntegerField(read_only=True)
+    date = serializers.DateField(read_only=True)
+    completed_tasks_count = serializers.IntegerField(source='completed', read_only=True)
+    total_tasks_count = serializers.IntegerField(source='total', read_only=True)
+    completion_percentage = serializers.SerializerMethodField()
+    
+    def get_completion_percentage(self, row):
+        if row['total'] == 0:
+            return 0
+        return round((row['completed'] / row['total']) * 100)
+
+
+class ArchivedScheduleSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
+    """An archived schedule in the same shape as DailyScheduleSerializer"""
+    daily_tasks = serializers.SerializerMethodField()
+    completed_tasks_count = serializers.IntegerField(source='completed_tasks', read_only=True)
+    total_tasks_count = serializers.IntegerField(source='total_tasks', read_only=True)
+    completion_percentage = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = ArchivedSchedule
+        fields = ('id', 'daily_tasks', 'completed_tasks_count', 'total_tasks_count', 'completion_percentage',
+                  'date', 'created_at', 'updated_at', 'user')
+    
+    def get_daily_tasks(self, obj):
+        return DailyTaskSerializer(unpack_tasks(obj), many=True).data
+
+
+class ScheduleCopySerializer(CopyDaysSerializer):
+    """CopyDaysSerializer refusing target dates the requesting user has archived"""
+    
+    def validate(self, data):
+        data = super().validate(data)
+        archived = ArchivedSchedule.objects.filter(
+            user=self.context['request'].user, date__range=(data['target_start'], data['target_end'])
+        ).values_list('date', flat=True)
+        if archived:
+            days = ', '.join(day.isoformat() for day in sorted(archived))
+            raise serializers.ValidationError(f"Archived dates cannot be copied to: {days}")
+        return data
 
 
 class ProgressStreakSerializer(serializers.ModelSerializer):
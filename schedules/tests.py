@@ -1,12 +1,27 @@
-from django.test import TestCase
+import base64
+import random
+import threading
+from unittest import mock
+from io import StringIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from django.contrib.auth import get_user_model
-from datetime import date, timedelta
+from datetime import date, time, timedelta
 from django.utils import timezone  # Add this import
-from .models import DailySchedule, DailyTask, ProgressStreak, Reminder  # Add Reminder to imports
+from .analytics import Sketch, compute_analytics
+from .archive import archive_schedules
+from .models import (AnalyticsReport, ArchivedSchedule, DailySchedule, DailyTask, ProgressStreak, Reminder,  # Add Reminder to imports
+                     insert_ignoring_conflicts)
+from monitoring import metrics
 from tasks.models import Task, Category
+from sync.models import Change
 
 User = get_user_model()
 
@@ -74,6 +89,74 @@ class ProgressStreakModelTest(TestCase):
         self.assertEqual(self.streak.user.username, 'testuser')
         self.assertEqual(self.streak.current_streak, 5)
         self.assertEqual(self.streak.longest_streak, 10)
+    
+    def schedule(self, completed, total=5):
+        schedule = DailySchedule.objects.create(user=self.user)
+        category = Category.objects.create(name='work', color='#F9A602')
+        for i in range(total):
+            DailyTask.objects.create(schedule=schedule, title=f'Task {i}', category=category,
+                                     start_time=time(9), end_time=time(10), is_completed=i < completed)
+        return schedule
+    
+    def set_streak(self, **values):
+        ProgressStreak.objects.filter(pk=self.streak.pk).update(**values)
+    
+    def test_update_streak(self):
+        """Test a successful day extends, restarts or keeps the streak"""
+        schedule = self.schedule(4)
+        self.set_streak(last_updated=date.today() - timedelta(days=1))
+        self.assertEqual(ProgressStreak.update_streak(schedule), 'extended')
+        self.assertEqual(ProgressStreak.update_streak(schedule), 'unchanged')
+        self.streak.refresh_from_db()
+        self.assertEqual((self.streak.current_streak, self.streak.longest_streak), (6, 10))
+        
+        self.set_streak(last_updated=date.today() - timedelta(days=3))
+        self.assertEqual(ProgressStreak.update_streak(schedule), 'restarted')
+        self.streak.refresh_from_db()
+        self.assertEqual((self.streak.current_streak, self.streak.last_updated), (1, date.today()))
+    
+    def test_longest_streak_follows(self):
+        """Test extending past the longest streak raises it"""
+        self.set_streak(current_streak=10, last_updated=date.today() - timedelta(days=1))
+        ProgressStreak.update_streak(self.schedule(5))
+        self.streak.refresh_from_db()
+        self.assertEqual((self.streak.current_streak, self.streak.longest_streak), (11, 11))
+    
+    def test_broken_streak_restarts_the_same_day(self):
+        """Test a day that reaches 80% after falling short still counts"""
+        schedule = self.schedule(1)
+        self.assertEqual(ProgressStreak.update_streak(schedule), 'broken')
+        schedule.daily_tasks.update(is_completed=True)
+        self.assertEqual(ProgressStreak.update_streak(schedule), 'restarted')
+        self.streak.refresh_from_db()
+        self.assertEqual(self.streak.current_streak, 1)
+    
+    def test_late_update_counts_for_the_completion_day(self):
+        """Test an update run after midnight counts for the day of the completion, not the next day"""
+        yesterday = date.today() - timedelta(days=1)
+        self.set_streak(last_updated=yesterday - timedelta(days=1))
+        schedule = self.schedule(5)
+        self.assertEqual(ProgressStreak.update_streak(schedule, yesterday), 'extended')
+        self.streak.refresh_from_db()
+        self.assertEqual((self.streak.current_streak, self.streak.last_updated), (6, yesterday))
+        
+        # Today's update is not undone by a late one for yesterday
+        self.assertEqual(ProgressStreak.update_streak(schedule), 'extended')
+        schedule.daily_tasks.update(is_completed=False)
+        self.assertEqual(ProgressStreak.update_streak(schedule, yesterday), 'unchanged')
+        self.streak.refresh_from_db()
+        self.assertEqual((self.streak.current_streak, self.streak.last_updated), (7, date.today()))
+    
+    def test_missing_streak_created(self):
+        """Test users without a streak row get one on their first update"""
+        self.streak.delete()
+        self.assertEqual(ProgressStreak.update_streak(self.schedule(5)), 'restarted')
+        self.assertEqual(ProgressStreak.objects.get(user=self.user).current_streak, 1)
+    
+    def test_update_logged_for_sync(self):
+        """Test streak updates reach the sync change log"""
+        ProgressStreak.update_streak(self.schedule(5))
+        self.assertTrue(Change.objects.filter(model='streak', object_id=self.streak.pk).exists())
 
 
 class ReminderModelTest(TestCase):
@@ -184,4 +267,576 @@ class TaskFilterTest(APITestCase):
         url = reverse('task-list') + f'?category={self.category.id}'
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
\ No newline at end of file
+        self.assertEqual(len(response.data), 2)
+
+
+class ScheduleArchiveTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.old_schedules = []
+        for days_ago in (400, 300, 200):
+            schedule = DailySchedule.objects.create(user=self.user, date=date.today() - timedelta(days=days_ago))
+            DailyTask.objects.create(
+                schedule=schedule,
+                title='Deep Work',
+                category=self.category,
+                start_time='09:00:00',
+                end_time='11:30:00',
+                is_completed=True
+            )
+            DailyTask.objects.create(
+                schedule=schedule,
+                title='Email',
+                category=self.category,
+                start_time='08:00:00',
+                end_time='08:30:00'
+            )
+            self.old_schedules.append(schedule)
+        self.recent = DailySchedule.objects.create(user=self.user, date=date.today() - timedelta(days=3))
+        self.client.force_authenticate(user=self.user)
+    
+    def test_archive_command(self):
+        """Test only schedules past the horizon are archived, with their totals"""
+        out = StringIO()
+        call_command('archive_schedules', older_than=180, chunk_size=2, stdout=out)
+        self.assertIn('Archived 3 schedules (6 tasks)', out.getvalue())
+        
+        self.assertEqual(list(DailySchedule.objects.all()), [self.recent])
+        self.assertEqual(DailyTask.objects.count(), 0)
+        archived = ArchivedSchedule.objects.get(pk=self.old_schedules[0].pk)
+        self.assertEqual(archived.total_tasks, 2)
+        self.assertEqual(archived.completed_tasks, 1)
+        self.assertEqual(archived.completion_percentage, 50)
+        
+        # Nothing left to do on a second run
+        out = StringIO()
+        call_command('archive_schedules', older_than=180, stdout=out)
+        self.assertIn('Archived 0 schedules', out.getvalue())
+    
+    def test_detail_view_serves_archived_schedule(self):
+        """Test an archived schedule is returned exactly as it was before archival"""
+        url = reverse('schedule-detail', args=[self.old_schedules[1].pk])
+        before = self.client.get(url)
+        self.assertEqual(before.status_code, status.HTTP_200_OK)
+        
+        call_command('archive_schedules', older_than=180, stdout=StringIO())
+        after = self.client.get(url)
+        self.assertEqual(after.status_code, status.HTTP_200_OK)
+        self.assertEqual(after.content, before.content)
+    
+    def test_schedule_recreated_on_archived_date_merged(self):
+        """Test a live schedule dated like an archive is merged into it, not lost"""
+        call_command('archive_schedules', older_than=180, stdout=StringIO())
+        archived = ArchivedSchedule.objects.get(pk=self.old_schedules[0].pk)
+        schedule = DailySchedule.objects.create(user=self.user, date=archived.date)
+        DailyTask.objects.create(schedule=schedule, title='Copied', category=self.category,
+                                 start_time='07:00:00', end_time='07:30:00', is_completed=True)
+    
+        call_command('archive_schedules', older_than=180, stdout=StringIO())
+        self.assertFalse(DailySchedule.objects.filter(pk=schedule.pk).exists())
+        archived.refresh_from_db()
+        self.assertEqual(archived.total_tasks, 3)
+        self.assertEqual(archived.completed_tasks, 2)
+        response = self.client.get(reverse('schedule-detail', args=[archived.pk]))
+        self.assertEqual([task['title'] for task in response.data['daily_tasks']], ['Copied', 'Email', 'Deep Work'])
+    
+    def test_copy_to_archived_date_rejected(self):
+        """Test schedules cannot be copied onto archived dates"""
+        call_command('archive_schedules', older_than=180, stdout=StringIO())
+        archived_date = self.old_schedules[2].date
+        response = self.client.post(reverse('schedule-copy'), {
+            'source_start': self.recent.date.isoformat(),
+            'target_start': (archived_date - timedelta(days=1)).isoformat(),
+            'target_end': (archived_date + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(archived_date.isoformat(), str(response.data))
+        self.assertFalse(DailySchedule.objects.filter(date=archived_date).exists())
+    
+    def test_archived_schedule_of_other_user(self):
+        """Test archived schedules stay private to their owner"""
+        call_command('archive_schedules', older_than=180, stdout=StringIO())
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.client.force_authenticate(user=other)
+        
+        response = self.client.get(reverse('schedule-detail', args=[self.old_schedules[0].pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GenerationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        category = Category.objects.create(name='work', color='#F9A602')
+        for i, pattern in enumerate(['daily', 'daily', 'weekly']):
+            Task.objects.create(
+                user=self.user,
+                category=category,
+                title=f'Recurring {i}',
+                date=date.today() - timedelta(days=1),
+                start_time='09:00:00',
+                end_time='10:00:00',
+                is_recurring=True,
+                recurrence_pattern=pattern
+            )
+        self.schedule = DailySchedule.objects.create(user=self.user)
+    
+    def test_single_insert(self):
+        """Test due tasks are inserted with one statement and only once"""
+        with CaptureQueriesContext(connection) as queries:
+            self.schedule.generate_from_tasks()
+        # INSERT ... ON CONFLICT DO NOTHING RETURNING on SQLite and PostgreSQL
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')
+                   and '"schedules_dailytask"' in query['sql']]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(sorted(self.schedule.daily_tasks.values_list('title', flat=True)),
+                         ['Recurring 0', 'Recurring 1'])
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.schedule.generate_from_tasks()
+        self.assertFalse(any(query['sql'].startswith('INSERT') for query in queries))
+        self.assertEqual(self.schedule.daily_tasks.count(), 2)
+    
+    def test_generated_tasks_synced(self):
+        """Test generated tasks reach the sync change log"""
+        self.schedule.generate_from_tasks()
+        self.assertEqual(
+            sorted(Change.objects.filter(model='daily_task').values_list('object_id', flat=True)),
+            sorted(self.schedule.daily_tasks.values_list('pk', flat=True))
+        )
+    
+    def test_conflicting_rows_skipped(self):
+        """Test only the ids of rows actually inserted come back"""
+        self.schedule.generate_from_tasks()
+        category = Category.objects.get()
+        copies = [
+            DailyTask(schedule=self.schedule, original_task=Task.objects.get(title=title), title=title,
+                      category=category, start_time=time(9), end_time=time(10))
+            for title in ('Recurring 0', 'Recurring 2')
+        ]
+        pks = insert_ignoring_conflicts(DailyTask, copies, ['schedule', 'original_task'], 'default')
+        self.assertEqual(pks, [DailyTask.objects.get(title='Recurring 2').pk])
+        self.assertEqual(self.schedule.daily_tasks.count(), 3)
+    
+    def test_rows_metric_counts_inserted_rows(self):
+        """Test rows a concurrent generation inserted first are not counted as generated"""
+        should_occur_today = DailySchedule.should_occur_today
+        
+        def racing(schedule, task):
+            # Another generation inserts this task between the check and the insert
+            if task.title == 'Recurring 0':
+                DailyTask.objects.create(schedule=schedule, original_task=task, title=task.title,
+                                         category_id=task.category_id, start_time=task.start_time,
+                                         end_time=task.end_time)
+            return should_occur_today(schedule, task)
+        
+        with mock.patch.object(DailySchedule, 'should_occur_today', racing), \
+                mock.patch.object(metrics.schedule_generation_rows, 'inc') as inc:
+            self.schedule.generate_from_tasks()
+        inc.assert_called_once_with(1)
+        self.assertEqual(self.schedule.daily_tasks.count(), 2)
+    
+    def test_manual_tasks_not_unique(self):
+        """Test the uniqueness only applies to generated tasks"""
+        category = Category.objects.get()
+        for _ in range(2):
+            DailyTask.objects.create(schedule=self.schedule, title='Walk', category=category,
+                                     start_time='12:00:00', end_time='12:30:00')
+        self.assertEqual(self.schedule.daily_tasks.count(), 2)
+
+
+@override_settings(JOBS={**settings.JOBS, 'EAGER': True})
+class ConcurrentGenerationTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        category = Category.objects.create(name='work', color='#F9A602')
+        for i in range(5):
+            Task.objects.create(
+                user=self.user,
+                category=category,
+                title=f'Recurring {i}',
+                date=date.today() - timedelta(days=1),
+                start_time='09:00:00',
+                end_time='10:00:00',
+                is_recurring=True,
+                recurrence_pattern='daily'
+            )
+    
+    def test_concurrent_dashboard_loads(self):
+        """Test many simultaneous loads of today's schedule generate each task once"""
+        barrier = threading.Barrier(8)
+        errors = []
+        
+        def load():
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                barrier.wait()
+                for _ in range(3):
+                    response = client.get(reverse('today-schedule'))
+                    if response.status_code != status.HTTP_200_OK:
+                        errors.append(response.status_code)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=load) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(DailySchedule.objects.count(), 1)
+        self.assertEqual(
+            sorted(DailyTask.objects.values_list('original_task__title', flat=True)),
+            [f'Recurring {i}' for i in range(5)]
+        )
+
+
+@override_settings(JOBS={**settings.JOBS, 'EAGER': True})
+class ConcurrentStreakTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        streak = ProgressStreak.objects.create(user=self.user, current_streak=3, longest_streak=3)
+        ProgressStreak.objects.filter(pk=streak.pk).update(last_updated=date.today() - timedelta(days=1))
+        category = Category.objects.create(name='work', color='#F9A602')
+        schedule = DailySchedule.objects.create(user=self.user)
+        # 32 of 40 done: the day is a success whichever task is completed next
+        DailyTask.objects.bulk_create([
+            DailyTask(schedule=schedule, title=f'Task {i}', category=category, start_time=time(9),
+                      end_time=time(10), is_completed=i < 32)
+            for i in range(40)
+        ])
+        self.open_tasks = list(schedule.daily_tasks.filter(is_completed=False).values_list('pk', flat=True))
+    
+    def test_concurrent_completions(self):
+        """Test many simultaneous completions extend the streak exactly once"""
+        barrier = threading.Barrier(len(self.open_tasks))
+        errors = []
+        
+        def complete(pk):
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            try:
+                barrier.wait()
+                for _ in range(3):
+                    response = client.patch(reverse('daily-task-update', kwargs={'pk': pk}),
+                                            {'is_completed': True}, format='json')
+                    if response.status_code != status.HTTP_200_OK:
+                        errors.append(response.status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=complete, args=(pk,)) for pk in self.open_tasks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        streak = ProgressStreak.objects.get(user=self.user)
+        self.assertEqual((streak.current_streak, streak.longest_streak, streak.last_updated), (4, 4, date.today()))
+
+
+class HeatmapTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        for user, day, completed, total in [(self.user, date(2024, 1, 2), 3, 4), (self.user, date(2024, 12, 31), 0, 2),
+                                            (other, date(2024, 3, 1), 1, 1)]:
+            schedule = DailySchedule.objects.create(user=user, date=day)
+            for i in range(total):
+                DailyTask.objects.create(schedule=schedule, title=f'Task {i}', category=self.category,
+                                         start_time=time(9), end_time=time(10), is_completed=i < completed)
+        self.client.force_authenticate(user=self.user)
+    
+    def get(self, year=2024):
+        return self.client.get(reverse('progress-heatmap'), {'year': year})
+    
+    def days(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return base64.b64decode(response.data['days'])
+    
+    def test_one_byte_per_day(self):
+        """Test each day holds its completion percentage, or 255 without tasks"""
+        response = self.get()
+        days = self.days(response)
+        self.assertEqual(len(days), 366)
+        self.assertEqual((days[1], days[365]), (75, 0))
+        self.assertEqual(days.count(255), 364)
+        self.assertEqual(len(self.days(self.get(2023))), 365)
+        self.assertLess(len(response.content), 1024)
+    
+    def test_two_queries_then_cached(self):
+        """Test the heatmap takes two queries, then none until the user's schedules change"""
+        # The first request also loads the profiling flags
+        self.get(2023)
+        with self.assertNumQueries(2):
+            self.get()
+        with self.assertNumQueries(0):
+            self.get()
+        
+        task = DailyTask.objects.get(schedule__date=date(2024, 12, 31), title='Task 0')
+        response = self.client.patch(reverse('daily-task-update', kwargs={'pk': task.pk}), {'is_completed': True},
+                                     format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.days(self.get())[365], 50)
+    
+    def test_archived_days_included(self):
+        """Test archiving schedules leaves the heatmap as it was, cached or not"""
+        days = self.days(self.get())
+        archive_schedules(date(2024, 12, 31))
+        # Archiving deletes without signals, so it clears the cache itself
+        self.assertIsNone(cache.get(f'heatmap:{self.user.pk}'))
+        self.assertEqual(self.days(self.get()), days)
+    
+    def test_invalid_year(self):
+        """Test years outside 1-9999 are rejected"""
+        for year in ('0', '10000', 'last'):
+            self.assertEqual(self.get(year).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScheduleCopyTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.task = Task.objects.create(
+            user=self.user,
+            category=self.category,
+            title='Standup',
+            date=date(2025, 3, 1),
+            start_time='09:00:00',
+            end_time='09:15:00',
+            is_recurring=True,
+            recurrence_pattern='daily'
+        )
+        self.day = date(2025, 3, 3)
+        schedule = DailySchedule.objects.create(user=self.user, date=self.day)
+        DailyTask.objects.create(schedule=schedule, original_task=self.task, title='Standup', category=self.category,
+                                 start_time='09:00:00', end_time='09:15:00', is_completed=True)
+        DailyTask.objects.create(schedule=schedule, title='Walk', category=self.category,
+                                 start_time='12:00:00', end_time='12:30:00')
+        self.client.force_authenticate(user=self.user)
+    
+    def test_copy_day_to_range(self):
+        """Test a day is copied to every target date, creating schedules, not completed"""
+        response = self.client.post(reverse('schedule-copy'), {
+            'source_start': '2025-03-03', 'target_start': '2025-03-10', 'target_end': '2025-03-16',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 14, 'skipped': 0})
+        
+        schedules = DailySchedule.objects.filter(date__gte=date(2025, 3, 10))
+        self.assertEqual(schedules.count(), 7)
+        for schedule in schedules:
+            self.assertEqual(sorted(schedule.daily_tasks.values_list('title', flat=True)), ['Standup', 'Walk'])
+        copies = DailyTask.objects.filter(schedule__in=schedules)
+        self.assertFalse(copies.filter(is_completed=True).exists())
+        self.assertEqual(Change.objects.filter(model='daily_task', object_id__in=copies.values('pk')).count(), 14)
+        self.assertEqual(Change.objects.filter(model='schedule', object_id__in=schedules.values('pk')).count(), 7)
+    
+    def test_generated_tasks_not_duplicated(self):
+        """Test copies skip tasks the target schedule already generated"""
+        target = DailySchedule.objects.create(user=self.user, date=date(2025, 3, 10))
+        target.generate_from_tasks()
+        response = self.client.post(reverse('schedule-copy'), {'source_start': '2025-03-03', 'target_start': '2025-03-10'})
+        self.assertEqual(response.data, {'created': 1, 'skipped': 1})
+        self.assertEqual(sorted(target.daily_tasks.values_list('title', flat=True)), ['Standup', 'Walk'])
+        
+        # Generation afterwards finds the copied tasks in place
+        target.generate_from_tasks()
+        self.assertEqual(target.daily_tasks.count(), 2)
+
+
+class AnalyticsTest(APITestCase):
+    def setUp(self):
+        self.work = Category.objects.create(name='work', color='#F9A602')
+        self.health = Category.objects.create(name='health', color='#4ECDC4')
+        # Completion rates 100%, 25% and 0%; a user without tasks is left out
+        self.users = []
+        for n, (completed, total, streak) in enumerate([(4, 4, 10), (1, 4, 2), (0, 2, 0), (0, 0, 0)]):
+            user = User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='testpass123')
+            ProgressStreak.objects.create(user=user, current_streak=streak, longest_streak=streak + 30)
+            for day in range(total):
+                schedule = DailySchedule.objects.create(user=user, date=date.today() - timedelta(days=day))
+                DailyTask.objects.create(schedule=schedule, title='Work', category=self.work,
+                                         start_time=time(9), end_time=time(12), is_completed=day < completed)
+                DailyTask.objects.create(schedule=schedule, title='Run', category=self.health,
+                                         start_time=time(7), end_time=time(8), is_completed=day < completed)
+            self.users.append(user)
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='testpass123',
+                                              is_staff=True)
+    
+    def test_report(self):
+        """Test the distributions of completion, category time and streaks"""
+        report = compute_analytics(processes=1)
+        self.assertEqual(report['users'], 3)
+        self.assertEqual(report['daily_tasks'], 20)
+        rates = report['completion_rate']
+        self.assertEqual((rates['p10'], rates['p50'], rates['p90']), (0.0, 25.0, 100.0))
+        self.assertEqual(rates['mean'], 41.7)
+        self.assertEqual(report['category_share'], [
+            {'category': 'work', 'hours': 30.0, 'share': 0.75},
+            {'category': 'health', 'hours': 10.0, 'share': 0.25},
+        ])
+        current = {bucket['from']: bucket['users'] for bucket in report['streaks']['current']}
+        self.assertEqual((current[0], current[2], current[7]), (2, 1, 1))
+        longest = {bucket['from']: bucket['users'] for bucket in report['streaks']['longest']}
+        self.assertEqual((longest[30], longest[60]), (4, 0))
+    
+    def test_shards_merge_to_the_same_report(self):
+        """Test one user per shard gives the report of a single shard"""
+        single = compute_analytics(processes=1)
+        sharded = compute_analytics(processes=1, shard_size=1, chunk_size=1)
+        for report in (single, sharded):
+            del report['computed_at'], report['seconds']
+        self.assertEqual(sharded, single)
+    
+    def test_archived_schedules_counted(self):
+        """Test archiving schedules does not change users' completion rates"""
+        def counts():
+            report = compute_analytics(processes=1)
+            return report['users'], report['daily_tasks'], report['completion_rate']
+        
+        expected = counts()
+        # Every day but today, then every day
+        for before in (date.today(), date.today() + timedelta(days=1)):
+            archive_schedules(before)
+            self.assertEqual(counts(), expected)
+        self.assertFalse(DailyTask.objects.exists())
+    
+    def test_merged_sketch_percentiles(self):
+        """Test percentiles of merged sketches match the exact nearest-rank percentiles"""
+        generator = random.Random(7)
+        users = [(total, generator.randint(0, total)) for total in (generator.randint(1, 400) for _ in range(999))]
+        sketches = [Sketch(), Sketch(), Sketch()]
+        for n, (total, completed) in enumerate(users):
+            sketches[n % 3].add_user(total, completed)
+        merged = sketches[0].merge(sketches[1]).merge(sketches[2])
+        
+        rates = sorted(round(completed / total * 1000) / 10 for total, completed in users)
+        for q in (10, 50, 99):
+            self.assertEqual(merged.percentile(q), rates[-(-q * len(rates) // 100) - 1])
+    
+    def test_endpoint_is_staff_only(self):
+        """Test regular users cannot read or queue reports"""
+        self.client.force_authenticate(user=self.users[0])
+        self.assertEqual(self.client.get(reverse('analytics')).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.post(reverse('analytics')).status_code, status.HTTP_403_FORBIDDEN)
+    
+    @override_settings(JOBS={'EAGER': True})
+    def test_queue_and_read_report(self):
+        """Test staff queue a report and then read the latest one"""
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get(reverse('analytics')).status_code, status.HTTP_404_NOT_FOUND)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('analytics'))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        
+        response = self.client.get(reverse('analytics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['users'], 3)
+    
+    def test_command_stores_report(self):
+        """Test compute_analytics stores a report"""
+        call_command('compute_analytics', processes=1, stdout=StringIO())
+        self.assertEqual(AnalyticsReport.objects.get().data['daily_tasks'], 20)
+
+
+class ScheduleAdminTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='testpass123')
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.users = [
+            User.objects.create_user(username=f'user{n}', email=f'user{n}@example.com', password='testpass123')
+            for n in range(2)
+        ]
+    
+    def create_rows(self, days, start=0):
+        for user in self.users:
+            for day in range(start, start + days):
+                schedule = DailySchedule.objects.create(user=user, date=date.today() - timedelta(days=day))
+                task = DailyTask.objects.create(schedule=schedule, title='Work', category=self.category,
+                                                start_time=time(9), end_time=time(10))
+                Reminder.objects.create(user=user, task=task, reminder_time=timezone.now() - timedelta(days=day))
+    
+    def changelist_queries(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:schedules_{name}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+    
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Test changelists select related rows rather than querying per row"""
+        self.create_rows(2)
+        # The first request also loads the (cached) profiling flags
+        self.changelist_queries('dailyschedule')
+        few = {name: self.changelist_queries(name) for name in ('dailyschedule', 'dailytask', 'reminder')}
+        self.create_rows(5, start=2)
+        many = {name: self.changelist_queries(name) for name in ('dailyschedule', 'dailytask', 'reminder')}
+        self.assertEqual(many, few)
+    
+    def test_mark_reminders_sent(self):
+        """Test the action marks reminders sent in one UPDATE and logs the changes for sync"""
+        self.create_rows(3)
+        reminders = Reminder.objects.filter(user=self.users[0])
+        reminders.filter(pk=reminders.first().pk).update(is_sent=True)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('admin:schedules_reminder_changelist'), {
+                'action': 'mark_sent', '_selected_action': list(Reminder.objects.values_list('pk', flat=True)),
+            })
+        self.assertEqual(response.status_code, 302)
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "schedules_reminder"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Reminder.objects.filter(is_sent=False).exists())
+        self.assertFalse(Reminder.objects.filter(sent_at=None).exclude(pk=reminders.first().pk).exists())
+        self.assertEqual(Change.objects.filter(model='reminder', user=self.users[0]).count(), 3 + 2)
+    
+    @override_settings(JOBS={'EAGER': True})
+    def test_regenerate_schedules(self):
+        """Test the action generates the recurring tasks of the selected schedules"""
+        Task.objects.create(user=self.users[0], category=self.category, title='Daily', start_time=time(7),
+                            end_time=time(8), is_recurring=True, recurrence_pattern='daily',
+                            date=date.today() - timedelta(days=10))
+        schedules = [DailySchedule.objects.create(user=self.users[0], date=date.today() - timedelta(days=day))
+                     for day in range(3)]
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin:schedules_dailyschedule_changelist'), {
+                'action': 'regenerate', '_selected_action': [schedule.pk for schedule in schedules],
+            })
+        self.assertEqual(DailyTask.objects.filter(schedule__in=schedules, title='Daily').count(), 3)
@@ -1,18 +1,55 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.db.models import Count, Prefetch, Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import DailySchedule, DailyTask, ProgressStreak
-from .serializers import DailyScheduleSerializer, DailyTaskSerializer, ProgressStreakSerializer
+from api.rows import ValuesListMixin
+from api.sparse import SparseFieldsMixin
+from api.throttling import GenerationRateThrottle, ReadRateThrottle
+from jobs.queue import enqueue
+from .heatmap import encode_heatmap, year_heatmap
+from .jobs import enqueue_generation
+from .models import AnalyticsReport, ArchivedSchedule, DailySchedule, DailyTask, ProgressStreak
+from .serializers import (
+    ArchivedScheduleSerializer, DailyScheduleSerializer, DailyScheduleSummarySerializer, DailyTaskSerializer,
+    ProgressStreakSerializer, ScheduleCopySerializer,
+)
 
-class DailyScheduleListCreateView(generics.ListCreateAPIView):
-    serializer_class = DailyScheduleSerializer
+def with_daily_tasks(queryset, serializer):
+    """Prefetch the schedules' tasks and their categories if the serializer includes them"""
+    if 'daily_tasks' not in serializer.fields:
+        return queryset
+    return queryset.prefetch_related(Prefetch('daily_tasks', queryset=DailyTask.objects.select_related('category')))
+
+
+class DailyScheduleListCreateView(ValuesListMixin, SparseFieldsMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     
+    def summary_requested(self):
+        # ?view=summary: counts only, without the tasks
+        return self.request.method == 'GET' and self.request.query_params.get('view') == 'summary'
+    
+    def get_serializer_class(self):
+        return DailyScheduleSummarySerializer if self.summary_requested() else DailyScheduleSerializer
+    
+    def get_throttles(self):
+        throttles = super().get_throttles()
+        if self.request.method == 'POST':
+            throttles.append(GenerationRateThrottle())
+        return throttles
+    
     def get_queryset(self):
-        return DailySchedule.objects.filter(user=self.request.user)
+        queryset = DailySchedule.objects.filter(user=self.request.user)
+        if self.summary_requested():
+            return queryset.annotate(
+                total=Count('daily_tasks'),
+                completed=Count('daily_tasks', filter=Q(daily_tasks__is_completed=True)),
+            ).values('id', 'date', 'total', 'completed')
+        return with_daily_tasks(queryset, self.get_serializer())
     
     def perform_create(self, serializer):
         # Get or create schedule for today
@@ -22,18 +59,31 @@ class DailyScheduleListCreateView(generics.ListCreateAPIView):
             defaults={}
         )
         
-        # Generate tasks from recurring tasks
-        schedule.generate_from_tasks()
+        # Generate tasks from recurring tasks: a new schedule is returned
+        # with its tasks, later task changes are picked up in the background
+        if created:
+            schedule.generate_from_tasks()
+        else:
+            enqueue_generation(schedule.pk, schedule.user_id)
         
         serializer.instance = schedule
 
 
-class DailyScheduleDetailView(generics.RetrieveAPIView):
+class DailyScheduleDetailView(SparseFieldsMixin, generics.RetrieveAPIView):
     serializer_class = DailyScheduleSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return DailySchedule.objects.filter(user=self.request.user)
+        queryset = DailySchedule.objects.filter(user=self.request.user)
+        return with_daily_tasks(queryset, self.get_serializer())
+    
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Old schedules live in the archive under the same id
+            archived = get_object_or_404(ArchivedSchedule, pk=self.kwargs[self.lookup_field], user=request.user)
+            return Response(ArchivedScheduleSerializer(archived, **self.field_selection()).data)
 
 
 class DailyTaskUpdateView(generics.UpdateAPIView):
@@ -48,8 +98,9 @@ class DailyTaskUpdateView(generics.UpdateAPIView):
         
         # Update streak if task is being marked as completed
         if instance.is_completed:
-            streak, created = ProgressStreak.objects.get_or_create(user=self.request.user)
-            streak.update_streak(instance.schedule)
+            enqueue('schedules.update_streak', priority=5, dedup_key=f'update_streak:{instance.schedule_id}',
+                    schedule_id=instance.schedule_id, user_id=self.request.user.pk,
+                    day=instance.schedule.date.isoformat())
 
 
 class ProgressStreakView(generics.RetrieveAPIView):
@@ -63,6 +114,7 @@ class ProgressStreakView(generics.RetrieveAPIView):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@throttle_classes([ReadRateThrottle, GenerationRateThrottle])
 def todays_schedule(request):
     """Get or create today's schedule"""
     schedule, created = DailySchedule.objects.get_or_create(
@@ -71,13 +123,28 @@ def todays_schedule(request):
         defaults={}
     )
     
-    # Generate tasks from recurring tasks
-    schedule.generate_from_tasks()
+    # Generate tasks from recurring tasks: a new schedule is returned with
+    # its tasks, later task changes are picked up in the background
+    if created:
+        schedule.generate_from_tasks()
+    else:
+        enqueue_generation(schedule.pk, schedule.user_id)
     
     serializer = DailyScheduleSerializer(schedule)
     return Response(serializer.data)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([GenerationRateThrottle])
+def copy_schedules(request):
+    """Copy the daily tasks of a day or week to a range of dates"""
+    serializer = ScheduleCopySerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    created, skipped = DailySchedule.copy_days(request.user, serializer.dates())
+    return Response({'created': created, 'skipped': skipped}, status=status.HTTP_201_CREATED)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def progress_stats(request):
@@ -112,4 +179,28 @@ def progress_stats(request):
             'longest': streak.longest_streak
         },
         'weekly_avg': round(weekly_completion, 1)
-    })
\ No newline at end of file
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def heatmap(request):
+    """Completion percentage of each day of ?year= (default this year), one byte per day in base64"""
+    year = request.query_params.get('year', str(date.today().year))
+    if not year.isdigit() or not 1 <= int(year) <= 9999:
+        return Response({'year': ['Enter a year from 1 to 9999.']}, status=status.HTTP_400_BAD_REQUEST)
+    year = int(year)
+    return Response(encode_heatmap(year, year_heatmap(request.user.pk, year)))
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAdminUser])
+def analytics(request):
+    """Latest platform-wide analytics report; POST queues a new one"""
+    if request.method == 'POST':
+        enqueue('schedules.compute_analytics', dedup_key='schedules.compute_analytics')
+        return Response({'message': 'Analytics report queued'}, status=status.HTTP_202_ACCEPTED)
+    report = AnalyticsReport.objects.first()
+    if report is None:
+        return Response({'detail': 'No analytics report has been computed yet'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(report.data)
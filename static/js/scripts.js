@@ -4,6 +4,12 @@ const API_BASE_URL = 'http://127.0.0.1:8000/api';
 // Store authentication token
 let authToken = localStorage.getItem('authToken');
 
+// Local replica of the user's tasks, kept current through the sync endpoint
+let taskReplica = new Map();
+let syncCursor = null;
+let changeEvents = null;
+let changeEventsRetry = null;
+
 // DOMContentLoaded event
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Daily Balance app loaded');
@@ -62,7 +68,93 @@ function showDashboard() {
     document.getElementById('home-content').style.display = 'none';
     document.getElementById('auth-forms').style.display = 'none';
     document.getElementById('dashboard').style.display = 'block';
+    // Load now rather than waiting for the stream, which may not connect
     loadTasks();
+    listenForChanges();
+}
+
+async function listenForChanges() {
+    // Changes made on other devices are pushed; every (re)connect resyncs
+    if (changeEvents || changeEventsRetry || !authToken) {
+        return;
+    }
+    changeEventsRetry = 'connecting';
+    const ticket = await fetchStreamTicket();
+    changeEventsRetry = null;
+    if (!authToken) {
+        return;
+    }
+    if (!ticket) {
+        retryChanges();
+        return;
+    }
+    changeEvents = new EventSource(`${API_BASE_URL}/sync/events/?ticket=${encodeURIComponent(ticket)}`);
+    changeEvents.addEventListener('open', loadTasks);
+    changeEvents.addEventListener('task', loadTasks);
+    changeEvents.addEventListener('error', () => {
+        // Tickets expire within a minute, so reconnect with a new one
+        // instead of letting EventSource retry with the old one
+        changeEvents.close();
+        changeEvents = null;
+        retryChanges();
+    });
+}
+
+function retryChanges() {
+    if (!authToken || changeEventsRetry) {
+        return;
+    }
+    changeEventsRetry = setTimeout(() => {
+        changeEventsRetry = null;
+        listenForChanges();
+    }, 3000);
+}
+
+async function fetchStreamTicket() {
+    const request = () => fetch(`${API_BASE_URL}/sync/events/ticket/`, {
+        method: 'POST',
+        headers: {
+            'Authorization': `Bearer ${authToken}`
+        }
+    });
+    try {
+        let response = await request();
+        if (response.status === 401 && await refreshAccessToken()) {
+            response = await request();
+        }
+        if (!response.ok) {
+            return null;
+        }
+        return (await response.json()).ticket;
+    } catch (error) {
+        console.error('Error opening change stream:', error);
+        return null;
+    }
+}
+
+async function refreshAccessToken() {
+    // Access tokens last an hour; the refresh token gets a new one
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (!refreshToken) {
+        return false;
+    }
+    const response = await fetch(`${API_BASE_URL}/token/refresh/`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ refresh: refreshToken })
+    });
+    if (!response.ok) {
+        return false;
+    }
+    const data = await response.json();
+    authToken = data.access;
+    localStorage.setItem('authToken', authToken);
+    if (data.refresh) {
+        localStorage.setItem('refreshToken', data.refresh);
+    }
+    return true;
 }
 
 function showHome() {
@@ -95,6 +187,7 @@ async function login() {
             // Save token and update UI
             authToken = data.access;
             localStorage.setItem('authToken', authToken);
+            localStorage.setItem('refreshToken', data.refresh);
             
             document.getElementById('login-link').style.display = 'none';
             document.getElementById('register-link').style.display = 'none';
@@ -131,6 +224,7 @@ async function register() {
             // Save token and update UI
             authToken = data.access;
             localStorage.setItem('authToken', authToken);
+            localStorage.setItem('refreshToken', data.refresh);
             
             document.getElementById('login-link').style.display = 'none';
             document.getElementById('register-link').style.display = 'none';
@@ -169,6 +263,16 @@ async function logout() {
         localStorage.removeItem('authToken');
         localStorage.removeItem('refreshToken');
         authToken = null;
+        taskReplica = new Map();
+        syncCursor = null;
+        if (changeEvents) {
+            changeEvents.close();
+            changeEvents = null;
+        }
+        if (changeEventsRetry) {
+            clearTimeout(changeEventsRetry);
+            changeEventsRetry = null;
+        }
         
         document.getElementById('login-link').style.display = 'inline';
         document.getElementById('register-link').style.display = 'inline';
@@ -180,16 +284,38 @@ async function logout() {
 
 async function loadTasks() {
     try {
-        const response = await fetch(`${API_BASE_URL}/tasks/tasks/`, {
-            headers: {
-                'Authorization': `Bearer ${authToken}`
+        // Only rows changed since the last sync are sent; the first call
+        // (no cursor) returns everything
+        let hasMore = true;
+        let refreshed = false;
+        while (hasMore) {
+            const query = syncCursor === null ? '' : `?since=${syncCursor}`;
+            const response = await fetch(`${API_BASE_URL}/sync/${query}`, {
+                headers: {
+                    'Authorization': `Bearer ${authToken}`
+                }
+            });
+            
+            if (response.status === 401 && !refreshed) {
+                refreshed = await refreshAccessToken();
+                if (refreshed) {
+                    continue;
+                }
             }
-        });
-        
-        if (response.ok) {
-            const tasks = await response.json();
-            displayTasks(tasks);
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            data.changed.tasks.forEach(task => taskReplica.set(task.id, task));
+            data.deleted.tasks.forEach(id => taskReplica.delete(id));
+            syncCursor = data.cursor;
+            hasMore = data.has_more;
         }
+        
+        const tasks = Array.from(taskReplica.values()).sort((a, b) =>
+            (a.date + a.start_time).localeCompare(b.date + b.start_time)
+        );
+        displayTasks(tasks);
     } catch (error) {
         console.error('Error loading tasks:', error);
     }
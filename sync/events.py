@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Max
+
+from .models import Change
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between change log polls while anyone is subscribed
+POLL_INTERVAL = 0.5
+# Seconds of silence after which a keep-alive comment is sent
+HEARTBEAT = 15
+# Events buffered per connection; a client this far behind should resync anyway
+QUEUE_SIZE = 100
+# Seconds a stream ticket can be used to connect
+TICKET_MAX_AGE = 60
+TICKET_SALT = 'sync.events.ticket'
+
+
+class Subscription:
+    """
+    Events for one connection of one user.
+
+    Created with an event loop for async consumers (ASGI), without one for
+    blocking consumers (WSGI); the broker thread feeds either.
+    """
+
+    def __init__(self, user_id, loop=None):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(QUEUE_SIZE) if loop else queue.Queue(QUEUE_SIZE)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except (asyncio.QueueFull, queue.Full):
+            pass
+
+    def put(self, event):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._put, event)
+        else:
+            self._put(event)
+
+
+class ChangeBroker:
+    """
+    Per-process fan-out of change log rows to subscribed connections.
+
+    One thread polls the change log while there are subscribers, so a
+    worker makes the same single query whether it holds one connection or
+    thousands. Events only say what changed; clients fetch the rows with
+    the sync endpoint and their own cursor, so an event that is missed
+    (e.g. while reconnecting) only delays an update until the next sync.
+    """
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.last_id = None
+        self.thread = None
+
+    def subscribe(self, user_id, loop=None):
+        subscription = Subscription(user_id, loop)
+        with self.lock:
+            self.subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            connections = self.subscribers.get(subscription.user_id)
+            if connections is not None:
+                connections.discard(subscription)
+                if not connections:
+                    del self.subscribers[subscription.user_id]
+
+    def start(self):
+        """Run the polling thread if it is not already running"""
+        with self.lock:
+            if self.thread is None:
+                # Everything logged from now on reaches current subscribers
+                self.last_id = Change.objects.aggregate(latest=Max('id'))['latest'] or 0
+                self.thread = threading.Thread(target=self._run, name='sync-events', daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    break
+            close_old_connections()
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception('Polling the change log failed')
+            time.sleep(self.interval)
+        close_old_connections()
+
+    def poll(self):
+        """Deliver changes logged since the previous poll"""
+        changes = list(
+            Change.objects.filter(id__gt=self.last_id).order_by('id')
+            .values_list('id', 'user_id', 'model', 'object_id', 'deleted')[:1000]
+        )
+        if not changes:
+            return
+        self.last_id = changes[-1][0]
+
+        with self.lock:
+            targets = {user_id: list(connections) for user_id, connections in self.subscribers.items()}
+        for change_id, user_id, model, object_id, deleted in changes:
+            connections = targets.get(user_id)
+            if connections:
+                event = {'cursor': str(change_id), 'model': model, 'id': object_id, 'deleted': deleted}
+                for subscription in connections:
+                    subscription.put(event)
+
+
+broker = ChangeBroker()
+
+
+def make_ticket(user_id):
+    """
+    Signed ticket opening the user's event stream for TICKET_MAX_AGE seconds.
+
+    EventSource cannot send headers, so the stream URL carries this instead
+    of an access token; it is useless for anything else, and stale by the
+    time it shows up in access logs.
+    """
+    return signing.dumps(user_id, salt=TICKET_SALT, compress=True)
+
+
+def read_ticket(ticket):
+    """The user id of a valid ticket, or None"""
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def format_event(event):
+    return f"id: {event['cursor']}\nevent: {event['model']}\ndata: {json.dumps(event)}\n\n"
+
+
+PREAMBLE = 'retry: 3000\n\n'
+KEEP_ALIVE = ': keep-alive\n\n'
+
+
+def stream(user_id):
+    """Blocking SSE stream for WSGI servers"""
+    subscription = broker.subscribe(user_id)
+    broker.start()
+    try:
+        yield PREAMBLE
+        while True:
+            try:
+                yield format_event(subscription.queue.get(timeout=HEARTBEAT))
+            except queue.Empty:
+                yield KEEP_ALIVE
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def astream(user_id):
+    """SSE stream for ASGI servers; many connections share one event loop"""
+    subscription = broker.subscribe(user_id, asyncio.get_running_loop())
+    await sync_to_async(broker.start)()
+    try:
+        yield PREAMBLE
+        while True:
+            try:
+                yield format_event(await asyncio.wait_for(subscription.queue.get(), HEARTBEAT))
+            except asyncio.TimeoutError:
+                yield KEEP_ALIVE
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='change',
+            name='model',
+            field=models.CharField(choices=[('task', 'Task'), ('schedule', 'Daily Schedule'), ('daily_task', 'Daily Task'), ('reminder', 'Reminder'), ('streak', 'Progress Streak')], max_length=10),
+        ),
+    ]
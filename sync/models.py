@@ -0,0 +1,33 @@
+from django.db import models
+from accounts.models import User
+
+
+class Change(models.Model):
+    """
+    One create, update or delete of a synced row.
+
+    The id is the sync cursor. Rows outlive their user (no FK constraint) so
+    that cascading deletes can still log tombstones.
+    """
+    MODEL_CHOICES = [
+        ('task', 'Task'),
+        ('schedule', 'Daily Schedule'),
+        ('daily_task', 'Daily Task'),
+        ('reminder', 'Reminder'),
+        ('streak', 'Progress Streak'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['user', 'id'])]
+    
+    def __str__(self):
+        action = 'Deleted' if self.deleted else 'Changed'
+        return f"{action} {self.model} {self.object_id} (#{self.id})"
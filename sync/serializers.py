@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from schedules.models import DailySchedule, Reminder
+from schedules.serializers import ProgressStreakSerializer
+
+
+class ScheduleSyncSerializer(serializers.ModelSerializer):
+    """Schedule row without its nested tasks; those are synced separately"""
+    class Meta:
+        model = DailySchedule
+        fields = '__all__'
+
+
+class ReminderSyncSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Reminder
+        fields = '__all__'
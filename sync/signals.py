@@ -0,0 +1,63 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from accounts.models import User
+from api.signals import bulk_created, bulk_updated
+
+from schedules.models import DailySchedule, DailyTask, ProgressStreak, Reminder
+from tasks.models import Task
+from .models import Change
+
+
+# Synced model -> (change log name, how to find its owner)
+SYNCED = {
+    Task: ('task', lambda task: task.user_id),
+    DailySchedule: ('schedule', lambda schedule: schedule.user_id),
+    DailyTask: ('daily_task', lambda daily_task: daily_task.schedule.user_id),
+    Reminder: ('reminder', lambda reminder: reminder.user_id),
+    ProgressStreak: ('streak', lambda streak: streak.user_id),
+}
+
+
+def _insert_statement():
+    quote = connection.ops.quote_name
+    columns = [Change._meta.get_field(name).column for name in ('user', 'model', 'object_id', 'deleted', 'created_at')]
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(Change._meta.db_table), ', '.join(quote(column) for column in columns), ', '.join(['%s'] * len(columns)),
+    )
+
+
+def record_changes(user_id, name, object_ids, deleted=False):
+    """Log changes of the user's ``name`` rows with these ids"""
+    created_at = Change._meta.get_field('created_at').get_db_prep_save(timezone.now(), connection)
+    with transaction.atomic():
+        # Holding the user's row lock until commit makes one user's change
+        # ids commit in order, so a client cursor can never skip past a
+        # change that was still uncommitted when it synced
+        list(User.objects.select_for_update().filter(pk=user_id).values_list('pk'))
+        # executemany rather than model instances: bulk copies log thousands
+        with connection.cursor() as cursor:
+            cursor.executemany(_insert_statement(), [
+                (user_id, name, object_id, deleted, created_at) for object_id in object_ids
+            ])
+
+
+def log_change(sender, instance, deleted=False, **kwargs):
+    name, owner = SYNCED[sender]
+    record_changes(owner(instance), name, [instance.pk], deleted)
+
+
+def log_delete(sender, instance, **kwargs):
+    log_change(sender, instance, deleted=True)
+
+
+def log_bulk(sender, user_id, pks, **kwargs):
+    record_changes(user_id, SYNCED[sender][0], pks)
+
+
+for model in SYNCED:
+    post_save.connect(log_change, sender=model, dispatch_uid=f'sync.save.{model.__name__}')
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'sync.delete.{model.__name__}')
+    bulk_created.connect(log_bulk, sender=model, dispatch_uid=f'sync.bulk.{model.__name__}')
+    bulk_updated.connect(log_bulk, sender=model, dispatch_uid=f'sync.bulk_update.{model.__name__}')
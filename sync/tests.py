@@ -0,0 +1,255 @@
+import asyncio
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.signals import request_finished
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from schedules.models import DailySchedule, DailyTask, ProgressStreak
+from tasks.models import Category, Task
+from . import events, views
+from .models import Change
+
+User = get_user_model()
+
+
+class SyncAPITest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.task = Task.objects.create(
+            user=self.user,
+            category=self.category,
+            title='Test Task',
+            start_time='09:00:00',
+            end_time='10:00:00'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def sync(self, since=None):
+        params = {} if since is None else {'since': since}
+        response = self.client.get(reverse('sync'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_initial_snapshot(self):
+        """Test a sync without a cursor returns every row of the user"""
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        Task.objects.create(user=other, category=self.category, title='Not Mine',
+                            start_time='09:00:00', end_time='10:00:00')
+        
+        data = self.sync()
+        self.assertEqual([task['title'] for task in data['changed']['tasks']], ['Test Task'])
+        self.assertEqual(data['deleted']['tasks'], [])
+        self.assertFalse(data['has_more'])
+        
+        # Nothing new since the snapshot
+        data = self.sync(data['cursor'])
+        self.assertEqual(data['changed']['tasks'], [])
+    
+    def test_changes_and_tombstones(self):
+        """Test only rows changed since the cursor are returned, with deleted ids"""
+        cursor = self.sync()['cursor']
+        
+        schedule = DailySchedule.objects.create(user=self.user)
+        daily_task = DailyTask.objects.create(
+            schedule=schedule,
+            original_task=self.task,
+            title='Test Task',
+            category=self.category,
+            start_time='09:00:00',
+            end_time='10:00:00'
+        )
+        daily_task.is_completed = True
+        daily_task.save()
+        removed = Task.objects.create(user=self.user, category=self.category, title='Removed',
+                                      start_time='11:00:00', end_time='12:00:00')
+        removed_id = removed.pk
+        removed.delete()
+        
+        data = self.sync(cursor)
+        self.assertEqual(data['changed']['tasks'], [])
+        self.assertEqual(data['deleted']['tasks'], [removed_id])
+        self.assertEqual([row['id'] for row in data['changed']['schedules']], [schedule.pk])
+        self.assertEqual(len(data['changed']['daily_tasks']), 1)
+        self.assertTrue(data['changed']['daily_tasks'][0]['is_completed'])
+        self.assertGreater(int(data['cursor']), int(cursor))
+    
+    def test_cascade_deletes_logged(self):
+        """Test rows removed by a cascade are reported as deleted"""
+        schedule = DailySchedule.objects.create(user=self.user)
+        daily_task = DailyTask.objects.create(
+            schedule=schedule,
+            title='Manual',
+            category=self.category,
+            start_time='09:00:00',
+            end_time='10:00:00'
+        )
+        cursor = self.sync()['cursor']
+        schedule_id, daily_task_id = schedule.pk, daily_task.pk
+        schedule.delete()
+        
+        data = self.sync(cursor)
+        self.assertEqual(data['deleted']['schedules'], [schedule_id])
+        self.assertEqual(data['deleted']['daily_tasks'], [daily_task_id])
+    
+    def test_paging(self):
+        """Test large backlogs are returned in pages until has_more is false"""
+        cursor = self.sync()['cursor']
+        for i in range(5):
+            Task.objects.create(user=self.user, category=self.category, title=f'Task {i}',
+                                start_time='09:00:00', end_time='10:00:00')
+        
+        titles = []
+        has_more = True
+        original = views.PAGE_SIZE
+        views.PAGE_SIZE = 2
+        try:
+            while has_more:
+                data = self.sync(cursor)
+                cursor, has_more = data['cursor'], data['has_more']
+                titles += [task['title'] for task in data['changed']['tasks']]
+        finally:
+            views.PAGE_SIZE = original
+        self.assertEqual(set(titles), {f'Task {i}' for i in range(5)})
+    
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get(reverse('sync'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ChangeBrokerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        self.schedule = DailySchedule.objects.create(user=self.user)
+        self.broker = events.ChangeBroker()
+        self.broker.last_id = Change.objects.order_by('-id').values_list('id', flat=True).first()
+    
+    def test_fan_out_to_the_users_connections(self):
+        """Test every connection of the user gets the event and other users get nothing"""
+        phone = self.broker.subscribe(self.user.pk)
+        laptop = self.broker.subscribe(self.user.pk)
+        stranger = self.broker.subscribe(self.other.pk)
+        
+        daily_task = DailyTask.objects.create(
+            schedule=self.schedule,
+            title='Standup',
+            category=self.category,
+            start_time='09:00:00',
+            end_time='09:15:00'
+        )
+        self.broker.poll()
+        
+        for connection in (phone, laptop):
+            event = connection.queue.get_nowait()
+            self.assertEqual((event['model'], event['id'], event['deleted']), ('daily_task', daily_task.pk, False))
+        self.assertTrue(stranger.queue.empty())
+    
+    def test_streak_changes_pushed(self):
+        """Test streak updates are announced like other synced rows"""
+        subscription = self.broker.subscribe(self.user.pk)
+        ProgressStreak.objects.create(user=self.user)
+        self.broker.poll()
+        self.assertEqual(subscription.queue.get_nowait()['model'], 'streak')
+    
+    def test_async_subscription(self):
+        """Test events reach connections consumed on an event loop"""
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        subscription = self.broker.subscribe(self.user.pk, loop)
+        Task.objects.create(user=self.user, category=self.category, title='New',
+                            start_time='09:00:00', end_time='10:00:00')
+        self.broker.poll()
+        
+        event = loop.run_until_complete(asyncio.wait_for(subscription.queue.get(), 1))
+        self.assertEqual(event['model'], 'task')
+    
+    def test_unsubscribe(self):
+        """Test closed connections are forgotten"""
+        subscription = self.broker.subscribe(self.user.pk)
+        self.broker.unsubscribe(subscription)
+        self.assertEqual(dict(self.broker.subscribers), {})
+
+
+class SyncEventsViewTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+    
+    def close(self, response):
+        # Closing sends request_finished, whose close_old_connections would
+        # close the test database connection
+        with mock.patch.object(request_finished, 'send'):
+            response.close()
+    
+    def test_requires_token(self):
+        """Test the stream is refused without a valid ticket or token, including an access token in the URL"""
+        response = self.client.get(reverse('sync-events'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        response = self.client.get(reverse('sync-events'), {'ticket': 'not-a-ticket'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('sync-events'), {'token': self.token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('sync-events'), HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    def test_ticket_expires(self):
+        """Test tickets stop working after TICKET_MAX_AGE"""
+        ticket = events.make_ticket(self.user.pk)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + events.TICKET_MAX_AGE + 1):
+            response = self.client.get(reverse('sync-events'), {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Other signed values are not tickets
+        response = self.client.get(reverse('sync-events'), {'ticket': signing.dumps(self.user.pk)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+    
+    @mock.patch.object(events.broker, 'start')
+    def test_stream_with_ticket(self, start):
+        """Test a ticket from the ticket endpoint opens an event stream for the user"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = self.client.post(reverse('sync-events-ticket'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials()
+        
+        response = self.client.get(reverse('sync-events'), {'ticket': response.data['ticket']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        
+        content = iter(response.streaming_content)
+        self.assertEqual(next(content), events.PREAMBLE.encode())
+        self.assertIn(self.user.pk, events.broker.subscribers)
+        self.close(response)
+        self.assertNotIn(self.user.pk, events.broker.subscribers)
+    
+    @mock.patch.object(events.broker, 'start')
+    def test_stream_with_header_token(self, start):
+        """Test clients that can send headers connect with their access token"""
+        response = self.client.get(reverse('sync-events'), HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.close(response)
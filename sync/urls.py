@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+
+urlpatterns = [
+    path('', views.sync, name='sync'),
+    path('events/', views.events, name='sync-events'),
+    path('events/ticket/', views.events_ticket, name='sync-events-ticket'),
+]
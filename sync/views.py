@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from schedules.models import DailySchedule, DailyTask, ProgressStreak, Reminder
+from schedules.serializers import DailyTaskSerializer, ProgressStreakSerializer
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+from . import events as event_stream
+from .models import Change
+from .serializers import ReminderSyncSerializer, ScheduleSyncSerializer
+
+
+# Changes returned per response; clients keep calling while has_more is true
+PAGE_SIZE = 1000
+
+
+def _synced():
+    # Change log name -> (response key, queryset, serializer, owner lookup)
+    return {
+        'task': ('tasks', Task.objects.select_related('category'), TaskSerializer, 'user'),
+        'schedule': ('schedules', DailySchedule.objects.all(), ScheduleSyncSerializer, 'user'),
+        'daily_task': ('daily_tasks', DailyTask.objects.select_related('category'), DailyTaskSerializer,
+                       'schedule__user'),
+        'reminder': ('reminders', Reminder.objects.all(), ReminderSyncSerializer, 'user'),
+        'streak': ('streaks', ProgressStreak.objects.all(), ProgressStreakSerializer, 'user'),
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Rows changed since ``?since=<cursor>`` plus ids of deleted rows.
+
+    Without a cursor every row is returned. Either way the response carries
+    the cursor for the next call; rows are always sent in their current state.
+    """
+    since = request.query_params.get('since')
+    synced = _synced()
+
+    if since is None:
+        # Read the cursor first so that anything written meanwhile is sent again
+        cursor = Change.objects.aggregate(latest=Max('id'))['latest'] or 0
+        changed = {
+            key: serializer(queryset.filter(**{owner: request.user}), many=True).data
+            for key, queryset, serializer, owner in synced.values()
+        }
+        return Response({
+            'cursor': str(cursor),
+            'has_more': False,
+            'changed': changed,
+            'deleted': {key: [] for key, *_ in synced.values()},
+        })
+
+    try:
+        since = int(since)
+    except ValueError:
+        raise serializers.ValidationError({'since': 'Must be a cursor returned by a previous sync.'})
+
+    log = Change.objects.filter(user=request.user).values_list('id', 'model', 'object_id', 'deleted')
+    changes = list(log.filter(id__gt=since)[:PAGE_SIZE + 1])
+    has_more = len(changes) > PAGE_SIZE
+    changes = changes[:PAGE_SIZE]
+    cursor = changes[-1][0] if changes else since
+
+    # Latest change per row wins
+    latest = {}
+    for _, model, object_id, deleted in changes:
+        latest[model, object_id] = deleted
+
+    changed, deleted = {}, {}
+    for name, (key, queryset, serializer, owner) in synced.items():
+        ids = [object_id for (model, object_id), gone in latest.items() if model == name and not gone]
+        rows = list(queryset.filter(pk__in=ids, **{owner: request.user})) if ids else []
+        changed[key] = serializer(rows, many=True).data
+        # Rows deleted since their change was logged go out as tombstones too
+        found = {row.pk for row in rows}
+        deleted[key] = sorted(
+            {object_id for (model, object_id), gone in latest.items() if model == name and gone}
+            | (set(ids) - found)
+        )
+
+    return Response({
+        'cursor': str(cursor),
+        'has_more': has_more,
+        'changed': changed,
+        'deleted': deleted,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def events_ticket(request):
+    """A short-lived ticket for opening the event stream (see events)"""
+    return Response({'ticket': event_stream.make_ticket(request.user.pk), 'expires_in': event_stream.TICKET_MAX_AGE})
+
+
+def events(request):
+    """
+    Server-sent events announcing the user's changes as they are logged.
+
+    Browsers' EventSource cannot set headers, so it connects with
+    ``?ticket=`` from events_ticket rather than an access token; other
+    clients may send the access token in the Authorization header. On
+    (re)connecting clients should call the sync endpoint with their cursor;
+    each event carries the change's cursor.
+
+    Under WSGI each open stream holds a worker thread for as long as it
+    stays open; serve the app with an ASGI server when streams are used.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    ticket = request.GET.get('ticket')
+    if header is not None:
+        raw_token = authentication.get_raw_token(header)
+        if not raw_token:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        try:
+            user = authentication.get_user(authentication.get_validated_token(raw_token))
+        except (InvalidToken, AuthenticationFailed) as error:
+            return JsonResponse({'detail': str(error.default_detail)}, status=401)
+    elif ticket:
+        user_id = event_stream.read_ticket(ticket)
+        user = get_user_model().objects.filter(pk=user_id, is_active=True).first() if user_id is not None else None
+        if user is None:
+            return JsonResponse({'detail': 'Ticket is invalid or expired.'}, status=401)
+    else:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    if isinstance(request, ASGIRequest):
+        content = event_stream.astream(user.pk)
+    else:
+        content = event_stream.stream(user.pk)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,8 +1,24 @@
 from django.contrib import admin
+from api.admin import LargeTableAdminMixin
 from .models import Category, Task
 
 
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'color')
+    # Lets task and daily task forms pick categories with an autocomplete widget
+    search_fields = ('name',)
 
 
-admin.site.register(Category)
-admin.site.register(Task)
\ No newline at end of file
+@admin.register(Task)
+class TaskAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'user', 'category', 'date', 'start_time', 'end_time', 'priority', 'is_recurring',
+                    'is_completed')
+    list_select_related = ('user', 'category')
+    # Date ranges rather than date_hierarchy (see schedules.admin)
+    list_filter = ('date', 'is_recurring', 'is_completed', 'priority')
+    # Backwards along the (date, start_time) index, ties broken by the primary key
+    ordering = ('-date', '-start_time')
+    search_fields = ('title',)
+    raw_id_fields = ('user',)
+    autocomplete_fields = ('category',)
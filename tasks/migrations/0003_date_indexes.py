@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_alter_task_options_task_date_task_recurrence_pattern'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['date', 'start_time'], name='task_date_start_idx'),
+        ),
+    ]
@@ -1,7 +1,30 @@
-from django.db import models
+from collections import defaultdict
+from django.db import models, router, transaction
 from django.core.exceptions import ValidationError
 from accounts.models import User
-from datetime import date
+from api.routing import route_to_user
+from api.signals import bulk_created
+from datetime import date, timedelta
+
+def duration_hours(start_time, end_time):
+    """Hours between two times of day, to two decimals (seconds are ignored)"""
+    start = start_time.hour + start_time.minute / 60
+    end = end_time.hour + end_time.minute / 60
+    return round(end - start, 2)
+
+
+def tile_dates(source_start, source_end, target_start, target_end):
+    """
+    Map each date from target_start to target_end to the source date copied
+    there: the source days repeat over the target range, so a copied week
+    keeps its weekdays when target_start is on the same weekday
+    """
+    span = (source_end - source_start).days + 1
+    return {
+        target_start + timedelta(days=i): source_start + timedelta(days=i % span)
+        for i in range((target_end - target_start).days + 1)
+    }
+
 
 class Category(models.Model):
     CATEGORY_CHOICES = [
@@ -38,7 +61,9 @@ class Task(models.Model):
         ('monthly', 'Monthly'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
+    # No database constraint: with sharding (api/routing.py) users live in another
+    # database. Deleting a user still cascades, in Django rather than the database.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks', db_constraint=False)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='tasks')
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -54,6 +79,11 @@ class Task(models.Model):
     
     class Meta:
         ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['date', 'start_time'], name='task_date_start_idx'),
+            # A user's recurring tasks, read by every schedule generation
+            models.Index(fields=['user', 'date'], condition=models.Q(is_recurring=True), name='task_recurring_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.user.username})"
@@ -81,15 +111,14 @@ class Task(models.Model):
         else:
             end_time = self.end_time
             
-        start = start_time.hour + start_time.minute / 60
-        end = end_time.hour + end_time.minute / 60
-        return round(end - start, 2)
+        return duration_hours(start_time, end_time)
     
     def duplicate_for_date(self, new_date):
         """Create a duplicate task for a specific date"""
+        # Ids rather than objects, so copying does not load the user and category
         return Task(
-            user=self.user,
-            category=self.category,
+            user_id=self.user_id,
+            category_id=self.category_id,
             title=self.title,
             description=self.description,
             date=new_date,
@@ -98,4 +127,36 @@ class Task(models.Model):
             priority=self.priority,
             is_recurring=self.is_recurring,
             recurrence_pattern=self.recurrence_pattern
-        )
\ No newline at end of file
+        )
+    
+    @classmethod
+    def copy_days(cls, user, dates):
+        """
+        Copy the user's one-off tasks to other dates with one bulk insert.
+
+        ``dates`` maps each target date to the source date copied there (see
+        tile_dates). Recurring tasks are left out since they already repeat,
+        and so are copies of tasks a target date already has (same title and
+        times). Returns (number created, number skipped).
+        """
+        with route_to_user(user.pk), transaction.atomic(using=router.db_for_write(cls)):
+            sources = defaultdict(list)
+            for task in cls.objects.filter(user=user, is_recurring=False, date__in=set(dates.values())):
+                sources[task.date].append(task)
+            existing = set(cls.objects.filter(user=user, date__in=list(dates))
+                           .values_list('date', 'title', 'start_time', 'end_time'))
+            
+            copies, skipped = [], 0
+            for target, source in sorted(dates.items()):
+                for task in sources[source]:
+                    key = (target, task.title, task.start_time, task.end_time)
+                    if key in existing:
+                        skipped += 1
+                        continue
+                    existing.add(key)
+                    copies.append(task.duplicate_for_date(target))
+            
+            created = cls.objects.bulk_create(copies)
+            if created:
+                bulk_created.send(sender=cls, user_id=user.pk, pks=[task.pk for task in created])
+        return len(created), skipped
@@ -1,5 +1,7 @@
+from datetime import timedelta
 from rest_framework import serializers
-from .models import Category, Task
+from api.sparse import SparseFieldsSerializerMixin
+from .models import Category, Task, duration_hours, tile_dates
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -8,7 +10,7 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     duration = serializers.SerializerMethodField(read_only=True)
     
@@ -16,10 +18,14 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = '__all__'
         read_only_fields = ('user', 'created_at', 'updated_at')
+        field_columns = {'duration': ['start_time', 'end_time']}
     
     def get_duration(self, obj):
         return obj.duration()
     
+    def row_duration(self, row):
+        return duration_hours(row['start_time'], row['end_time'])
+    
     def validate(self, data):
         # Check if end time is after start time
         if data['end_time'] <= data['start_time']:
@@ -29,4 +35,41 @@ class TaskSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         # Set the user to the current user
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class CopyDaysSerializer(serializers.Serializer):
+    """
+    A source day or week and the target dates to copy it to.
+
+    ``source_end`` defaults to ``source_start`` (one day) and ``target_end``
+    to a range as long as the source.
+    """
+    MAX_SOURCE_DAYS = 7
+    MAX_TARGET_DAYS = 366
+    
+    source_start = serializers.DateField()
+    source_end = serializers.DateField(required=False)
+    target_start = serializers.DateField()
+    target_end = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        data.setdefault('source_end', data['source_start'])
+        span = (data['source_end'] - data['source_start']).days + 1
+        data.setdefault('target_end', data['target_start'] + timedelta(days=span - 1))
+        if not 1 <= span <= self.MAX_SOURCE_DAYS:
+            raise serializers.ValidationError(
+                f"source_end must be on or up to {self.MAX_SOURCE_DAYS - 1} days after source_start"
+            )
+        if not 1 <= (data['target_end'] - data['target_start']).days + 1 <= self.MAX_TARGET_DAYS:
+            raise serializers.ValidationError(
+                f"target_end must be on or up to {self.MAX_TARGET_DAYS - 1} days after target_start"
+            )
+        if data['target_start'] <= data['source_end'] and data['source_start'] <= data['target_end']:
+            raise serializers.ValidationError("The target dates must not overlap the source dates")
+        return data
+    
+    def dates(self):
+        """Target date -> source date"""
+        data = self.validated_data
+        return tile_dates(data['source_start'], data['source_end'], data['target_start'], data['target_end'])
@@ -1,9 +1,14 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
-from .models import Category, Task
+from datetime import date, time, timedelta
+from django.core.cache import cache
+from sync.models import Change
+from .models import Category, Task, tile_dates
 
 User = get_user_model()
 
@@ -214,4 +219,100 @@ class TaskAPITest(APITestCase):
         url = reverse('task-detail', kwargs={'pk': task.id})
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Task.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(Task.objects.count(), 0)
+
+
+class TaskCopyTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='work', color='#F9A602')
+        # A week starting on Monday 2025-03-03, two tasks a day
+        self.monday = date(2025, 3, 3)
+        for day in range(7):
+            for hour in (9, 14):
+                Task.objects.create(
+                    user=self.user,
+                    category=self.category,
+                    title=f'Day {day} at {hour}',
+                    date=self.monday + timedelta(days=day),
+                    start_time=time(hour),
+                    end_time=time(hour + 1),
+                    is_completed=True
+                )
+        Task.objects.create(
+            user=self.user,
+            category=self.category,
+            title='Recurring',
+            date=self.monday,
+            start_time='07:00:00',
+            end_time='08:00:00',
+            is_recurring=True,
+            recurrence_pattern='daily'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def copy(self, **data):
+        return self.client.post(reverse('task-copy'), {key: str(value) for key, value in data.items()})
+    
+    def test_tile_dates(self):
+        """Test source days repeat over the target range"""
+        dates = tile_dates(date(2025, 3, 3), date(2025, 3, 4), date(2025, 4, 1), date(2025, 4, 3))
+        self.assertEqual(dates, {
+            date(2025, 4, 1): date(2025, 3, 3),
+            date(2025, 4, 2): date(2025, 3, 4),
+            date(2025, 4, 3): date(2025, 3, 3),
+        })
+    
+    def test_copy_week_to_next_weeks(self):
+        """Test a week copied over two weeks lands on the same weekdays, not completed"""
+        next_monday = self.monday + timedelta(days=7)
+        response = self.copy(source_start=self.monday, source_end=self.monday + timedelta(days=6),
+                             target_start=next_monday, target_end=next_monday + timedelta(days=13))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 28, 'skipped': 0})
+        
+        copies = Task.objects.filter(date__gte=next_monday)
+        self.assertFalse(copies.filter(is_completed=True).exists())
+        self.assertFalse(copies.filter(is_recurring=True).exists())
+        self.assertEqual(
+            sorted(copies.filter(date=next_monday + timedelta(days=9)).values_list('title', flat=True)),
+            ['Day 2 at 14', 'Day 2 at 9']
+        )
+        # Copies reach sync clients
+        self.assertEqual(Change.objects.filter(model='task', object_id__in=copies.values('pk')).count(), 28)
+    
+    def test_duplicates_skipped(self):
+        """Test copying twice only creates the missing tasks"""
+        target = self.monday + timedelta(days=30)
+        Task.objects.create(user=self.user, category=self.category, title='Day 0 at 9', date=target,
+                            start_time='09:00:00', end_time='10:00:00')
+        self.assertEqual(self.copy(source_start=self.monday, target_start=target).data, {'created': 1, 'skipped': 1})
+        self.assertEqual(self.copy(source_start=self.monday, target_start=target).data, {'created': 0, 'skipped': 2})
+    
+    def test_single_insert(self):
+        """Test the copies are written with one multi-row INSERT"""
+        target = self.monday + timedelta(days=7)
+        with CaptureQueriesContext(connection) as queries:
+            self.copy(source_start=self.monday, source_end=self.monday + timedelta(days=6),
+                      target_start=target, target_end=target + timedelta(days=13))
+        # (Larger copies are split into batches only where the backend limits query parameters)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "tasks_task"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Task.objects.filter(date__gte=target).count(), 28)
+    
+    def test_invalid_ranges(self):
+        """Test ranges that are too long or overlap the source are rejected"""
+        for data in [
+            {'source_start': self.monday, 'source_end': self.monday + timedelta(days=7),
+             'target_start': self.monday + timedelta(days=14)},
+            {'source_start': self.monday, 'target_start': self.monday + timedelta(days=1),
+             'target_end': self.monday + timedelta(days=400)},
+            {'source_start': self.monday, 'source_end': self.monday + timedelta(days=6),
+             'target_start': self.monday + timedelta(days=3)},
+        ]:
+            self.assertEqual(self.copy(**data).status_code, status.HTTP_400_BAD_REQUEST)
@@ -12,6 +12,7 @@ urlpatterns = [
     path('categories/<int:pk>/', views.CategoryDetailView.as_view(), name='category-detail'),
     path('tasks/', views.TaskListCreateView.as_view(), name='task-list'),
     path('tasks/today/', views.TodayTaskListView.as_view(), name='today-task-list'),
+    path('tasks/copy/', views.copy_tasks, name='task-copy'),
     path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
     path('tasks/recurring/', views.RecurringTaskListView.as_view(), name='recurring-task-list'),
 ]
\ No newline at end of file
@@ -1,9 +1,13 @@
 from rest_framework import generics, status, filters
 from rest_framework.response import Response
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from api.rows import ValuesListMixin
+from api.sparse import SparseFieldsMixin
+from api.throttling import GenerationRateThrottle
 from .models import Category, Task
-from .serializers import CategorySerializer, TaskSerializer
+from .serializers import CategorySerializer, CopyDaysSerializer, TaskSerializer
 from datetime import date, timedelta
 
 class CategoryListCreateView(generics.ListCreateAPIView):
@@ -16,7 +20,7 @@ class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticated]
 
-class TaskListCreateView(generics.ListCreateAPIView):
+class TaskListCreateView(ValuesListMixin, SparseFieldsMixin, generics.ListCreateAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
@@ -42,23 +46,34 @@ class TaskListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskDetailView(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return Task.objects.filter(user=self.request.user)
 
-class TodayTaskListView(generics.ListAPIView):
+class TodayTaskListView(ValuesListMixin, SparseFieldsMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         return Task.objects.filter(user=self.request.user, date=date.today())
 
-class RecurringTaskListView(generics.ListAPIView):
+class RecurringTaskListView(ValuesListMixin, SparseFieldsMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user, is_recurring=True)
\ No newline at end of file
+        return Task.objects.filter(user=self.request.user, is_recurring=True)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([GenerationRateThrottle])
+def copy_tasks(request):
+    """Copy the one-off tasks of a day or week to a range of dates"""
+    serializer = CopyDaysSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    created, skipped = Task.copy_days(request.user, serializer.dates())
+    return Response({'created': created, 'skipped': skipped}, status=status.HTTP_201_CREATED)